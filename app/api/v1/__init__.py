@@ -4,7 +4,7 @@
 bp = Blueprint('api_v1', __name__)
 
 # Importar las rutas (debe ir después de crear el Blueprint para evitar referencias circulares)
-from app.api.v1.routes import usuarios, empleados, asistencias
+from app.api.v1.routes import usuarios, empleados, asistencias, feriados, reglas_horas, cierres
 
 # Ruta base para verificar el estado de la API
 @bp.route('/status', methods=['GET'])
@@ -8,8 +8,14 @@ y formatear las respuestas.
 from app.api.v1.controllers.auth_controller import AuthController
 from app.api.v1.controllers.empleado_controller import EmpleadoController
 from app.api.v1.controllers.asistencia_controller import AsistenciaController
+from app.api.v1.controllers.feriado_controller import FeriadoController
+from app.api.v1.controllers.regla_horas_controller import ReglaHorasController
+from app.api.v1.controllers.cierre_controller import CierreController
 
 # Instancias de controladores para uso en la aplicación
 auth_controller = AuthController()
 empleado_controller = EmpleadoController()
-asistencia_controller = AsistenciaController()
\ No newline at end of file
+asistencia_controller = AsistenciaController()
+feriado_controller = FeriadoController()
+regla_horas_controller = ReglaHorasController()
+cierre_controller = CierreController()
\ No newline at end of file
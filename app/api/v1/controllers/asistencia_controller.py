@@ -1,12 +1,39 @@
+import csv
+import io
+import json
+import queue
+import threading
+import time
 from datetime import datetime
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context, current_app
 from werkzeug.exceptions import BadRequest
-from app.api.v1.services import asistencia_service
+from app.api.v1.services import asistencia_service, buffer_registros, presencia_service, cache_reportes, cache_mes_actual, trabajo_reporte_service, anomalia_service
 from app.utils.security import sanitize_input, validate_date_format
 
 class AsistenciaController:
     """Controlador para gestionar asistencias"""
     
+    # Configuración de exportación
+    EXPORT_MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+    EXPORT_CAMPOS = ['id', 'fecha', 'empleado_id', 'cedula', 'nombre_completo', 'area', 'unidad_productiva',
+                     'hora_entrada', 'hora_salida', 'horas_trabajadas', 'horas_extras', 'estado', 'observaciones']
+    EXPORT_FILAS_POR_BLOQUE = 500
+    
+    # Segundos entre heartbeats del stream de presencia
+    PRESENCIA_HEARTBEAT = 15
+    
+    # Duración máxima de una conexión del stream de presencia (segundos) y espera
+    # que se indica al cliente antes de reconectar (milisegundos, campo retry de SSE)
+    PRESENCIA_DURACION_MAXIMA = 300
+    PRESENCIA_RECONEXION_MS = 1000
+    
+    # Streams de presencia abiertos a la vez en este worker si no se configura PRESENCIA_MAX_STREAMS
+    PRESENCIA_MAX_STREAMS = 4
+    
+    def __init__(self):
+        self._lock_streams = threading.Lock()
+        self._streams_abiertos = 0
+    
     def registrar_asistencia(self):
         """Maneja el registro de entrada/salida"""
         try:
@@ -33,6 +60,36 @@ class AsistenciaController:
             except ValueError:
                 return jsonify({'error': 'ID de empleado debe ser un número'}), 400
             
+            # En modo eventos solo se inserta la marcación; el proyector actualiza la asistencia
+            if current_app.config.get('ASISTENCIA_REGISTRO_MODO') == 'eventos':
+                marcacion, mensaje, error = asistencia_service.registrar_marcacion(data)
+                
+                if error:
+                    return jsonify({'error': error}), 400
+                
+                return jsonify({
+                    'message': mensaje,
+                    'marcacion': marcacion.to_dict()
+                }), 202
+            
+            # En modo diferido se encola; si el buffer está lleno se registra de forma síncrona
+            if current_app.config.get('ASISTENCIA_REGISTRO_MODO') == 'diferido':
+                registro, error = asistencia_service.validar_registro_diferido(data, buffer_registros.entrada_en_espera)
+                
+                if error:
+                    return jsonify({'error': error}), 400
+                
+                if buffer_registros.encolar(current_app._get_current_object(), registro):
+                    return jsonify({
+                        'message': 'Registro recibido, pendiente de confirmación',
+                        'registro': {
+                            'empleado_id': registro['empleado_id'],
+                            'tipo_registro': registro['tipo_registro'],
+                            'fecha': registro['fecha'].strftime('%Y-%m-%d'),
+                            'hora': registro['hora'].strftime('%H:%M:%S')
+                        }
+                    }), 202
+            
             # Registrar vía servicio
             asistencia, mensaje, error = asistencia_service.registrar_asistencia(data)
             
@@ -50,6 +107,85 @@ class AsistenciaController:
             print(f"Error registrando asistencia: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def registrar_asistencias_lote(self):
+        """Maneja el registro de un lote de entradas/salidas"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = request.get_json()
+            
+            registros = data.get('registros') if isinstance(data, dict) else None
+            if not isinstance(registros, list) or not registros:
+                return jsonify({'error': 'Se requiere una lista de registros'}), 400
+            
+            # Sanitizar observaciones si existen
+            for registro in registros:
+                if isinstance(registro, dict) and registro.get('observaciones'):
+                    registro['observaciones'] = sanitize_input(registro['observaciones'])
+            
+            # Registrar vía servicio
+            resultados, error = asistencia_service.registrar_asistencias_lote(data)
+            
+            if error:
+                return jsonify({'error': error}), 400
+            
+            exitosos = sum(1 for r in resultados if r['exito'])
+            
+            return jsonify({
+                'message': f'{exitosos} de {len(resultados)} registros procesados correctamente',
+                'exitosos': exitosos,
+                'fallidos': len(resultados) - exitosos,
+                'resultados': resultados
+            }), 200
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error registrando lote de asistencias: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def sincronizar_kiosco(self):
+        """Maneja la sincronización de marcaciones almacenadas por un kiosco"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = request.get_json()
+            
+            eventos = data.get('eventos') if isinstance(data, dict) else None
+            if not isinstance(eventos, list) or not eventos:
+                return jsonify({'error': 'Se requiere una lista de eventos'}), 400
+            
+            # Sanitizar campos de texto
+            if isinstance(data.get('kiosco_id'), str):
+                data['kiosco_id'] = sanitize_input(data['kiosco_id'])
+            for evento in eventos:
+                if isinstance(evento, dict) and evento.get('observaciones'):
+                    evento['observaciones'] = sanitize_input(evento['observaciones'])
+            
+            # Sincronizar vía servicio
+            acuses, error = asistencia_service.sincronizar_eventos_kiosco(data)
+            
+            if error:
+                return jsonify({'error': error}), 400
+            
+            return jsonify({
+                'message': f'{len(acuses)} eventos sincronizados',
+                'aplicados': sum(1 for a in acuses if a['estado'] == 'aplicado'),
+                'rechazados': sum(1 for a in acuses if a['estado'] == 'rechazado'),
+                'duplicados': sum(1 for a in acuses if a['estado'] == 'duplicado'),
+                'acuses': acuses
+            }), 200
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error sincronizando kiosco: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
     def get_asistencia(self, asistencia_id):
         """Obtiene información de una asistencia por ID"""
         try:
@@ -127,6 +263,109 @@ class AsistenciaController:
             print(f"Error obteniendo asistencia del día: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def get_presencia(self):
+        """Obtiene los empleados presentes en este momento, por unidad productiva"""
+        try:
+            unidad_productiva = request.args.get('unidad_productiva')
+            if unidad_productiva:
+                unidad_productiva = sanitize_input(unidad_productiva)
+            
+            return jsonify(presencia_service.get_snapshot(unidad_productiva)), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo presencia: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def stream_presencia(self):
+        """
+        Stream SSE de presencia: envía una instantánea (evento "snapshot") y luego
+        los cambios (evento "delta") a medida que se registran entradas y salidas
+        """
+        # Cada stream ocupa un hilo del worker mientras está abierto: por encima del límite se
+        # rechaza para dejar hilos a las demás solicitudes, y el cliente reintenta más tarde
+        if not self._reservar_stream():
+            return jsonify({
+                'error': 'Demasiados streams de presencia abiertos, intente más tarde',
+                'retry': self.PRESENCIA_RECONEXION_MS
+            }), 503, {'Retry-After': str(max(1, self.PRESENCIA_RECONEXION_MS // 1000))}
+        
+        try:
+            unidad_productiva = request.args.get('unidad_productiva')
+            if unidad_productiva:
+                unidad_productiva = sanitize_input(unidad_productiva)
+            
+            # Suscribirse antes de tomar la instantánea para no perder deltas intermedios
+            cola = presencia_service.suscribir(unidad_productiva)
+            try:
+                snapshot = presencia_service.get_snapshot(unidad_productiva)
+            except Exception:
+                presencia_service.cancelar(cola)
+                raise
+            
+            respuesta = Response(
+                stream_with_context(self._generar_eventos_presencia(cola, snapshot, unidad_productiva)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            # El servidor cierra la respuesta aunque el generador no llegue a iniciarse
+            respuesta.call_on_close(self._liberar_stream)
+            return respuesta
+                
+        except Exception as e:
+            self._liberar_stream()
+            print(f"Error iniciando stream de presencia: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _reservar_stream(self):
+        """Ocupa un cupo de stream de presencia en este worker; False si no quedan"""
+        limite = current_app.config.get('PRESENCIA_MAX_STREAMS', self.PRESENCIA_MAX_STREAMS)
+        with self._lock_streams:
+            if self._streams_abiertos >= limite:
+                return False
+            self._streams_abiertos += 1
+            return True
+    
+    def _liberar_stream(self):
+        """Devuelve un cupo de stream de presencia"""
+        with self._lock_streams:
+            self._streams_abiertos -= 1
+    
+    def _generar_eventos_presencia(self, cola, snapshot, unidad_productiva):
+        """
+        Genera los eventos SSE de presencia hasta que el cliente se desconecta o se alcanza
+        PRESENCIA_DURACION_MAXIMA; entonces se cierra la conexión y EventSource reconecta
+        (tras PRESENCIA_RECONEXION_MS) recibiendo una instantánea nueva
+        """
+        fin = time.monotonic() + self.PRESENCIA_DURACION_MAXIMA
+        try:
+            yield f'retry: {self.PRESENCIA_RECONEXION_MS}\n\n'
+            yield self._evento_sse('snapshot', snapshot)
+            
+            while True:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    return
+                
+                try:
+                    delta = cola.get(timeout=min(self.PRESENCIA_HEARTBEAT, restante))
+                except queue.Empty:
+                    # Sin cambios locales: incorporar los de otros workers si venció el índice
+                    presencia_service.sincronizar()
+                    if cola.empty():
+                        yield ': heartbeat\n\n'
+                    continue
+                
+                if delta['tipo'] == 'reinicio':
+                    yield self._evento_sse('snapshot', presencia_service.get_snapshot(unidad_productiva))
+                else:
+                    yield self._evento_sse('delta', delta)
+        finally:
+            presencia_service.cancelar(cola)
+    
+    def _evento_sse(self, evento, datos):
+        """Formatea un evento Server-Sent Events"""
+        return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+    
     def get_asistencias(self):
         """Obtiene lista de asistencias con filtros"""
         try:
@@ -135,32 +374,28 @@ class AsistenciaController:
             per_page = min(request.args.get('per_page', 20, type=int), 100)  # Limitar a 100
             
             # Preparar filtros
-            filters = {}
+            filters, error = self._obtener_filtros()
+            if error:
+                return jsonify({'error': error}), 400
             
-            # Filtro por empleado
-            if 'empleado_id' in request.args:
+            # Paginación por cursor (keyset): no usa OFFSET y el total es opcional
+            if 'cursor' in request.args:
+                incluir_total = request.args.get('incluir_total', 'false').lower() == 'true'
                 try:
-                    filters['empleado_id'] = int(request.args.get('empleado_id'))
+                    asistencias, next_cursor, total = asistencia_service.get_asistencias_cursor(
+                        request.args.get('cursor') or None, per_page, incluir_total, **filters)
                 except ValueError:
-                    return jsonify({'error': 'ID de empleado debe ser un número'}), 400
-            
-            # Filtros de fecha
-            if 'fecha_inicio' in request.args:
-                fecha_inicio = request.args.get('fecha_inicio')
-                if not validate_date_format(fecha_inicio):
-                    return jsonify({'error': 'Formato de fecha_inicio inválido. Usar YYYY-MM-DD'}), 400
-                filters['fecha_inicio'] = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+                    return jsonify({'error': 'Cursor inválido'}), 400
                 
-            if 'fecha_fin' in request.args:
-                fecha_fin = request.args.get('fecha_fin')
-                if not validate_date_format(fecha_fin):
-                    return jsonify({'error': 'Formato de fecha_fin inválido. Usar YYYY-MM-DD'}), 400
-                filters['fecha_fin'] = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
-            
-            # Otros filtros (sanitizados)
-            for f in ['estado', 'area', 'unidad_productiva']:
-                if f in request.args:
-                    filters[f] = sanitize_input(request.args.get(f))
+                respuesta = {
+                    'asistencias': [a.to_dict() for a in asistencias],
+                    'next_cursor': next_cursor,
+                    'per_page': per_page
+                }
+                if total is not None:
+                    respuesta['total'] = total
+                
+                return jsonify(respuesta), 200
             
             # Obtener asistencias vía servicio
             asistencias, total = asistencia_service.get_all_asistencias(page, per_page, **filters)
@@ -177,6 +412,127 @@ class AsistenciaController:
             print(f"Error obteniendo asistencias: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def get_anomalias(self):
+        """Obtiene lista paginada de anomalías detectadas con filtros"""
+        try:
+            # Obtener parámetros de consulta
+            page = request.args.get('page', 1, type=int)
+            per_page = min(request.args.get('per_page', 20, type=int), 100)  # Limitar a 100
+            
+            # Filtros de empleado y fechas comunes a los listados
+            filters, error = self._obtener_filtros()
+            if error:
+                return jsonify({'error': error}), 400
+            
+            if 'tipo' in request.args:
+                filters['tipo'] = sanitize_input(request.args.get('tipo'))
+            
+            anomalias, total = anomalia_service.get_anomalias(page, per_page, **filters)
+            
+            return jsonify({
+                'anomalias': [a.to_dict() for a in anomalias],
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'pages': (total // per_page) + (1 if total % per_page > 0 else 0)
+            }), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo anomalías: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _obtener_filtros(self):
+        """
+        Extrae y valida los filtros de listado desde los parámetros de consulta
+        
+        Returns:
+            tuple: (filtros, None) si son válidos, (None, mensaje) si hay error
+        """
+        filters = {}
+        
+        # Filtro por empleado
+        if 'empleado_id' in request.args:
+            try:
+                filters['empleado_id'] = int(request.args.get('empleado_id'))
+            except ValueError:
+                return None, 'ID de empleado debe ser un número'
+        
+        # Filtros de fecha
+        if 'fecha_inicio' in request.args:
+            fecha_inicio = request.args.get('fecha_inicio')
+            if not validate_date_format(fecha_inicio):
+                return None, 'Formato de fecha_inicio inválido. Usar YYYY-MM-DD'
+            filters['fecha_inicio'] = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+            
+        if 'fecha_fin' in request.args:
+            fecha_fin = request.args.get('fecha_fin')
+            if not validate_date_format(fecha_fin):
+                return None, 'Formato de fecha_fin inválido. Usar YYYY-MM-DD'
+            filters['fecha_fin'] = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+        
+        # Otros filtros (sanitizados)
+        for f in ['estado', 'area', 'unidad_productiva']:
+            if f in request.args:
+                filters[f] = sanitize_input(request.args.get(f))
+        
+        return filters, None
+    
+    def exportar_asistencias(self):
+        """Exporta asistencias en CSV o NDJSON como respuesta en streaming"""
+        try:
+            formato = request.args.get('format', 'csv').lower()
+            if formato not in self.EXPORT_MIMETYPES:
+                return jsonify({'error': 'Formato debe ser "csv" o "ndjson"'}), 400
+            
+            filters, error = self._obtener_filtros()
+            if error:
+                return jsonify({'error': error}), 400
+            
+            if filters.get('fecha_inicio') and filters.get('fecha_fin') and filters['fecha_inicio'] > filters['fecha_fin']:
+                return jsonify({'error': 'fecha_inicio debe ser menor o igual a fecha_fin'}), 400
+            
+            filas = asistencia_service.iter_asistencias_export(**filters)
+            generador = self._generar_csv(filas) if formato == 'csv' else self._generar_ndjson(filas)
+            
+            nombre_archivo = f"asistencias_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{formato}"
+            
+            return Response(
+                stream_with_context(generador),
+                mimetype=self.EXPORT_MIMETYPES[formato],
+                headers={'Content-Disposition': f'attachment; filename={nombre_archivo}'}
+            )
+                
+        except Exception as e:
+            print(f"Error exportando asistencias: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _generar_csv(self, filas):
+        """Genera el CSV por bloques de filas para no acumular el archivo en memoria"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.EXPORT_CAMPOS)
+        writer.writeheader()
+        
+        for i, fila in enumerate(filas, start=1):
+            writer.writerow(fila)
+            if i % self.EXPORT_FILAS_POR_BLOQUE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        
+        yield buffer.getvalue()
+    
+    def _generar_ndjson(self, filas):
+        """Genera NDJSON (un objeto JSON por línea) por bloques de filas"""
+        bloque = []
+        for fila in filas:
+            bloque.append(json.dumps(fila, ensure_ascii=False))
+            if len(bloque) >= self.EXPORT_FILAS_POR_BLOQUE:
+                yield '\n'.join(bloque) + '\n'
+                bloque = []
+        
+        if bloque:
+            yield '\n'.join(bloque) + '\n'
+    
     def aprobar_asistencia(self, asistencia_id):
         """Aprueba o rechaza una asistencia"""
         try:
@@ -228,6 +584,114 @@ class AsistenciaController:
             print(f"Error aprobando asistencia: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def aprobar_asistencias_lote(self, usuario_id):
+        """Aprueba o rechaza un lote de asistencias pendientes"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = request.get_json()
+            
+            # Validar estado
+            if 'estado' not in data or data['estado'] not in ['Aprobado', 'Rechazado']:
+                return jsonify({'error': 'Estado debe ser "Aprobado" o "Rechazado"'}), 400
+            
+            # Sanitizar campos de texto
+            for key in ['observaciones', 'area', 'unidad_productiva']:
+                if key in data and isinstance(data[key], str):
+                    data[key] = sanitize_input(data[key])
+            
+            try:
+                usuario_id = int(usuario_id)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'ID de usuario inválido'}), 400
+            
+            # Aprobar vía servicio
+            resultados, error = asistencia_service.aprobar_asistencias_lote(usuario_id, data)
+            
+            if error:
+                return jsonify({'error': error}), 400
+            
+            procesadas = sum(1 for r in resultados if r['exito'])
+            
+            return jsonify({
+                'message': f'{procesadas} asistencias procesadas correctamente',
+                'procesadas': procesadas,
+                'fallidas': len(resultados) - procesadas,
+                'resultados': resultados
+            }), 200
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error aprobando lote de asistencias: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def get_cola_pendientes(self):
+        """Obtiene la cola de asistencias pendientes de aprobación con conteo por área"""
+        try:
+            limite = min(request.args.get('limite', 50, type=int), 200)  # Limitar a 200
+            
+            filters, error = self._obtener_filtros()
+            if error:
+                return jsonify({'error': error}), 400
+            
+            try:
+                asistencias, next_cursor, conteo_por_area = asistencia_service.get_cola_pendientes(
+                    limite, request.args.get('cursor') or None, **filters)
+            except ValueError:
+                return jsonify({'error': 'Cursor inválido'}), 400
+            
+            return jsonify({
+                'asistencias': [a.to_dict() for a in asistencias],
+                'next_cursor': next_cursor,
+                'conteo_por_area': conteo_por_area,
+                'total_pendientes': sum(conteo_por_area.values())
+            }), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo cola de pendientes: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def reclamar_pendientes(self, usuario_id):
+        """Reclama un lote de asistencias pendientes para el aprobador actual"""
+        try:
+            data = request.get_json(silent=True) or {}
+            
+            try:
+                cantidad = min(int(data.get('cantidad', 20)), 200)  # Limitar a 200
+                usuario_id = int(usuario_id)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Cantidad y usuario deben ser números'}), 400
+            
+            if cantidad < 1:
+                return jsonify({'error': 'Cantidad debe ser mayor a cero'}), 400
+            
+            filters = {}
+            for key in ['area', 'unidad_productiva']:
+                if data.get(key):
+                    filters[key] = sanitize_input(data[key])
+            for key in ['fecha_inicio', 'fecha_fin']:
+                if data.get(key):
+                    if not validate_date_format(data[key]):
+                        return jsonify({'error': f'Formato de {key} inválido. Usar YYYY-MM-DD'}), 400
+                    filters[key] = datetime.strptime(data[key], '%Y-%m-%d').date()
+            
+            asistencias, error = asistencia_service.reclamar_pendientes(usuario_id, cantidad, **filters)
+            
+            if error:
+                return jsonify({'error': error}), 400
+            
+            return jsonify({
+                'message': f'{len(asistencias)} asistencias reclamadas',
+                'asistencias': [a.to_dict() for a in asistencias]
+            }), 200
+                
+        except Exception as e:
+            print(f"Error reclamando asistencias pendientes: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
     def calcular_horas(self, empleado_id):
         """Calcula horas de un empleado en un período"""
         try:
@@ -275,45 +739,150 @@ class AsistenciaController:
             print(f"Error calculando horas: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def calcular_horas_empleados(self):
+        """Calcula horas de varios empleados (por IDs o por filtro) en un período"""
+        try:
+            data = request.get_json()
+            if not data:
+                return jsonify({'error': 'No se proporcionaron datos'}), 400
+            
+            # Sanitizar filtros
+            for key in ['area', 'unidad_productiva']:
+                if key in data and isinstance(data[key], str):
+                    data[key] = sanitize_input(data[key])
+            
+            resultado, errors = asistencia_service.calcular_horas_empleados(data)
+            
+            if errors:
+                return jsonify({'error': 'Error al calcular horas', 'detalles': errors}), 400
+                
+            return jsonify(resultado), 200
+                
+        except BadRequest:
+            return jsonify({'error': 'Formato JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error calculando horas de empleados: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
     def generar_reporte(self):
         """Genera un reporte de asistencias por período"""
         try:
-            # Obtener y validar fechas (requeridas)
-            fecha_inicio = request.args.get('fecha_inicio')
-            fecha_fin = request.args.get('fecha_fin')
+            parametros, error = self._obtener_parametros_reporte()
+            if error:
+                return jsonify({'error': error}), 400
             
-            if not fecha_inicio or not fecha_fin:
-                return jsonify({'error': 'Se requieren fecha_inicio y fecha_fin'}), 400
+            # Generar reporte vía servicio
+            reporte = asistencia_service.generar_reporte_asistencias(*parametros)
             
-            # Validar formato de fechas
-            if not validate_date_format(fecha_inicio) or not validate_date_format(fecha_fin):
-                return jsonify({'error': 'Formato de fecha inválido. Usar YYYY-MM-DD'}), 400
+            return jsonify(reporte), 200
+                
+        except Exception as e:
+            print(f"Error generando reporte: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def generar_reporte_consolidado(self):
+        """Genera un reporte de asistencias con subtotales por unidad productiva y área"""
+        try:
+            parametros, error = self._obtener_parametros_reporte()
+            if error:
+                return jsonify({'error': error}), 400
             
-            # Parsear fechas
-            fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
-            fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+            reporte = asistencia_service.generar_reporte_consolidado(*parametros)
             
-            # Validar que fecha_inicio sea menor o igual a fecha_fin
-            if fecha_inicio > fecha_fin:
-                return jsonify({'error': 'fecha_inicio debe ser menor o igual a fecha_fin'}), 400
+            return jsonify(reporte), 200
+                
+        except Exception as e:
+            print(f"Error generando reporte consolidado: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _obtener_parametros_reporte(self):
+        """
+        Obtiene y valida los parámetros de reporte de la query string
+        
+        Returns:
+            tuple: ((fecha_inicio, fecha_fin, area, unidad_productiva), None) o (None, mensaje de error)
+        """
+        # Obtener y validar fechas (requeridas)
+        fecha_inicio = request.args.get('fecha_inicio')
+        fecha_fin = request.args.get('fecha_fin')
+        
+        if not fecha_inicio or not fecha_fin:
+            return None, 'Se requieren fecha_inicio y fecha_fin'
+        
+        # Validar formato de fechas
+        if not validate_date_format(fecha_inicio) or not validate_date_format(fecha_fin):
+            return None, 'Formato de fecha inválido. Usar YYYY-MM-DD'
+        
+        # Parsear fechas
+        fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+        fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+        
+        # Validar que fecha_inicio sea menor o igual a fecha_fin
+        if fecha_inicio > fecha_fin:
+            return None, 'fecha_inicio debe ser menor o igual a fecha_fin'
+        
+        # Filtros (sanitizados)
+        area = request.args.get('area')
+        unidad_productiva = request.args.get('unidad_productiva')
+        
+        if area:
+            area = sanitize_input(area)
+            
+        if unidad_productiva:
+            unidad_productiva = sanitize_input(unidad_productiva)
+        
+        return (fecha_inicio, fecha_fin, area, unidad_productiva), None
+    
+    def crear_trabajo_reporte(self, usuario_id):
+        """Encola la generación de un reporte en segundo plano"""
+        try:
+            data = request.get_json()
+            if not data:
+                return jsonify({'error': 'No se proporcionaron datos'}), 400
             
-            # Filtros (sanitizados)
-            area = request.args.get('area')
-            unidad_productiva = request.args.get('unidad_productiva')
+            # Sanitizar filtros
+            for key in ['area', 'unidad_productiva']:
+                if key in data and isinstance(data[key], str):
+                    data[key] = sanitize_input(data[key])
             
-            if area:
-                area = sanitize_input(area)
-                
-            if unidad_productiva:
-                unidad_productiva = sanitize_input(unidad_productiva)
+            trabajo, errors = trabajo_reporte_service.crear_trabajo(usuario_id, data)
             
-            # Generar reporte vía servicio
-            reporte = asistencia_service.generar_reporte_asistencias(
-                fecha_inicio, fecha_fin, area, unidad_productiva)
+            if errors:
+                return jsonify({'error': 'Error al crear trabajo de reporte', 'detalles': errors}), 400
+                
+            return jsonify({
+                'message': 'Reporte en proceso',
+                'trabajo': trabajo.to_dict(incluir_resultado=False)
+            }), 202
+                
+        except BadRequest:
+            return jsonify({'error': 'Formato JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error creando trabajo de reporte: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def get_trabajo_reporte(self, trabajo_id):
+        """Obtiene el estado de un trabajo de reporte y su resultado si ya terminó"""
+        try:
+            trabajo = trabajo_reporte_service.get_trabajo(trabajo_id)
             
-            return jsonify(reporte), 200
+            if not trabajo:
+                return jsonify({'error': 'Trabajo de reporte no encontrado'}), 404
+                
+            return jsonify(trabajo.to_dict()), 200
                 
         except Exception as e:
-            print(f"Error generando reporte: {str(e)}")
+            print(f"Error obteniendo trabajo de reporte: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def get_estadisticas_cache_reporte(self):
+        """Obtiene los contadores de la caché de reportes y de la caché del mes en curso del worker que atiende la petición"""
+        try:
+            estadisticas = cache_reportes.get_estadisticas()
+            estadisticas['mes_actual'] = cache_mes_actual.get_estadisticas()
+            return jsonify(estadisticas), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo estadísticas de caché: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
             
\ No newline at end of file
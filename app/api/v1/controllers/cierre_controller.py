@@ -0,0 +1,145 @@
+import csv
+import io
+from datetime import datetime
+from flask import request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import BadRequest
+from app.api.v1.services import cierre_service
+
+class CierreController:
+    """Controlador para gestionar el cierre mensual de nómina"""
+    
+    # Configuración de exportación
+    EXPORT_CAMPOS = ['periodo', 'empleado_id', 'cedula', 'nombre_completo', 'area', 'unidad_productiva',
+                     'horas_trabajadas', 'horas_extras', 'dias_asistidos', 'dias_faltantes', 'dias_laborables']
+    EXPORT_FILAS_POR_BLOQUE = 500
+    
+    def get_periodos_cerrados(self):
+        """Obtiene la lista de meses cerrados"""
+        try:
+            cierres = cierre_service.get_periodos_cerrados()
+            
+            return jsonify({
+                'cierres': [c.to_dict() for c in cierres],
+                'total': len(cierres)
+            }), 200
+            
+        except Exception as e:
+            print(f"Error obteniendo cierres: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def cerrar_periodo(self, usuario_id):
+        """Cierra un mes congelando sus totales por empleado"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+            
+            data = request.get_json()
+            if not isinstance(data, dict) or not data.get('periodo'):
+                return jsonify({'error': 'Se requiere el periodo (YYYY-MM)'}), 400
+            
+            periodo = self._parse_periodo(data['periodo'])
+            if not periodo:
+                return jsonify({'error': 'Formato de periodo inválido. Usar YYYY-MM'}), 400
+            
+            try:
+                usuario_id = int(usuario_id)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'ID de usuario inválido'}), 400
+            
+            cierre, error = cierre_service.cerrar_periodo(periodo, usuario_id)
+            
+            if error:
+                return jsonify({'error': error}), 400
+            
+            return jsonify({
+                'message': 'Período cerrado exitosamente',
+                'cierre': cierre.to_dict()
+            }), 201
+            
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error cerrando período: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def get_periodo_cerrado(self, periodo):
+        """Obtiene los datos de un mes cerrado"""
+        try:
+            fecha = self._parse_periodo(periodo)
+            if not fecha:
+                return jsonify({'error': 'Formato de periodo inválido. Usar YYYY-MM'}), 400
+            
+            cierre = cierre_service.get_periodo_cerrado(fecha)
+            if not cierre:
+                return jsonify({'error': 'El período no está cerrado'}), 404
+            
+            return jsonify({'cierre': cierre.to_dict()}), 200
+            
+        except Exception as e:
+            print(f"Error obteniendo cierre: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def exportar_cierre(self, periodo):
+        """Exporta los totales congelados de un mes en CSV como respuesta en streaming"""
+        try:
+            fecha = self._parse_periodo(periodo)
+            if not fecha:
+                return jsonify({'error': 'Formato de periodo inválido. Usar YYYY-MM'}), 400
+            
+            cierre = cierre_service.get_periodo_cerrado(fecha)
+            if not cierre:
+                return jsonify({'error': 'El período no está cerrado'}), 404
+            
+            filas = cierre_service.iter_cierre(fecha, cierre.dias_laborables)
+            nombre_archivo = f"cierre_{fecha.strftime('%Y%m')}.csv"
+            
+            return Response(
+                stream_with_context(self._generar_csv(filas)),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename={nombre_archivo}'}
+            )
+            
+        except Exception as e:
+            print(f"Error exportando cierre: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def reabrir_periodo(self, periodo):
+        """Reabre un mes cerrado"""
+        try:
+            fecha = self._parse_periodo(periodo)
+            if not fecha:
+                return jsonify({'error': 'Formato de periodo inválido. Usar YYYY-MM'}), 400
+            
+            result = cierre_service.reabrir_periodo(fecha)
+            
+            if not result:
+                return jsonify({'error': 'El período no está cerrado'}), 404
+            
+            return jsonify({'message': 'Período reabierto exitosamente'}), 200
+            
+        except Exception as e:
+            print(f"Error reabriendo período: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _generar_csv(self, filas):
+        """Genera el CSV por bloques de filas para no acumular el archivo en memoria"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.EXPORT_CAMPOS)
+        writer.writeheader()
+        
+        for i, fila in enumerate(filas, start=1):
+            writer.writerow(fila)
+            if i % self.EXPORT_FILAS_POR_BLOQUE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        
+        yield buffer.getvalue()
+    
+    def _parse_periodo(self, periodo):
+        """Convierte un periodo YYYY-MM en el primer día del mes (None si no es válido)"""
+        try:
+            return datetime.strptime(str(periodo), '%Y-%m').date()
+        except ValueError:
+            return None
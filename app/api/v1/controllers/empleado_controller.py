@@ -125,6 +125,29 @@ class EmpleadoController:
             print(f"Error obteniendo empleados: {str(e)}")
             return jsonify({'error': 'Error interno del servidor'}), 500
     
+    def autocompletar_empleados(self):
+        """Sugiere empleados activos por prefijo de cédula o nombre (índice en memoria, sin consultar la base de datos)"""
+        try:
+            # El texto solo se compara contra el índice y no se devuelve: basta con acotar su longitud
+            texto = request.args.get('q', '')
+            if len(texto) > 100:
+                return jsonify({'error': 'El parámetro q es demasiado largo'}), 400
+            
+            limite = request.args.get('limite', 10, type=int)
+            if limite < 1:
+                return jsonify({'error': 'El límite debe ser mayor a 0'}), 400
+            
+            empleados = empleado_service.autocompletar(texto, limite)
+            
+            return jsonify({
+                'empleados': empleados,
+                'total': len(empleados)
+            }), 200
+                
+        except Exception as e:
+            print(f"Error autocompletando empleados: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
     def update_empleado(self, empleado_id):
         """Actualiza información de un empleado"""
         try:
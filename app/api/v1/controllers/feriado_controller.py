@@ -0,0 +1,65 @@
+from flask import request, jsonify
+from werkzeug.exceptions import BadRequest
+from app.api.v1.services import calendario_service
+from app.utils.security import sanitize_input
+
+class FeriadoController:
+    """Controlador para gestionar feriados del calendario laboral"""
+    
+    def get_feriados(self):
+        """Obtiene la lista de feriados, opcionalmente filtrada por año"""
+        try:
+            anio = request.args.get('anio', type=int)
+            feriados = calendario_service.get_feriados(anio)
+            
+            return jsonify({
+                'feriados': [f.to_dict() for f in feriados],
+                'total': len(feriados)
+            }), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo feriados: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def create_feriado(self):
+        """Maneja el registro de un feriado"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = request.get_json()
+            
+            # Sanitizar descripción
+            if 'descripcion' in data and isinstance(data['descripcion'], str):
+                data['descripcion'] = sanitize_input(data['descripcion'])
+            
+            feriado, error = calendario_service.create_feriado(data)
+            
+            if error:
+                return jsonify({'error': error}), 400
+                
+            return jsonify({
+                'message': 'Feriado registrado exitosamente',
+                'feriado': feriado.to_dict()
+            }), 201
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error registrando feriado: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def delete_feriado(self, feriado_id):
+        """Elimina un feriado"""
+        try:
+            result = calendario_service.delete_feriado(feriado_id)
+            
+            if not result:
+                return jsonify({'error': 'Feriado no encontrado'}), 404
+                
+            return jsonify({'message': 'Feriado eliminado exitosamente'}), 200
+                
+        except Exception as e:
+            print(f"Error eliminando feriado: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
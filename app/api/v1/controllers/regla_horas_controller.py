@@ -0,0 +1,96 @@
+from flask import request, jsonify
+from werkzeug.exceptions import BadRequest
+from app.api.v1.services import regla_horas_service
+from app.utils.security import sanitize_input
+
+class ReglaHorasController:
+    """Controlador para gestionar las reglas de cálculo de horas por unidad productiva y área"""
+    
+    def get_reglas(self):
+        """Obtiene la lista de reglas de horas"""
+        try:
+            reglas = regla_horas_service.get_reglas()
+            
+            return jsonify({
+                'reglas': [r.to_dict() for r in reglas],
+                'total': len(reglas)
+            }), 200
+                
+        except Exception as e:
+            print(f"Error obteniendo reglas de horas: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def create_regla(self):
+        """Maneja el registro de una regla de horas"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = self._sanitizar(request.get_json())
+            
+            regla, error = regla_horas_service.create_regla(data)
+            
+            if error:
+                return jsonify({'error': error}), 400
+                
+            return jsonify({
+                'message': 'Regla de horas registrada exitosamente',
+                'regla': regla.to_dict()
+            }), 201
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error registrando regla de horas: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def update_regla(self, regla_id):
+        """Actualiza una regla de horas"""
+        try:
+            # Validar formato de solicitud
+            if not request.is_json:
+                return jsonify({'error': 'Solicitud debe ser JSON'}), 400
+                
+            data = self._sanitizar(request.get_json())
+            
+            regla, error = regla_horas_service.update_regla(regla_id, data)
+            
+            if error:
+                if 'regla' in error and error['regla'] == ['Regla no encontrada']:
+                    return jsonify({'error': 'Regla no encontrada'}), 404
+                return jsonify({'error': error}), 400
+                
+            return jsonify({
+                'message': 'Regla de horas actualizada exitosamente',
+                'regla': regla.to_dict()
+            }), 200
+                
+        except BadRequest:
+            return jsonify({'error': 'JSON inválido'}), 400
+        except Exception as e:
+            print(f"Error actualizando regla de horas: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def delete_regla(self, regla_id):
+        """Elimina una regla de horas"""
+        try:
+            result = regla_horas_service.delete_regla(regla_id)
+            
+            if not result:
+                return jsonify({'error': 'Regla no encontrada'}), 404
+                
+            return jsonify({'message': 'Regla de horas eliminada exitosamente'}), 200
+                
+        except Exception as e:
+            print(f"Error eliminando regla de horas: {str(e)}")
+            return jsonify({'error': 'Error interno del servidor'}), 500
+    
+    def _sanitizar(self, data):
+        """Sanitiza los campos de texto de una regla"""
+        if not isinstance(data, dict):
+            raise BadRequest()
+        for key in ['unidad_productiva', 'area']:
+            if isinstance(data.get(key), str):
+                data[key] = sanitize_input(data[key])
+        return data
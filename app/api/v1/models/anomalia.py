@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime
+
+class Anomalia(db.Model):
+    """Anomalía de asistencia detectada por el escaneo `flask scan-anomalias`"""
+    __tablename__ = 'anomalias'
+    __table_args__ = (
+        # Una anomalía de cada tipo por empleado y día
+        db.UniqueConstraint('tipo', 'empleado_id', 'fecha', name='uq_anomalias_tipo_empleado_fecha'),
+        # Orden del listado (fecha DESC, id) y filtros por tipo o empleado
+        db.Index('ix_anomalias_fecha_id', db.desc('fecha'), 'id'),
+        db.Index('ix_anomalias_tipo_fecha', 'tipo', 'fecha'),
+        db.Index('ix_anomalias_empleado_fecha', 'empleado_id', 'fecha'),
+    )
+    
+    # Tipos de anomalía
+    TIPOS = ('registro_abierto', 'duracion_imposible', 'duplicado', 'dia_faltante')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(30), nullable=False)
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    asistencia_id = db.Column(db.Integer, nullable=True)  # Sin FK: la asistencia puede archivarse
+    detalle = db.Column(db.String(255), nullable=True)
+    detectado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Anomalia {self.tipo} {self.empleado_id} {self.fecha}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'empleado_id': self.empleado_id,
+            'fecha': self.fecha.strftime('%Y-%m-%d'),
+            'asistencia_id': self.asistencia_id,
+            'detalle': self.detalle,
+            'detectado_en': self.detectado_en.strftime('%Y-%m-%d %H:%M:%S')
+        }
@@ -0,0 +1,31 @@
+from app import db
+from datetime import datetime
+
+class ArchivoAsistencia(db.Model):
+    """Archivo Parquet con las asistencias de un mes y una unidad productiva movidas fuera de la tabla activa"""
+    __tablename__ = 'archivos_asistencia'
+    __table_args__ = (
+        db.UniqueConstraint('periodo', 'unidad_productiva', name='uq_archivo_periodo_unidad'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    periodo = db.Column(db.Date, nullable=False, index=True)  # Primer día del mes
+    unidad_productiva = db.Column(db.String(100), nullable=False)
+    ruta = db.Column(db.String(500), nullable=False)  # Relativa al directorio de archivo
+    filas = db.Column(db.Integer, nullable=False)
+    bytes = db.Column(db.BigInteger, nullable=False)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArchivoAsistencia {self.periodo} {self.unidad_productiva}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'periodo': self.periodo.strftime('%Y-%m'),
+            'unidad_productiva': self.unidad_productiva,
+            'ruta': self.ruta,
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'archivado_en': self.archivado_en.strftime('%Y-%m-%d %H:%M:%S')
+        }
@@ -1,8 +1,22 @@
 ﻿from app import db
 from datetime import datetime, time
+from sqlalchemy import update, func, case
+from app.utils.sql import insert_con_conflicto, tabla_valores
 
 class Asistencia(db.Model):
+    # En PostgreSQL la tabla está particionada por mes sobre fecha (clave primaria (id, fecha));
+    # ver la migración e83c2a5d7f19 y el comando `flask partitions ensure`
     __tablename__ = 'asistencias'
+    __table_args__ = (
+        # Un único registro por empleado y día; también sirve de índice para las marcaciones
+        db.Index('ix_asistencias_empleado_fecha', 'empleado_id', 'fecha', unique=True),
+        # Orden de los listados (fecha DESC, empleado_id) para paginación por cursor
+        db.Index('ix_asistencias_fecha_empleado', db.desc('fecha'), 'empleado_id'),
+        # Índice parcial: solo las filas pendientes, que son una fracción pequeña de la tabla
+        db.Index('ix_asistencias_pendientes', 'fecha', 'empleado_id',
+                 postgresql_where=db.text("estado = 'Pendiente'"),
+                 sqlite_where=db.text("estado = 'Pendiente'")),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
@@ -15,12 +29,34 @@ class Asistencia(db.Model):
     estado = db.Column(db.String(20), default='Pendiente')  # Pendiente, Aprobado, Rechazado
     usuario_aprobacion = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
     fecha_aprobacion = db.Column(db.DateTime, nullable=True)
+    # Reclamo temporal de una asistencia pendiente por un aprobador
+    reclamado_por = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    reclamado_hasta = db.Column(db.DateTime, nullable=True)
+    
+    # Horas de la jornada normal; el excedente se cuenta como horas extras
+    JORNADA_NORMAL = 6
+    
+    # Rechazo de una salida sin registro del día (la entrada puede estar aún en el buffer de otro worker)
+    SIN_ENTRADA = "No existe registro de entrada para hoy"
+    
+    # Mensaje de una marcación sobre una asistencia ya aprobada o rechazada (el resumen ya la contabilizó)
+    PROCESADA = "La asistencia de este día ya fue procesada"
     
     def __repr__(self):
         return f'<Asistencia {self.empleado_id} {self.fecha}>'
     
-    def calcular_horas(self):
-        """Calcula las horas trabajadas y extras"""
+    def calcular_horas(self, evaluador=None):
+        """
+        Calcula las horas trabajadas y extras
+        
+        Args:
+            evaluador (EvaluadorHoras, optional): Regla compilada de la unidad/área del empleado;
+                sin ella se aplica la jornada normal
+        """
+        if evaluador is not None:
+            self.horas_trabajadas, self.horas_extras = evaluador.calcular(self.fecha, self.hora_entrada, self.hora_salida)
+            return
+        
         if not self.hora_entrada or not self.hora_salida:
             self.horas_trabajadas = 0
             self.horas_extras = 0
@@ -38,7 +74,7 @@ class Asistencia(db.Model):
         total_hours = total_seconds / 3600
         
         # Jornada normal: 6 horas
-        jornada_normal = 6
+        jornada_normal = Asistencia.JORNADA_NORMAL
         
         self.horas_trabajadas = min(total_hours, jornada_normal)
         self.horas_extras = max(0, total_hours - jornada_normal)
@@ -55,51 +91,263 @@ class Asistencia(db.Model):
             'observaciones': self.observaciones,
             'estado': self.estado,
             'usuario_aprobacion': self.usuario_aprobacion,
-            'fecha_aprobacion': self.fecha_aprobacion.strftime('%Y-%m-%d %H:%M:%S') if self.fecha_aprobacion else None
+            'fecha_aprobacion': self.fecha_aprobacion.strftime('%Y-%m-%d %H:%M:%S') if self.fecha_aprobacion else None,
+            'reclamado_por': self.reclamado_por,
+            'reclamado_hasta': self.reclamado_hasta.strftime('%Y-%m-%d %H:%M:%S') if self.reclamado_hasta else None
         }
     
-    @staticmethod
-    def registrar_entrada(empleado_id, hora=None, observaciones=None):
-        """Registra la entrada de un empleado"""
-        # Verificar si ya existe un registro para hoy
-        hoy = datetime.utcnow().date()
-        asistencia = Asistencia.query.filter_by(empleado_id=empleado_id, fecha=hoy).first()
-        
-        if asistencia:
-            # Ya existe un registro, verificar si tiene hora de entrada
-            if asistencia.hora_entrada:
-                return None, "Ya existe un registro de entrada para hoy"
-        else:
-            # Crear nuevo registro
-            asistencia = Asistencia(empleado_id=empleado_id, fecha=hoy)
+    def marcar_entrada(self, hora, observaciones=None):
+        """Aplica una marcación de entrada sobre este registro"""
+        if self.hora_entrada:
+            return False, "Ya existe un registro de entrada para hoy"
         
-        # Registrar hora de entrada
-        asistencia.hora_entrada = hora if hora else datetime.utcnow().time()
-        asistencia.observaciones = observaciones
+        self.hora_entrada = hora
+        self.observaciones = observaciones
         
-        return asistencia, "Entrada registrada correctamente"
+        return True, "Entrada registrada correctamente"
+    
+    def marcar_salida(self, hora, observaciones=None, evaluador=None):
+        """Aplica una marcación de salida sobre este registro y recalcula las horas"""
+        if self.hora_salida:
+            return False, "Ya existe un registro de salida para hoy"
+        
+        if self.estado and self.estado != 'Pendiente':
+            return False, Asistencia.PROCESADA
+        
+        self.hora_salida = hora
+        
+        # Agregar observaciones si existen
+        if observaciones:
+            self.observaciones = (self.observaciones or "") + "; " + observaciones
+        
+        # Calcular horas trabajadas y extras
+        self.calcular_horas(evaluador)
+        
+        return True, "Salida registrada correctamente"
     
     @staticmethod
-    def registrar_salida(empleado_id, hora=None, observaciones=None):
-        """Registra la salida de un empleado"""
-        # Buscar registro de hoy
-        hoy = datetime.utcnow().date()
-        asistencia = Asistencia.query.filter_by(empleado_id=empleado_id, fecha=hoy).first()
+    def registrar_entrada(empleado_id, hora=None, observaciones=None, fecha=None):
+        """
+        Registra la entrada de un empleado (por defecto, hoy).
+        Usa un único INSERT ... ON CONFLICT DO UPDATE ... RETURNING sobre el índice
+        (empleado_id, fecha), de modo que dos marcaciones concurrentes no pueden duplicar el día.
+        """
+        hoy = fecha if fecha else datetime.utcnow().date()
+        hora = hora if hora else datetime.utcnow().time()
         
+        insert = insert_con_conflicto()
+        if insert is None:
+            return Asistencia._registrar_entrada_sin_upsert(empleado_id, hoy, hora, observaciones)
+        
+        stmt = insert(Asistencia).values(
+            empleado_id=empleado_id,
+            fecha=hoy,
+            hora_entrada=hora,
+            observaciones=observaciones
+        )
+        # Solo se completa un registro existente si aún no tiene hora de entrada
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['empleado_id', 'fecha'],
+            set_={
+                'hora_entrada': stmt.excluded.hora_entrada,
+                'observaciones': stmt.excluded.observaciones
+            },
+            where=Asistencia.hora_entrada.is_(None)
+        ).returning(Asistencia)
+        
+        asistencia = db.session.scalars(stmt, execution_options={'populate_existing': True}).first()
         if not asistencia:
-            return None, "No existe registro de entrada para hoy"
+            return None, "Ya existe un registro de entrada para hoy"
         
-        if asistencia.hora_salida:
-            return None, "Ya existe un registro de salida para hoy"
+        return asistencia, "Entrada registrada correctamente"
+    
+    @staticmethod
+    def registrar_salida(empleado_id, hora=None, observaciones=None, evaluador=None, fecha=None):
+        """
+        Registra la salida de un empleado (por defecto, hoy).
+        La salida nunca crea el registro, por lo que se aplica con un UPDATE ... RETURNING
+        condicionado a que la salida siga vacía y la asistencia siga pendiente (las horas de una
+        aprobada ya están en el resumen mensual); las horas se recalculan sobre la fila devuelta
+        con el evaluador de la regla del empleado (o la jornada normal si no se indica).
+        """
+        hoy = fecha if fecha else datetime.utcnow().date()
+        hora = hora if hora else datetime.utcnow().time()
         
-        # Registrar hora de salida
-        asistencia.hora_salida = hora if hora else datetime.utcnow().time()
+        if insert_con_conflicto() is None:
+            return Asistencia._registrar_salida_sin_upsert(empleado_id, hoy, hora, observaciones, evaluador)
         
-        # Agregar observaciones si existen
+        valores = {'hora_salida': hora}
         if observaciones:
-            asistencia.observaciones = (asistencia.observaciones or "") + "; " + observaciones
+            valores['observaciones'] = func.coalesce(Asistencia.observaciones, '') + '; ' + observaciones
+        
+        stmt = update(Asistencia).where(
+            Asistencia.empleado_id == empleado_id,
+            Asistencia.fecha == hoy,
+            Asistencia.hora_salida.is_(None),
+            Asistencia.estado == 'Pendiente'
+        ).values(**valores).returning(Asistencia)
+        
+        asistencia = db.session.scalars(stmt, execution_options={'populate_existing': True}).first()
+        if not asistencia:
+            # Solo en el camino de error se distingue entre registro inexistente, salida ya marcada y procesada
+            existente = Asistencia.query.filter_by(empleado_id=empleado_id, fecha=hoy).first()
+            if not existente:
+                return None, Asistencia.SIN_ENTRADA
+            if existente.hora_salida:
+                return None, "Ya existe un registro de salida para hoy"
+            return None, Asistencia.PROCESADA
         
         # Calcular horas trabajadas y extras
-        asistencia.calcular_horas()
+        asistencia.calcular_horas(evaluador)
+        
+        return asistencia, "Salida registrada correctamente"
+    
+    @staticmethod
+    def registrar_entradas(marcaciones):
+        """
+        Registra varias entradas con un único INSERT ... ON CONFLICT DO UPDATE ... RETURNING de
+        varias filas, con la misma condición que registrar_entrada. Requiere un motor con upsert
+        (insert_con_conflicto()) y que cada (empleado_id, fecha) aparezca una sola vez.
+        
+        Args:
+            marcaciones (list): Diccionarios (empleado_id, fecha, hora, observaciones)
+            
+        Returns:
+            dict: {(empleado_id, fecha): Asistencia} de las entradas registradas; las que faltan ya tenían entrada
+        """
+        stmt = insert_con_conflicto()(Asistencia)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['empleado_id', 'fecha'],
+            set_={
+                'hora_entrada': stmt.excluded.hora_entrada,
+                'observaciones': stmt.excluded.observaciones
+            },
+            where=Asistencia.hora_entrada.is_(None)
+        ).returning(Asistencia)
+        
+        filas = [
+            {
+                'empleado_id': m['empleado_id'],
+                'fecha': m['fecha'],
+                'hora_entrada': m['hora'],
+                'observaciones': m.get('observaciones')
+            }
+            for m in marcaciones
+        ]
+        asistencias = db.session.scalars(stmt, filas, execution_options={'populate_existing': True}).all()
+        return {(a.empleado_id, a.fecha): a for a in asistencias}
+    
+    @staticmethod
+    def registrar_salidas(marcaciones):
+        """
+        Registra varias salidas con un único UPDATE ... FROM (VALUES ...) RETURNING, con las mismas
+        condiciones que registrar_salida, y guarda las horas calculadas con un segundo UPDATE por lotes.
+        Requiere un motor con upsert (insert_con_conflicto()) y que cada (empleado_id, fecha) aparezca una sola vez.
+        
+        Args:
+            marcaciones (list): Diccionarios (empleado_id, fecha, hora, observaciones, evaluador)
+            
+        Returns:
+            tuple: ({(empleado_id, fecha): Asistencia} registradas, {(empleado_id, fecha): mensaje de error})
+        """
+        marcadas = tabla_valores('marcadas', [
+            ('empleado_id', db.Integer()),
+            ('fecha', db.Date()),
+            ('hora', db.Time()),
+            ('observaciones', db.Text())
+        ], [(m['empleado_id'], m['fecha'], m['hora'], m.get('observaciones')) for m in marcaciones])
+        
+        stmt = update(Asistencia).where(
+            Asistencia.empleado_id == marcadas.c.empleado_id,
+            Asistencia.fecha == marcadas.c.fecha,
+            Asistencia.hora_salida.is_(None),
+            Asistencia.estado == 'Pendiente'
+        ).values(
+            hora_salida=marcadas.c.hora,
+            observaciones=case(
+                (marcadas.c.observaciones.is_(None), Asistencia.observaciones),
+                else_=func.coalesce(Asistencia.observaciones, '') + '; ' + marcadas.c.observaciones
+            )
+        ).returning(Asistencia)
+        
+        asistencias = db.session.scalars(stmt, execution_options={
+            'populate_existing': True, 'synchronize_session': False
+        }).all()
+        registradas = {(a.empleado_id, a.fecha): a for a in asistencias}
+        
+        if registradas:
+            # Las horas dependen de la entrada de cada fila: se calculan aquí y se guardan en bloque
+            evaluadores = {(m['empleado_id'], m['fecha']): m.get('evaluador') for m in marcaciones}
+            horas = []
+            for clave, asistencia in registradas.items():
+                calculo = Asistencia(fecha=asistencia.fecha, hora_entrada=asistencia.hora_entrada,
+                                     hora_salida=asistencia.hora_salida)
+                calculo.calcular_horas(evaluadores[clave])
+                horas.append((asistencia.id, asistencia.fecha, calculo.horas_trabajadas, calculo.horas_extras))
+            
+            calculadas = tabla_valores('calculadas', [
+                ('id', db.Integer()),
+                ('fecha', db.Date()),
+                ('horas_trabajadas', db.Float()),
+                ('horas_extras', db.Float())
+            ], horas)
+            db.session.scalars(
+                update(Asistencia).where(
+                    Asistencia.id == calculadas.c.id,
+                    Asistencia.fecha == calculadas.c.fecha
+                ).values(
+                    horas_trabajadas=calculadas.c.horas_trabajadas,
+                    horas_extras=calculadas.c.horas_extras
+                ).returning(Asistencia),
+                execution_options={'populate_existing': True, 'synchronize_session': False}
+            ).all()
+        
+        # Solo en el camino de error se distingue entre registro inexistente, salida ya marcada y procesada
+        errores = {}
+        faltantes = [(m['empleado_id'], m['fecha']) for m in marcaciones if (m['empleado_id'], m['fecha']) not in registradas]
+        if faltantes:
+            existentes = {
+                (a.empleado_id, a.fecha): a for a in Asistencia.query.filter(
+                    Asistencia.empleado_id.in_({empleado_id for empleado_id, _ in faltantes}),
+                    Asistencia.fecha.in_({fecha for _, fecha in faltantes})
+                ).all()
+            }
+            for clave in faltantes:
+                existente = existentes.get(clave)
+                if not existente:
+                    errores[clave] = Asistencia.SIN_ENTRADA
+                elif existente.hora_salida:
+                    errores[clave] = "Ya existe un registro de salida para hoy"
+                else:
+                    errores[clave] = Asistencia.PROCESADA
+        
+        return registradas, errores
+    
+    @staticmethod
+    def _registrar_entrada_sin_upsert(empleado_id, fecha, hora, observaciones):
+        """Registro de entrada por lectura y escritura para motores sin ON CONFLICT"""
+        asistencia = Asistencia.query.filter_by(empleado_id=empleado_id, fecha=fecha).first()
+        
+        if not asistencia:
+            # Crear nuevo registro
+            asistencia = Asistencia(empleado_id=empleado_id, fecha=fecha)
+        
+        ok, mensaje = asistencia.marcar_entrada(hora, observaciones)
+        if not ok:
+            return None, mensaje
+        
+        return asistencia, mensaje
+    
+    @staticmethod
+    def _registrar_salida_sin_upsert(empleado_id, fecha, hora, observaciones, evaluador=None):
+        """Registro de salida por lectura y escritura para motores sin ON CONFLICT"""
+        asistencia = Asistencia.query.filter_by(empleado_id=empleado_id, fecha=fecha).first()
+        
+        if not asistencia:
+            return None, Asistencia.SIN_ENTRADA
+        
+        ok, mensaje = asistencia.marcar_salida(hora, observaciones, evaluador)
+        if not ok:
+            return None, mensaje
         
-        return asistencia, "Salida registrada correctamente"
\ No newline at end of file
+        return asistencia, mensaje
\ No newline at end of file
@@ -0,0 +1,69 @@
+from app import db
+from datetime import datetime
+
+class PeriodoCerrado(db.Model):
+    """Mes cerrado para nómina: sus asistencias ya no se aprueban ni rechazan y sus totales quedan en cierres"""
+    __tablename__ = 'periodos_cerrados'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    periodo = db.Column(db.Date, nullable=False, unique=True)  # Primer día del mes
+    fecha_inicio = db.Column(db.Date, nullable=False)
+    fecha_fin = db.Column(db.Date, nullable=False)
+    dias_laborables = db.Column(db.Integer, nullable=False)
+    empleados = db.Column(db.Integer, nullable=False, default=0)
+    pendientes = db.Column(db.Integer, nullable=False, default=0)  # Asistencias que quedaron sin procesar
+    usuario_cierre = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    cerrado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PeriodoCerrado {self.periodo}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'periodo': self.periodo.strftime('%Y-%m'),
+            'fecha_inicio': self.fecha_inicio.strftime('%Y-%m-%d'),
+            'fecha_fin': self.fecha_fin.strftime('%Y-%m-%d'),
+            'dias_laborables': self.dias_laborables,
+            'empleados': self.empleados,
+            'pendientes': self.pendientes,
+            'usuario_cierre': self.usuario_cierre,
+            'cerrado_en': self.cerrado_en.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class Cierre(db.Model):
+    """Totales congelados de un empleado en un mes cerrado, con sus datos al momento del cierre"""
+    __tablename__ = 'cierres'
+    __table_args__ = (
+        db.UniqueConstraint('periodo', 'empleado_id', name='uq_cierres_periodo_empleado'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    periodo = db.Column(db.Date, db.ForeignKey('periodos_cerrados.periodo', ondelete='CASCADE'), nullable=False)
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    cedula = db.Column(db.String(20), nullable=False)
+    nombres = db.Column(db.String(100), nullable=False)
+    apellidos = db.Column(db.String(100), nullable=False)
+    area = db.Column(db.String(100), nullable=True)
+    unidad_productiva = db.Column(db.String(100), nullable=True)
+    horas_trabajadas = db.Column(db.Float, nullable=False, default=0)
+    horas_extras = db.Column(db.Float, nullable=False, default=0)
+    dias_asistidos = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<Cierre {self.periodo} {self.empleado_id}>'
+    
+    def to_dict(self):
+        return {
+            'periodo': self.periodo.strftime('%Y-%m'),
+            'empleado_id': self.empleado_id,
+            'cedula': self.cedula,
+            'nombres': self.nombres,
+            'apellidos': self.apellidos,
+            'area': self.area,
+            'unidad_productiva': self.unidad_productiva,
+            'horas_trabajadas': round(self.horas_trabajadas, 2),
+            'horas_extras': round(self.horas_extras, 2),
+            'dias_asistidos': self.dias_asistidos
+        }
@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+class EventoKiosco(db.Model):
+    """Registro de idempotencia de las marcaciones sincronizadas desde kioscos"""
+    __tablename__ = 'eventos_kiosco'
+    
+    # Los IDs los genera cada kiosco: solo son únicos junto con el kiosco que los envía
+    kiosco_id = db.Column(db.String(64), primary_key=True)
+    id = db.Column(db.String(64), primary_key=True)  # ID generado por el kiosco
+    empleado_id = db.Column(db.Integer, nullable=False)
+    tipo_registro = db.Column(db.String(10), nullable=False)
+    marcado_en = db.Column(db.DateTime, nullable=False)  # Hora de la marcación en el kiosco (UTC)
+    resultado = db.Column(db.String(20), nullable=False)  # aplicado, rechazado
+    mensaje = db.Column(db.String(255), nullable=True)
+    recibido_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<EventoKiosco {self.kiosco_id}/{self.id} {self.resultado}>'
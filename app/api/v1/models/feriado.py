@@ -0,0 +1,18 @@
+from app import db
+
+class Feriado(db.Model):
+    __tablename__ = 'feriados'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, unique=True, nullable=False)
+    descripcion = db.Column(db.String(150), nullable=False)
+    
+    def __repr__(self):
+        return f'<Feriado {self.fecha} {self.descripcion}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fecha': self.fecha.strftime('%Y-%m-%d'),
+            'descripcion': self.descripcion
+        }
@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+class InvalidacionReporte(db.Model):
+    """
+    Rango de fechas cuyos reportes en caché dejaron de ser válidos, o cambio de una tabla que
+    los procesos mantienen en memoria (origen). Cada proceso lee las invalidaciones nuevas
+    (id creciente) para depurar sus propias cachés.
+    """
+    __tablename__ = 'invalidaciones_reporte'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    fecha_inicio = db.Column(db.Date, nullable=True)  # None: sin límite inferior
+    fecha_fin = db.Column(db.Date, nullable=True)  # None: sin límite superior
+    origen = db.Column(db.String(50), nullable=True)  # Tabla modificada; None: cambio de asistencias del rango
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<InvalidacionReporte {self.id} {self.fecha_inicio} {self.fecha_fin}>'
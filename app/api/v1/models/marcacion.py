@@ -0,0 +1,46 @@
+from app import db
+from datetime import datetime
+
+class Marcacion(db.Model):
+    """Registro de cada marcación recibida; sus datos no cambian, solo se marca al proyectarla"""
+    __tablename__ = 'marcaciones'
+    __table_args__ = (
+        # Índice parcial: solo las marcaciones pendientes de proyectar
+        db.Index('ix_marcaciones_pendientes', 'id',
+                 postgresql_where=db.text('NOT proyectada'),
+                 sqlite_where=db.text('NOT proyectada')),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    tipo_registro = db.Column(db.String(10), nullable=False)  # entrada, salida
+    marcado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    observaciones = db.Column(db.Text, nullable=True)
+    origen = db.Column(db.String(20), nullable=False, default='api')
+    # Los IDs se asignan antes del commit: una marcación con ID menor puede confirmarse después
+    # de otra mayor, por lo que cada una se marca al proyectarla en lugar de usar solo la marca de agua
+    proyectada = db.Column(db.Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f'<Marcacion {self.id} {self.empleado_id} {self.tipo_registro}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'empleado_id': self.empleado_id,
+            'tipo_registro': self.tipo_registro,
+            'marcado_en': self.marcado_en.strftime('%Y-%m-%d %H:%M:%S'),
+            'observaciones': self.observaciones,
+            'origen': self.origen
+        }
+
+class Proyeccion(db.Model):
+    """Estado de los proyectores que derivan datos desde las marcaciones (su fila serializa los lotes)"""
+    __tablename__ = 'proyecciones'
+    
+    nombre = db.Column(db.String(50), primary_key=True)
+    ultimo_id = db.Column(db.BigInteger, nullable=False, default=0)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Proyeccion {self.nombre} {self.ultimo_id}>'
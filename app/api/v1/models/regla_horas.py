@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class ReglaHoras(db.Model):
+    """
+    Regla de cálculo de horas para una unidad productiva y/o un área.
+    Sin unidad ni área es la regla general; a un empleado se le aplica la más específica.
+    """
+    __tablename__ = 'reglas_horas'
+    __table_args__ = (
+        db.UniqueConstraint('unidad_productiva', 'area', name='uq_reglas_horas_unidad_area'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    unidad_productiva = db.Column(db.String(100), nullable=True)
+    area = db.Column(db.String(100), nullable=True)
+    jornada_normal = db.Column(db.Float, nullable=False, default=6)
+    jornada_sabado = db.Column(db.Float, nullable=True)  # Si es nula, la del resto de la semana
+    nocturno_inicio = db.Column(db.Time, nullable=True)
+    nocturno_fin = db.Column(db.Time, nullable=True)
+    recargo_nocturno = db.Column(db.Float, nullable=False, default=0)  # Fracción sumada a extras por hora nocturna
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ReglaHoras {self.unidad_productiva} {self.area}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'unidad_productiva': self.unidad_productiva,
+            'area': self.area,
+            'jornada_normal': self.jornada_normal,
+            'jornada_sabado': self.jornada_sabado,
+            'nocturno_inicio': self.nocturno_inicio.strftime('%H:%M') if self.nocturno_inicio else None,
+            'nocturno_fin': self.nocturno_fin.strftime('%H:%M') if self.nocturno_fin else None,
+            'recargo_nocturno': self.recargo_nocturno,
+            'actualizado_en': self.actualizado_en.strftime('%Y-%m-%d %H:%M:%S') if self.actualizado_en else None
+        }
@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class ResumenAsistencia(db.Model):
+    """Totales mensuales de asistencias aprobadas por empleado, mantenidos de forma incremental"""
+    __tablename__ = 'resumen_asistencias_mensual'
+    __table_args__ = (
+        db.UniqueConstraint('empleado_id', 'periodo', name='uq_resumen_empleado_periodo'),
+        db.Index('ix_resumen_periodo', 'periodo'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    empleado_id = db.Column(db.Integer, db.ForeignKey('empleados.id'), nullable=False)
+    periodo = db.Column(db.Date, nullable=False)  # Primer día del mes
+    horas_trabajadas = db.Column(db.Float, nullable=False, default=0)
+    horas_extras = db.Column(db.Float, nullable=False, default=0)
+    dias_asistidos = db.Column(db.Integer, nullable=False, default=0)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ResumenAsistencia {self.empleado_id} {self.periodo}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'empleado_id': self.empleado_id,
+            'periodo': self.periodo.strftime('%Y-%m'),
+            'horas_trabajadas': self.horas_trabajadas,
+            'horas_extras': self.horas_extras,
+            'dias_asistidos': self.dias_asistidos,
+            'actualizado_en': self.actualizado_en.strftime('%Y-%m-%d %H:%M:%S') if self.actualizado_en else None
+        }
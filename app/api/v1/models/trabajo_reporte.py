@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+
+class TrabajoReporte(db.Model):
+    """Reporte de asistencias generado de forma asíncrona y su resultado"""
+    __tablename__ = 'trabajos_reporte'
+    
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    estado = db.Column(db.String(20), nullable=False, default='pendiente')  # pendiente, en_proceso, completado, error
+    parametros = db.Column(db.JSON, nullable=False)
+    resultado = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    iniciado_en = db.Column(db.DateTime, nullable=True)
+    finalizado_en = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<TrabajoReporte {self.id} {self.estado}>'
+    
+    def to_dict(self, incluir_resultado=True):
+        data = {
+            'id': self.id,
+            'estado': self.estado,
+            'parametros': self.parametros,
+            'usuario_id': self.usuario_id,
+            'creado_en': self.creado_en.strftime('%Y-%m-%d %H:%M:%S'),
+            'iniciado_en': self.iniciado_en.strftime('%Y-%m-%d %H:%M:%S') if self.iniciado_en else None,
+            'finalizado_en': self.finalizado_en.strftime('%Y-%m-%d %H:%M:%S') if self.finalizado_en else None
+        }
+        if self.estado == 'error':
+            data['error'] = self.error
+        if incluir_resultado and self.estado == 'completado':
+            data['resultado'] = self.resultado
+        return data
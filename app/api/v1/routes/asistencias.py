@@ -13,6 +13,24 @@ def registrar_asistencia():
     """
     return asistencia_controller.registrar_asistencia()
 
+@bp.route('/asistencias/registrar/lote', methods=['POST'])
+@jwt_required()
+def registrar_asistencias_lote():
+    """
+    Registra un lote de entradas/salidas en una sola transacción
+    Requiere autenticación
+    """
+    return asistencia_controller.registrar_asistencias_lote()
+
+@bp.route('/asistencias/sincronizar', methods=['POST'])
+@jwt_required()
+def sincronizar_kiosco():
+    """
+    Sincroniza marcaciones almacenadas por un kiosco sin conexión (idempotente por ID de evento)
+    Requiere autenticación
+    """
+    return asistencia_controller.sincronizar_kiosco()
+
 @bp.route('/asistencias', methods=['GET'])
 @jwt_required()
 def get_asistencias():
@@ -22,6 +40,20 @@ def get_asistencias():
     """
     return asistencia_controller.get_asistencias()
 
+@bp.route('/asistencias/export', methods=['GET'])
+@jwt_required()
+def exportar_asistencias():
+    """
+    Exporta asistencias en CSV o NDJSON (streaming) para un rango de fechas
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.exportar_asistencias()
+
 @bp.route('/asistencias/<int:asistencia_id>', methods=['GET'])
 @jwt_required()
 def get_asistencia(asistencia_id):
@@ -49,6 +81,24 @@ def get_asistencia_hoy(empleado_id):
     """
     return asistencia_controller.get_asistencia_hoy(empleado_id)
 
+@bp.route('/asistencias/presencia', methods=['GET'])
+@jwt_required()
+def get_presencia():
+    """
+    Obtiene los empleados presentes en este momento, agrupados por unidad productiva
+    Requiere autenticación
+    """
+    return asistencia_controller.get_presencia()
+
+@bp.route('/asistencias/presencia/stream', methods=['GET'])
+@jwt_required()
+def stream_presencia():
+    """
+    Stream (Server-Sent Events) con la instantánea de presencia y sus cambios en vivo
+    Requiere autenticación
+    """
+    return asistencia_controller.stream_presencia()
+
 @bp.route('/asistencias/<int:asistencia_id>/aprobar', methods=['PUT'])
 @jwt_required()
 def aprobar_asistencia(asistencia_id):
@@ -68,6 +118,62 @@ def aprobar_asistencia(asistencia_id):
     
     return asistencia_controller.aprobar_asistencia(asistencia_id)
 
+@bp.route('/asistencias/aprobar/lote', methods=['PUT'])
+@jwt_required()
+def aprobar_asistencias_lote():
+    """
+    Aprueba o rechaza un lote de asistencias pendientes (por IDs o por filtro)
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+    
+    return asistencia_controller.aprobar_asistencias_lote(get_jwt_identity())
+
+@bp.route('/asistencias/pendientes', methods=['GET'])
+@jwt_required()
+def get_cola_pendientes():
+    """
+    Obtiene la cola de asistencias pendientes de aprobación con conteo por área
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+    
+    return asistencia_controller.get_cola_pendientes()
+
+@bp.route('/asistencias/pendientes/reclamar', methods=['POST'])
+@jwt_required()
+def reclamar_pendientes():
+    """
+    Reclama un lote de asistencias pendientes para revisión sin bloquear a otros aprobadores
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+    
+    return asistencia_controller.reclamar_pendientes(get_jwt_identity())
+
+@bp.route('/asistencias/anomalias', methods=['GET'])
+@jwt_required()
+def get_anomalias():
+    """
+    Obtiene las anomalías de asistencia detectadas por el escaneo nocturno
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+    
+    return asistencia_controller.get_anomalias()
+
 @bp.route('/asistencias/horas/empleado/<int:empleado_id>', methods=['GET'])
 @jwt_required()
 def calcular_horas(empleado_id):
@@ -77,6 +183,20 @@ def calcular_horas(empleado_id):
     """
     return asistencia_controller.calcular_horas(empleado_id)
 
+@bp.route('/asistencias/horas', methods=['POST'])
+@jwt_required()
+def calcular_horas_empleados():
+    """
+    Calcula horas trabajadas y extras de varios empleados (por IDs o por área/unidad) en un período
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.calcular_horas_empleados()
+
 @bp.route('/asistencias/reporte', methods=['GET'])
 @jwt_required()
 def generar_reporte():
@@ -89,4 +209,60 @@ def generar_reporte():
     if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
         return jsonify({'error': 'Acceso no autorizado'}), 403
         
-    return asistencia_controller.generar_reporte()
\ No newline at end of file
+    return asistencia_controller.generar_reporte()
+
+@bp.route('/asistencias/reporte/consolidado', methods=['GET'])
+@jwt_required()
+def generar_reporte_consolidado():
+    """
+    Genera reporte de asistencias con subtotales por unidad productiva y área en una sola respuesta
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.generar_reporte_consolidado()
+
+@bp.route('/asistencias/reporte/jobs', methods=['POST'])
+@jwt_required()
+def crear_trabajo_reporte():
+    """
+    Encola un reporte de asistencias para generarlo en segundo plano
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.crear_trabajo_reporte(get_jwt_identity())
+
+@bp.route('/asistencias/reporte/jobs/<trabajo_id>', methods=['GET'])
+@jwt_required()
+def get_trabajo_reporte(trabajo_id):
+    """
+    Obtiene el estado de un reporte en segundo plano y su resultado cuando termina
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.get_trabajo_reporte(trabajo_id)
+
+@bp.route('/asistencias/reporte/cache', methods=['GET'])
+@jwt_required()
+def get_estadisticas_cache_reporte():
+    """
+    Obtiene los contadores (aciertos, fallos, desalojos) de la caché de reportes
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return asistencia_controller.get_estadisticas_cache_reporte()
\ No newline at end of file
@@ -0,0 +1,75 @@
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from app.api.v1 import bp
+from app.api.v1.controllers import cierre_controller
+
+# Rutas para el cierre mensual de nómina
+@bp.route('/cierres', methods=['GET'])
+@jwt_required()
+def get_periodos_cerrados():
+    """
+    Obtiene lista de meses cerrados
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return cierre_controller.get_periodos_cerrados()
+
+@bp.route('/cierres', methods=['POST'])
+@jwt_required()
+def cerrar_periodo():
+    """
+    Cierra un mes: congela los totales por empleado y bloquea la aprobación de sus asistencias
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return cierre_controller.cerrar_periodo(get_jwt_identity())
+
+@bp.route('/cierres/<periodo>', methods=['GET'])
+@jwt_required()
+def get_periodo_cerrado(periodo):
+    """
+    Obtiene los datos de un mes cerrado (periodo YYYY-MM)
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return cierre_controller.get_periodo_cerrado(periodo)
+
+@bp.route('/cierres/<periodo>/export', methods=['GET'])
+@jwt_required()
+def exportar_cierre(periodo):
+    """
+    Exporta en CSV los totales congelados de un mes cerrado (periodo YYYY-MM)
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return cierre_controller.exportar_cierre(periodo)
+
+@bp.route('/cierres/<periodo>', methods=['DELETE'])
+@jwt_required()
+def reabrir_periodo(periodo):
+    """
+    Reabre un mes cerrado descartando sus totales congelados
+    Requiere autenticación y rol administrador
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] != 'administrador':
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return cierre_controller.reabrir_periodo(periodo)
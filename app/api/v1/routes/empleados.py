@@ -44,6 +44,15 @@ def get_empleado_by_cedula():
     """
     return empleado_controller.get_empleado_by_cedula()
 
+@bp.route('/empleados/autocomplete', methods=['GET'])
+@jwt_required()
+def autocompletar_empleados():
+    """
+    Sugiere empleados activos por prefijo de cédula o de nombre (parámetros q y limite)
+    Requiere autenticación
+    """
+    return empleado_controller.autocompletar_empleados()
+
 @bp.route('/empleados/<int:empleado_id>', methods=['PUT'])
 @jwt_required()
 def update_empleado(empleado_id):
@@ -0,0 +1,42 @@
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from app.api.v1 import bp
+from app.api.v1.controllers import feriado_controller
+
+# Rutas para gestión del calendario de feriados
+@bp.route('/feriados', methods=['GET'])
+@jwt_required()
+def get_feriados():
+    """
+    Obtiene lista de feriados
+    Requiere autenticación
+    """
+    return feriado_controller.get_feriados()
+
+@bp.route('/feriados', methods=['POST'])
+@jwt_required()
+def create_feriado():
+    """
+    Registra un feriado
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return feriado_controller.create_feriado()
+
+@bp.route('/feriados/<int:feriado_id>', methods=['DELETE'])
+@jwt_required()
+def delete_feriado(feriado_id):
+    """
+    Elimina un feriado
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return feriado_controller.delete_feriado(feriado_id)
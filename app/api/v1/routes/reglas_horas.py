@@ -0,0 +1,56 @@
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from app.api.v1 import bp
+from app.api.v1.controllers import regla_horas_controller
+
+# Rutas para gestión de las reglas de cálculo de horas
+@bp.route('/reglas-horas', methods=['GET'])
+@jwt_required()
+def get_reglas_horas():
+    """
+    Obtiene lista de reglas de horas por unidad productiva y área
+    Requiere autenticación
+    """
+    return regla_horas_controller.get_reglas()
+
+@bp.route('/reglas-horas', methods=['POST'])
+@jwt_required()
+def create_regla_horas():
+    """
+    Registra una regla de horas
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return regla_horas_controller.create_regla()
+
+@bp.route('/reglas-horas/<int:regla_id>', methods=['PUT'])
+@jwt_required()
+def update_regla_horas(regla_id):
+    """
+    Actualiza una regla de horas
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return regla_horas_controller.update_regla(regla_id)
+
+@bp.route('/reglas-horas/<int:regla_id>', methods=['DELETE'])
+@jwt_required()
+def delete_regla_horas(regla_id):
+    """
+    Elimina una regla de horas
+    Requiere autenticación y rol administrador o talento_humano
+    """
+    # Verificar permisos
+    claims = get_jwt()
+    if 'rol' not in claims or claims['rol'] not in ['administrador', 'talento_humano']:
+        return jsonify({'error': 'Acceso no autorizado'}), 403
+        
+    return regla_horas_controller.delete_regla(regla_id)
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate, ValidationError, post_load
+from marshmallow import Schema, fields, validate, ValidationError, post_load, validates_schema
 
 # Esquema base para respuestas genéricas
 class ResponseSchema(Schema):
@@ -97,10 +97,96 @@ class AsistenciaRegistroSchema(Schema):
     tipo_registro = fields.Str(required=True, validate=validate.OneOf(['entrada', 'salida']))
     observaciones = fields.Str()
 
+class AsistenciaLoteSchema(Schema):
+    registros = fields.List(fields.Nested(AsistenciaRegistroSchema), required=True,
+                            validate=validate.Length(min=1, max=1000))
+
+class EventoKioscoSchema(Schema):
+    id = fields.Str(required=True, validate=validate.Length(min=1, max=64))
+    empleado_id = fields.Int(required=True)
+    tipo_registro = fields.Str(required=True, validate=validate.OneOf(['entrada', 'salida']))
+    timestamp = fields.DateTime(required=True)
+    observaciones = fields.Str()
+
+class SincronizacionKioscoSchema(Schema):
+    kiosco_id = fields.Str(required=True, validate=validate.Length(min=1, max=64))
+    eventos = fields.List(fields.Nested(EventoKioscoSchema), required=True,
+                          validate=validate.Length(min=1, max=2000))
+
 class AsistenciaAprobacionSchema(Schema):
     estado = fields.Str(required=True, validate=validate.OneOf(['Aprobado', 'Rechazado']))
     observaciones = fields.Str()
 
+class AsistenciaAprobacionLoteSchema(Schema):
+    estado = fields.Str(required=True, validate=validate.OneOf(['Aprobado', 'Rechazado']))
+    observaciones = fields.Str()
+    # Selección por IDs o por filtro (fecha, area, unidad_productiva)
+    ids = fields.List(fields.Int(), validate=validate.Length(min=1, max=5000))
+    fecha = fields.Date()
+    area = fields.Str()
+    unidad_productiva = fields.Str()
+    
+    @validates_schema
+    def validate_seleccion(self, data, **kwargs):
+        """Exigir IDs o al menos un criterio de filtro; el filtro por área o unidad debe acotarse a una fecha"""
+        if not data.get('ids') and not any(data.get(k) for k in ['fecha', 'area', 'unidad_productiva']):
+            raise ValidationError('Se requieren ids o un filtro (fecha, area, unidad_productiva)', 'ids')
+        if not data.get('ids') and not data.get('fecha') and (data.get('area') or data.get('unidad_productiva')):
+            raise ValidationError('El filtro por area o unidad_productiva requiere una fecha', 'fecha')
+
+# Esquema para resumen de horas de varios empleados
+class HorasEmpleadosSchema(Schema):
+    fecha_inicio = fields.Date(required=True)
+    fecha_fin = fields.Date(required=True)
+    # Selección por IDs o por filtro (area, unidad_productiva)
+    empleado_ids = fields.List(fields.Int(), validate=validate.Length(min=1, max=5000))
+    area = fields.Str()
+    unidad_productiva = fields.Str()
+    
+    @validates_schema
+    def validate_seleccion(self, data, **kwargs):
+        """Exigir IDs o un filtro, y un período válido"""
+        if not data.get('empleado_ids') and not any(data.get(k) for k in ['area', 'unidad_productiva']):
+            raise ValidationError('Se requieren empleado_ids o un filtro (area, unidad_productiva)', 'empleado_ids')
+        if data.get('fecha_inicio') and data.get('fecha_fin') and data['fecha_inicio'] > data['fecha_fin']:
+            raise ValidationError('fecha_inicio debe ser menor o igual a fecha_fin', 'fecha_inicio')
+
+# Esquema para reportes asíncronos
+class ReporteTrabajoSchema(Schema):
+    fecha_inicio = fields.Date(required=True)
+    fecha_fin = fields.Date(required=True)
+    area = fields.Str()
+    unidad_productiva = fields.Str()
+    
+    @validates_schema
+    def validate_periodo(self, data, **kwargs):
+        """Validar que fecha_inicio sea menor o igual a fecha_fin"""
+        if data.get('fecha_inicio') and data.get('fecha_fin') and data['fecha_inicio'] > data['fecha_fin']:
+            raise ValidationError('fecha_inicio debe ser menor o igual a fecha_fin', 'fecha_inicio')
+
+# Esquema para reglas de cálculo de horas
+class ReglaHorasSchema(Schema):
+    id = fields.Int(dump_only=True)
+    unidad_productiva = fields.Str(allow_none=True, validate=validate.Length(min=1, max=100))
+    area = fields.Str(allow_none=True, validate=validate.Length(min=1, max=100))
+    jornada_normal = fields.Float(required=True, validate=validate.Range(min=0, max=24, min_inclusive=False))
+    jornada_sabado = fields.Float(allow_none=True, validate=validate.Range(min=0, max=24))
+    nocturno_inicio = fields.Time(allow_none=True)
+    nocturno_fin = fields.Time(allow_none=True)
+    recargo_nocturno = fields.Float(validate=validate.Range(min=0, max=5))
+    
+    @validates_schema
+    def validate_nocturno(self, data, **kwargs):
+        """Exigir ambos extremos de la franja nocturna si hay recargo"""
+        if data.get('recargo_nocturno') and (not data.get('nocturno_inicio') or not data.get('nocturno_fin')):
+            raise ValidationError('El recargo nocturno requiere nocturno_inicio y nocturno_fin', 'recargo_nocturno')
+
+# Esquemas para Feriado
+class FeriadoSchema(Schema):
+    id = fields.Int(dump_only=True)
+    fecha = fields.Date(required=True)
+    descripcion = fields.Str(required=True, validate=validate.Length(min=3, max=150))
+
 # Esquemas para filtros y paginación
 class PaginationSchema(Schema):
     page = fields.Int()
@@ -144,7 +230,17 @@ empleado_update_schema = EmpleadoUpdateSchema()
 asistencia_schema = AsistenciaSchema()
 asistencias_schema = AsistenciaSchema(many=True)
 asistencia_registro_schema = AsistenciaRegistroSchema()
+asistencia_lote_schema = AsistenciaLoteSchema()
+sincronizacion_kiosco_schema = SincronizacionKioscoSchema()
 asistencia_aprobacion_schema = AsistenciaAprobacionSchema()
+asistencia_aprobacion_lote_schema = AsistenciaAprobacionLoteSchema()
+
+horas_empleados_schema = HorasEmpleadosSchema()
+reporte_trabajo_schema = ReporteTrabajoSchema()
+
+regla_horas_schema = ReglaHorasSchema()
+
+feriado_schema = FeriadoSchema()
 
 # Función para validar datos según esquema
 def validate_data(schema, data, partial=False):
@@ -5,10 +5,42 @@ entre los controladores y los modelos.
 """
 
 from app.api.v1.services.auth_service import AuthService
+from app.api.v1.services.calendario_service import CalendarioService
+from app.api.v1.services.cache_reportes import CacheReportes
+from app.api.v1.services.archivo_service import ArchivoService
+from app.api.v1.services.cache_mes_actual import CacheMesActual
+from app.api.v1.services.regla_horas_service import ReglaHorasService
+from app.api.v1.services.resumen_service import ResumenService
+from app.api.v1.services.recalculo_service import RecalculoService
+from app.api.v1.services.cierre_service import CierreService
+from app.api.v1.services.presencia_service import PresenciaService
 from app.api.v1.services.asistencia_service import AsistenciaService
+from app.api.v1.services.autocompletado_empleados import AutocompletadoEmpleados
 from app.api.v1.services.empleado_service import EmpleadoService
+from app.api.v1.services.proyeccion_service import ProyeccionService
+from app.api.v1.services.buffer_registros import BufferRegistros
+from app.api.v1.services.trabajo_reporte_service import TrabajoReporteService
+from app.api.v1.services.particion_service import ParticionService
+from app.api.v1.services.anomalia_service import AnomaliaService
 
 # Instancias de servicios para uso en la aplicación
 auth_service = AuthService()
-asistencia_service = AsistenciaService()
-empleado_service = EmpleadoService()
\ No newline at end of file
+cache_reportes = CacheReportes()
+calendario_service = CalendarioService(cache_reportes)
+archivo_service = ArchivoService()
+cache_mes_actual = CacheMesActual()
+regla_horas_service = ReglaHorasService(cache_reportes)
+resumen_service = ResumenService(cache_reportes, archivo_service)
+cierre_service = CierreService(resumen_service, calendario_service, cache_reportes)
+recalculo_service = RecalculoService(resumen_service, regla_horas_service, cierre_service, cache_reportes)
+presencia_service = PresenciaService()
+asistencia_service = AsistenciaService(resumen_service, calendario_service, presencia_service,
+                                       cache_reportes, archivo_service, cache_mes_actual, regla_horas_service,
+                                       cierre_service)
+autocompletado_empleados = AutocompletadoEmpleados(cache_reportes)
+empleado_service = EmpleadoService(autocompletado_empleados)
+proyeccion_service = ProyeccionService(asistencia_service)
+buffer_registros = BufferRegistros(asistencia_service)
+trabajo_reporte_service = TrabajoReporteService(asistencia_service)
+particion_service = ParticionService()
+anomalia_service = AnomaliaService(calendario_service, archivo_service)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import time as reloj
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import select, insert, delete, desc, func
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.empleado import Empleado
+from app.api.v1.models.anomalia import Anomalia
+from app.utils.sql import ordinal_fecha, segundos_del_dia
+
+class AnomaliaService:
+    """
+    Servicio para detectar anomalías de asistencia.
+    El escaneo lee la ventana de fechas por lotes con un cursor del lado del servidor directamente
+    a arreglos NumPy (ordinales y segundos calculados en SQL) y evalúa cada tipo de anomalía con
+    operaciones vectorizadas sobre todas las filas. Los días archivados se leen del archivo para no
+    reportarlos como faltantes y para detectar los que además siguen en la tabla.
+    """
+    
+    # Duración máxima plausible de una jornada; las mayores provienen del cruce de medianoche de calcular_horas
+    DURACION_MAXIMA_HORAS = 16
+    
+    # Filas por lote al leer las asistencias del período
+    YIELD_PER = 10000
+    
+    # Columnas de las asistencias cargadas (las horas faltantes quedan como NaN)
+    COLUMNAS_ASISTENCIA = np.dtype([
+        ('id', np.int64),
+        ('empleado_id', np.int64),
+        ('ordinal', np.int64),
+        ('entrada', np.float64),
+        ('salida', np.float64)
+    ])
+    
+    def __init__(self, calendario_service, archivo_service):
+        self.calendario_service = calendario_service
+        self.archivo_service = archivo_service
+    
+    def escanear(self, fecha_inicio, fecha_fin):
+        """
+        Detecta las anomalías de un período y reemplaza las registradas para ese período
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período
+        
+        Returns:
+            dict: {asistencias, empleados, anomalias: {tipo: cantidad}, segundos}
+        """
+        inicio = reloj.monotonic()
+        # El día en curso todavía puede completarse: no cuenta como abierto ni faltante
+        ayer = datetime.utcnow().date() - timedelta(days=1)
+        
+        columnas = self._cargar_asistencias(fecha_inicio, fecha_fin)
+        archivadas = self._cargar_archivadas(fecha_inicio, fecha_fin)
+        empleados = self._cargar_empleados()
+        
+        hallazgos = [
+            self._registros_abiertos(columnas, ayer.toordinal()),
+            self._duraciones_imposibles(columnas),
+            self._duplicados(columnas, archivadas),
+            self._dias_faltantes(columnas, archivadas, empleados, fecha_inicio, min(fecha_fin, ayer))
+        ]
+        
+        ahora = datetime.utcnow()
+        filas = []
+        conteo = {}
+        for tipo, empleado_ids, ordinales, asistencia_ids, detalle in hallazgos:
+            # Una anomalía por tipo, empleado y día aunque el día tenga asistencias duplicadas
+            _, unicos = np.unique(np.stack([empleado_ids, ordinales]), axis=1, return_index=True)
+            empleado_ids, ordinales, asistencia_ids = empleado_ids[unicos], ordinales[unicos], asistencia_ids[unicos]
+            conteo[tipo] = len(empleado_ids)
+            filas.extend(
+                {
+                    'tipo': tipo,
+                    'empleado_id': int(empleado_id),
+                    'fecha': date.fromordinal(int(ordinal)),
+                    'asistencia_id': int(asistencia_id) if asistencia_id >= 0 else None,
+                    'detalle': detalle,
+                    'detectado_en': ahora
+                }
+                for empleado_id, ordinal, asistencia_id in zip(empleado_ids, ordinales, asistencia_ids)
+            )
+        
+        try:
+            db.session.execute(delete(Anomalia).where(Anomalia.fecha.between(fecha_inicio, fecha_fin)))
+            if filas:
+                db.session.execute(insert(Anomalia), filas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return {
+            'asistencias': len(columnas['id']),
+            'empleados': len(empleados['id']),
+            'anomalias': conteo,
+            'segundos': round(reloj.monotonic() - inicio, 3)
+        }
+    
+    def get_anomalias(self, page=1, per_page=20, **filters):
+        """
+        Obtener las anomalías registradas con paginación y filtros
+        
+        Args:
+            page (int): Número de página
+            per_page (int): Elementos por página
+            **filters: Filtros (tipo, empleado_id, fecha_inicio, fecha_fin)
+        
+        Returns:
+            tuple: (anomalias, total)
+        """
+        query = Anomalia.query
+        
+        if filters.get('tipo'):
+            query = query.filter(Anomalia.tipo == filters['tipo'])
+        
+        if filters.get('empleado_id'):
+            query = query.filter(Anomalia.empleado_id == filters['empleado_id'])
+        
+        if filters.get('fecha_inicio'):
+            query = query.filter(Anomalia.fecha >= filters['fecha_inicio'])
+        
+        if filters.get('fecha_fin'):
+            query = query.filter(Anomalia.fecha <= filters['fecha_fin'])
+        
+        pagination = query.order_by(desc(Anomalia.fecha), desc(Anomalia.id)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return pagination.items, pagination.total
+    
+    def _cargar_asistencias(self, fecha_inicio, fecha_fin):
+        """
+        Carga las asistencias del período como columnas NumPy (horas en segundos, NaN si faltan),
+        leyendo por lotes de YIELD_PER filas sin acumular la lista completa de filas
+        """
+        resultado = db.session.execute(
+            select(
+                Asistencia.id,
+                Asistencia.empleado_id,
+                ordinal_fecha(Asistencia.fecha),
+                # -1 marca la hora faltante: np.fromiter no admite None en columnas numéricas
+                func.coalesce(segundos_del_dia(Asistencia.hora_entrada), -1),
+                func.coalesce(segundos_del_dia(Asistencia.hora_salida), -1)
+            ).where(
+                Asistencia.fecha.between(fecha_inicio, fecha_fin)
+            ).execution_options(yield_per=self.YIELD_PER)
+        )
+        datos = np.fromiter(map(tuple, resultado), dtype=self.COLUMNAS_ASISTENCIA)
+        
+        return {
+            'id': datos['id'],
+            'empleado_id': datos['empleado_id'],
+            'ordinal': datos['ordinal'],
+            'entrada': np.where(datos['entrada'] < 0, np.nan, datos['entrada']),
+            'salida': np.where(datos['salida'] < 0, np.nan, datos['salida'])
+        }
+    
+    def _cargar_archivadas(self, fecha_inicio, fecha_fin):
+        """Carga del archivo los días con asistencia del período como columnas NumPy"""
+        dias = self.archivo_service.get_dias_asistidos(fecha_inicio, fecha_fin)
+        return {
+            'empleado_id': np.array([empleado_id for empleado_id, _ in dias], dtype=np.int64),
+            'ordinal': np.array([fecha.toordinal() for _, fecha in dias], dtype=np.int64)
+        }
+    
+    def _cargar_empleados(self):
+        """Carga los empleados activos como columnas NumPy ordenadas por ID"""
+        filas = db.session.execute(
+            select(Empleado.id, ordinal_fecha(Empleado.fecha_ingreso))
+            .where(Empleado.estado == True)
+            .order_by(Empleado.id)
+        ).all()
+        
+        id_, ingreso = zip(*filas) if filas else ((), ())
+        return {
+            'id': np.array(id_, dtype=np.int64),
+            # Sin fecha de ingreso se consideran todos los días del período
+            'ingreso': np.array([i if i is not None else 0 for i in ingreso], dtype=np.int64)
+        }
+    
+    def _registros_abiertos(self, columnas, ultimo_ordinal):
+        """Asistencias de días pasados con entrada y sin salida"""
+        seleccion = (~np.isnan(columnas['entrada']) & np.isnan(columnas['salida'])
+                     & (columnas['ordinal'] <= ultimo_ordinal))
+        return ('registro_abierto', columnas['empleado_id'][seleccion], columnas['ordinal'][seleccion],
+                columnas['id'][seleccion], 'Entrada sin salida')
+    
+    def _duraciones_imposibles(self, columnas):
+        """Jornadas nulas o más largas que DURACION_MAXIMA_HORAS (salida anterior a la entrada tomada como cruce de medianoche)"""
+        completas = ~np.isnan(columnas['entrada']) & ~np.isnan(columnas['salida'])
+        duracion = np.where(completas, columnas['salida'] - columnas['entrada'], 0)
+        duracion = np.where(duracion < 0, duracion + 86400, duracion)
+        seleccion = completas & ((duracion == 0) | (duracion > self.DURACION_MAXIMA_HORAS * 3600))
+        return ('duracion_imposible', columnas['empleado_id'][seleccion], columnas['ordinal'][seleccion],
+                columnas['id'][seleccion], f'Jornada nula o mayor a {self.DURACION_MAXIMA_HORAS} horas')
+    
+    def _duplicados(self, columnas, archivadas):
+        """
+        Asistencias de la tabla cuyo empleado y día también están en el archivo (el índice único
+        impide repetirlas dentro de la tabla; una fila llegada tras archivar su mes queda en ambos)
+        """
+        # Clave combinada empleado/día: el ordinal de una fecha cabe en 32 bits
+        clave = (columnas['empleado_id'] << 32) | columnas['ordinal']
+        clave_archivo = (archivadas['empleado_id'] << 32) | archivadas['ordinal']
+        repetida = np.isin(clave, clave_archivo)
+        return ('duplicado', columnas['empleado_id'][repetida], columnas['ordinal'][repetida],
+                columnas['id'][repetida], 'Asistencia en la tabla y en el archivo para el mismo día')
+    
+    def _dias_faltantes(self, columnas, archivadas, empleados, fecha_inicio, fecha_fin):
+        """Días laborables sin asistencia (activa ni archivada) de empleados activos, desde su fecha de ingreso"""
+        vacio = ('dia_faltante', np.array([], dtype=np.int64), np.array([], dtype=np.int64),
+                 np.array([], dtype=np.int64), 'Día laborable sin asistencia')
+        if fecha_inicio > fecha_fin or not len(empleados['id']):
+            return vacio
+        
+        dias = np.array(self.calendario_service.ordinales_laborables(fecha_inicio, fecha_fin), dtype=np.int64)
+        if not len(dias):
+            return vacio
+        
+        # Matriz empleados x días laborables marcando los días con asistencia
+        empleado_ids = np.concatenate([columnas['empleado_id'], archivadas['empleado_id']])
+        ordinales = np.concatenate([columnas['ordinal'], archivadas['ordinal']])
+        fila = np.searchsorted(empleados['id'], empleado_ids)
+        columna = np.searchsorted(dias, ordinales)
+        valida = ((fila < len(empleados['id'])) & (columna < len(dias)))
+        valida[valida] &= ((empleados['id'][fila[valida]] == empleado_ids[valida])
+                           & (dias[columna[valida]] == ordinales[valida]))
+        
+        presente = np.zeros((len(empleados['id']), len(dias)), dtype=bool)
+        presente[fila[valida], columna[valida]] = True
+        
+        faltante = ~presente & (dias[np.newaxis, :] >= empleados['ingreso'][:, np.newaxis])
+        filas, columnas_faltantes = np.nonzero(faltante)
+        return ('dia_faltante', empleados['id'][filas], dias[columnas_faltantes],
+                np.full(len(filas), -1, dtype=np.int64), vacio[4])
@@ -0,0 +1,334 @@
+import hashlib
+import os
+import re
+from datetime import date, timedelta
+from flask import current_app
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select, delete, func, exists
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.empleado import Empleado
+from app.api.v1.models.archivo_asistencia import ArchivoAsistencia
+
+class ArchivoService:
+    """
+    Servicio para el archivo en frío de asistencias.
+    Los meses cerrados (sin asistencias pendientes) se mueven de la tabla asistencias a archivos
+    Parquet comprimidos en disco local, uno por mes y unidad productiva, ordenados por empleado
+    y fecha para que los filtros se resuelvan con las estadísticas de cada grupo de filas.
+    La tabla archivos_asistencia indica qué meses están archivados y dónde.
+    """
+    
+    # Esquema de los archivos; no incluye el reclamo, que solo aplica a asistencias pendientes
+    ESQUEMA = pa.schema([
+        ('id', pa.int64()),
+        ('empleado_id', pa.int32()),
+        ('fecha', pa.date32()),
+        ('hora_entrada', pa.time64('us')),
+        ('hora_salida', pa.time64('us')),
+        ('horas_trabajadas', pa.float64()),
+        ('horas_extras', pa.float64()),
+        ('observaciones', pa.string()),
+        ('estado', pa.string()),
+        ('usuario_aprobacion', pa.int32()),
+        ('fecha_aprobacion', pa.timestamp('us'))
+    ])
+    
+    # Filas por grupo de filas de Parquet (unidad mínima que se salta con los filtros)
+    FILAS_POR_GRUPO = 16384
+    
+    # Unidad asignada a los empleados sin unidad productiva
+    SIN_UNIDAD = 'SIN_UNIDAD'
+    
+    # IDs por sentencia al eliminar de la tabla las filas archivadas
+    IDS_POR_DELETE = 10000
+    
+    def archivar(self, meses_activos, hoy=None):
+        """
+        Archiva los meses anteriores al período activo que ya no tienen asistencias pendientes
+        
+        Args:
+            meses_activos (int): Meses que se conservan en la tabla, además del actual
+            hoy (date, optional): Fecha de referencia (por defecto la fecha actual)
+        
+        Returns:
+            dict: {archivados, omitidos} con los meses (YYYY-MM) archivados y los omitidos por tener pendientes
+        """
+        corte = self._sumar_meses((hoy or date.today()).replace(day=1), -meses_activos)
+        
+        primera = db.session.execute(
+            select(func.min(Asistencia.fecha)).where(Asistencia.fecha < corte)
+        ).scalar()
+        
+        archivados = []
+        omitidos = []
+        mes = primera.replace(day=1) if primera else corte
+        while mes < corte:
+            filas = self.archivar_mes(mes)
+            if filas is None:
+                omitidos.append(f'{mes:%Y-%m}')
+            elif filas:
+                archivados.append(f'{mes:%Y-%m}')
+            mes = self._sumar_meses(mes, 1)
+        
+        return {'archivados': archivados, 'omitidos': omitidos}
+    
+    def archivar_mes(self, periodo):
+        """
+        Archiva las asistencias de un mes: escribe un archivo por unidad productiva,
+        registra los archivos y elimina las filas de la tabla en una misma transacción.
+        Las filas leídas quedan bloqueadas hasta el commit y solo ellas se eliminan: una fila
+        insertada mientras tanto permanece en la tabla y se archiva en la siguiente pasada.
+        
+        Args:
+            periodo (date): Primer día del mes
+        
+        Returns:
+            int or None: Filas archivadas, None si el mes tiene asistencias pendientes
+        """
+        desde = periodo
+        hasta = self._sumar_meses(periodo, 1) - timedelta(days=1)
+        en_mes = Asistencia.fecha.between(desde, hasta)
+        
+        pendientes = db.session.execute(
+            select(exists().where(en_mes, Asistencia.estado == 'Pendiente'))
+        ).scalar()
+        if pendientes:
+            db.session.rollback()
+            return None
+        
+        # Bloquear las filas que se archivan: nadie puede aprobarlas, rechazarlas ni completarlas
+        # entre la lectura y la eliminación
+        unidad = func.coalesce(Empleado.unidad_productiva, self.SIN_UNIDAD)
+        filas = db.session.execute(
+            select(unidad.label('unidad'), *(getattr(Asistencia, c) for c in self.ESQUEMA.names))
+            .join(Empleado, Empleado.id == Asistencia.empleado_id)
+            .where(en_mes)
+            .order_by(unidad, Asistencia.empleado_id, Asistencia.fecha)
+            .with_for_update(of=Asistencia)
+        ).all()
+        if not filas:
+            db.session.rollback()
+            return 0
+        
+        # Comprobar de nuevo sobre las filas ya bloqueadas (la consulta previa solo evita bloquear en vano)
+        if any(fila.estado == 'Pendiente' for fila in filas):
+            db.session.rollback()
+            return None
+        
+        por_unidad = {}
+        for fila in filas:
+            por_unidad.setdefault(fila.unidad, []).append(fila)
+        
+        # Un mes que ya tenía archivos (filas llegadas después de archivarlo) se reescribe completo
+        anteriores = {
+            archivo.unidad_productiva: archivo
+            for archivo in ArchivoAsistencia.query.filter_by(periodo=periodo).all()
+        }
+        
+        escritos = []
+        try:
+            for unidad_productiva, filas_unidad in por_unidad.items():
+                tabla = self._tabla(filas_unidad)
+                anterior = anteriores.get(unidad_productiva)
+                if anterior:
+                    ruta = anterior.ruta
+                    tabla = self._combinar(pq.read_table(self._ruta_absoluta(ruta)), tabla)
+                else:
+                    ruta = self._ruta(periodo, unidad_productiva)
+                    # Nunca reemplazar el archivo de otra unidad productiva
+                    if ruta in escritos or ArchivoAsistencia.query.filter_by(ruta=ruta).first():
+                        raise ValueError(f'La ruta {ruta} ya pertenece a otro archivo')
+                
+                tamano = self._escribir(tabla, ruta)
+                escritos.append(ruta)
+                
+                if anterior:
+                    anterior.filas = tabla.num_rows
+                    anterior.bytes = tamano
+                else:
+                    db.session.add(ArchivoAsistencia(
+                        periodo=periodo,
+                        unidad_productiva=unidad_productiva,
+                        ruta=ruta,
+                        filas=tabla.num_rows,
+                        bytes=tamano
+                    ))
+            
+            # Solo las filas escritas en los archivos, no las llegadas después de leerlas
+            ids = [fila.id for fila in filas]
+            for inicio in range(0, len(ids), self.IDS_POR_DELETE):
+                db.session.execute(
+                    delete(Asistencia).where(Asistencia.id.in_(ids[inicio:inicio + self.IDS_POR_DELETE]))
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Sin commit los archivos nuevos no están registrados; los reescritos conservan sus filas
+            for ruta in escritos:
+                if ruta not in {a.ruta for a in anteriores.values()}:
+                    os.remove(self._ruta_absoluta(ruta))
+            raise
+        
+        return len(filas)
+    
+    def get_periodos_archivados(self, fecha_inicio=None, fecha_fin=None):
+        """
+        Obtiene los archivos de los meses archivados que se solapan con un rango
+        
+        Args:
+            fecha_inicio (date, optional): Inicio del rango
+            fecha_fin (date, optional): Fin del rango
+        
+        Returns:
+            list: Archivos (ArchivoAsistencia) del rango
+        """
+        query = ArchivoAsistencia.query
+        if fecha_inicio:
+            query = query.filter(ArchivoAsistencia.periodo >= fecha_inicio.replace(day=1))
+        if fecha_fin:
+            query = query.filter(ArchivoAsistencia.periodo <= fecha_fin)
+        return query.order_by(ArchivoAsistencia.periodo).all()
+    
+    def get_asistencias_empleado(self, empleado_id, fecha_inicio=None, fecha_fin=None):
+        """
+        Lee del archivo las asistencias de un empleado en un rango de fechas
+        
+        Args:
+            empleado_id (int): ID del empleado
+            fecha_inicio (date, optional): Fecha de inicio del rango
+            fecha_fin (date, optional): Fecha fin del rango
+        
+        Returns:
+            list: Asistencias archivadas (objetos Asistencia no asociados a la sesión)
+        """
+        filtro = ds.field('empleado_id') == empleado_id
+        tabla = self._leer(fecha_inicio, fecha_fin, filtro)
+        if tabla is None:
+            return []
+        
+        return [Asistencia(**fila) for fila in tabla.to_pylist()]
+    
+    def get_dias_asistidos(self, fecha_inicio, fecha_fin):
+        """
+        Lee del archivo los días con asistencia de cada empleado en un rango de fechas
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del rango
+            fecha_fin (date): Fecha fin del rango
+        
+        Returns:
+            list: Tuplas (empleado_id, fecha)
+        """
+        tabla = self._leer(fecha_inicio, fecha_fin, ds.field('empleado_id').is_valid(),
+                           columnas=['empleado_id', 'fecha'])
+        if tabla is None:
+            return []
+        
+        return list(zip(tabla['empleado_id'].to_pylist(), tabla['fecha'].to_pylist()))
+    
+    def totales_por_empleado(self, fecha_inicio, fecha_fin, empleado_ids=None):
+        """
+        Totales de asistencias aprobadas archivadas por empleado en un rango de fechas
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del rango
+            fecha_fin (date): Fecha fin del rango
+            empleado_ids (list, optional): Limitar a estos empleados
+        
+        Returns:
+            list: Tuplas (empleado_id, horas_trabajadas, horas_extras, dias_asistidos)
+        """
+        filtro = ds.field('estado') == 'Aprobado'
+        if empleado_ids is not None:
+            filtro = filtro & ds.field('empleado_id').isin(list(empleado_ids))
+        
+        tabla = self._leer(fecha_inicio, fecha_fin, filtro,
+                           columnas=['empleado_id', 'horas_trabajadas', 'horas_extras'])
+        if tabla is None or not tabla.num_rows:
+            return []
+        
+        totales = tabla.group_by('empleado_id').aggregate([
+            ('horas_trabajadas', 'sum'),
+            ('horas_extras', 'sum'),
+            ('empleado_id', 'count')
+        ])
+        return list(zip(
+            totales['empleado_id'].to_pylist(),
+            pc.fill_null(totales['horas_trabajadas_sum'], 0.0).to_pylist(),
+            pc.fill_null(totales['horas_extras_sum'], 0.0).to_pylist(),
+            totales['empleado_id_count'].to_pylist()
+        ))
+    
+    def _leer(self, fecha_inicio, fecha_fin, filtro, columnas=None):
+        """
+        Lee con un filtro los archivos de los meses del rango; el filtro se aplica
+        sobre las estadísticas de cada grupo de filas antes de leerlo
+        
+        Returns:
+            pyarrow.Table or None: Filas que cumplen el filtro, None si no hay meses archivados en el rango
+        """
+        archivos = self.get_periodos_archivados(fecha_inicio, fecha_fin)
+        if not archivos:
+            return None
+        
+        if fecha_inicio:
+            filtro = filtro & (ds.field('fecha') >= fecha_inicio)
+        if fecha_fin:
+            filtro = filtro & (ds.field('fecha') <= fecha_fin)
+        
+        dataset = ds.dataset([self._ruta_absoluta(a.ruta) for a in archivos], schema=self.ESQUEMA, format='parquet')
+        return dataset.to_table(columns=columnas, filter=filtro)
+    
+    def _tabla(self, filas):
+        """Construye una tabla columnar a partir de filas de asistencias"""
+        return pa.Table.from_pydict(
+            {columna: [getattr(fila, columna) for fila in filas] for columna in self.ESQUEMA.names},
+            schema=self.ESQUEMA
+        )
+    
+    def _combinar(self, anterior, nueva):
+        """Une un archivo existente con filas nuevas del mismo mes, sin duplicar (empleado, fecha)"""
+        claves = set(zip(nueva['empleado_id'].to_pylist(), nueva['fecha'].to_pylist()))
+        conservar = [
+            (empleado_id, fecha) not in claves
+            for empleado_id, fecha in zip(anterior['empleado_id'].to_pylist(), anterior['fecha'].to_pylist())
+        ]
+        tabla = pa.concat_tables([anterior.filter(pa.array(conservar, pa.bool_())), nueva])
+        return tabla.sort_by([('empleado_id', 'ascending'), ('fecha', 'ascending')])
+    
+    def _escribir(self, tabla, ruta):
+        """
+        Escribe un archivo Parquet comprimido de forma atómica
+        
+        Returns:
+            int: Tamaño del archivo en bytes
+        """
+        destino = self._ruta_absoluta(ruta)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = f'{destino}.{os.getpid()}.tmp'
+        
+        pq.write_table(tabla, temporal, compression='zstd', row_group_size=self.FILAS_POR_GRUPO)
+        os.replace(temporal, destino)
+        return os.path.getsize(destino)
+    
+    def _ruta(self, periodo, unidad_productiva):
+        """
+        Ruta relativa del archivo de un mes y una unidad productiva. El nombre saneado se
+        acompaña de un hash del nombre original para que dos unidades no compartan archivo.
+        """
+        nombre = re.sub(r'[^A-Za-z0-9_-]+', '_', unidad_productiva) or self.SIN_UNIDAD
+        huella = hashlib.sha1(unidad_productiva.encode('utf-8')).hexdigest()[:10]
+        return f'{periodo:%Y}/{periodo:%m}/{nombre}-{huella}.parquet'
+    
+    def _ruta_absoluta(self, ruta):
+        """Ruta absoluta de un archivo dentro del directorio de archivo configurado"""
+        return os.path.join(current_app.config['ARCHIVO_ASISTENCIAS_DIR'], ruta)
+    
+    def _sumar_meses(self, mes, meses):
+        """Suma (o resta) meses al primer día de un mes"""
+        indice = mes.year * 12 + mes.month - 1 + meses
+        return date(indice // 12, indice % 12 + 1, 1)
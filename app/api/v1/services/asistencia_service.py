@@ -1,14 +1,39 @@
-from datetime import datetime, time, timedelta
-from sqlalchemy import func, and_, desc
+import base64
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import func, and_, or_, desc, case, select, update, tuple_
 from app import db
 from app.api.v1.models.asistencia import Asistencia
 from app.api.v1.models.empleado import Empleado
 from app.api.v1.models.usuario import Usuario
-from app.api.v1.schemas import validate_data, asistencia_schema, asistencia_registro_schema, asistencia_aprobacion_schema
+from app.api.v1.models.evento_kiosco import EventoKiosco
+from app.api.v1.models.marcacion import Marcacion
+from app.utils.sql import dialecto_actual, insert_con_conflicto
+from app.api.v1.schemas import validate_data, asistencia_schema, asistencia_registro_schema, asistencia_aprobacion_schema, asistencia_lote_schema, asistencia_aprobacion_lote_schema, sincronizacion_kiosco_schema, horas_empleados_schema
+
+# Fila de empleado del reporte con sus totales (mismas columnas que la consulta agregada)
+FilaReporte = namedtuple('FilaReporte', 'id cedula nombres apellidos area unidad_productiva total_trabajadas total_extras dias_asistidos')
 
 class AsistenciaService:
     """Servicio para gestionar asistencias"""
     
+    # Filas por lote al recorrer exportaciones con cursor del lado del servidor
+    EXPORT_YIELD_PER = 1000
+    
+    # Duración del reclamo de asistencias pendientes por un aprobador
+    RECLAMO_DURACION = timedelta(minutes=15)
+    
+    def __init__(self, resumen_service, calendario_service, presencia_service, cache_reportes, archivo_service,
+                 cache_mes_actual, regla_horas_service, cierre_service):
+        self.resumen_service = resumen_service
+        self.calendario_service = calendario_service
+        self.presencia_service = presencia_service
+        self.cache_reportes = cache_reportes
+        self.archivo_service = archivo_service
+        self.cache_mes_actual = cache_mes_actual
+        self.regla_horas_service = regla_horas_service
+        self.cierre_service = cierre_service
+    
     def registrar_asistencia(self, data):
         """
         Registrar entrada o salida de un empleado
@@ -46,7 +71,8 @@ class AsistenciaService:
             asistencia, mensaje = Asistencia.registrar_salida(
                 empleado_id=empleado.id,
                 hora=current_time,
-                observaciones=validated_data.get('observaciones')
+                observaciones=validated_data.get('observaciones'),
+                evaluador=self.regla_horas_service.get_evaluador(empleado.unidad_productiva, empleado.area)
             )
         
         if not asistencia:
@@ -54,12 +80,435 @@ class AsistenciaService:
         
         try:
             db.session.add(asistencia)
+            cambios = self.presencia_service.capturar([asistencia])
+            cambios_mes = self.cache_mes_actual.capturar([asistencia])
             db.session.commit()
+            self.presencia_service.publicar(cambios)
+            self.cache_mes_actual.publicar(cambios_mes)
             return asistencia, mensaje, None
         except Exception as e:
             db.session.rollback()
             return None, None, {'database': [str(e)]}
     
+    def validar_registro_diferido(self, data, entrada_en_espera=None):
+        """
+        Validar una marcación para registro diferido, fijando su fecha y hora de recepción.
+        Rechaza de inmediato lo que el volcado rechazaría con seguridad (el cliente ya recibió 202
+        cuando se confirma): día procesado, entrada o salida repetida y salida sin entrada.
+        
+        Args:
+            data (dict): Datos del registro (empleado_id, tipo_registro, observaciones)
+            entrada_en_espera (callable, optional): Indica si hay una entrada (empleado_id, fecha)
+                                                    encolada en este worker y aún sin confirmar
+            
+        Returns:
+            tuple: (registro, None) si es válida, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(asistencia_registro_schema, data)
+        if errors:
+            return None, errors
+        
+        # Verificar que el empleado existe y está activo
+        empleado = Empleado.query.get(validated_data['empleado_id'])
+        if not empleado:
+            return None, {'empleado_id': ['Empleado no encontrado']}
+        if not empleado.estado:
+            return None, {'empleado_id': ['El empleado está inactivo']}
+        
+        now = datetime.utcnow()
+        fecha = now.date()
+        tipo_registro = validated_data['tipo_registro']
+        
+        # La fecha es la de hoy, que no puede pertenecer a un mes cerrado ni archivado
+        asistencia = db.session.query(Asistencia.estado, Asistencia.hora_salida).filter(
+            Asistencia.empleado_id == empleado.id,
+            Asistencia.fecha == fecha
+        ).first()
+        en_espera = entrada_en_espera is not None and entrada_en_espera(empleado.id, fecha)
+        
+        if asistencia is not None and asistencia.estado != 'Pendiente':
+            return None, {'registro': [Asistencia.PROCESADA]}
+        if tipo_registro == 'entrada' and (asistencia is not None or en_espera):
+            return None, {'registro': ['Ya existe un registro de entrada para hoy']}
+        if tipo_registro == 'salida':
+            if asistencia is not None and asistencia.hora_salida is not None:
+                return None, {'registro': ['Ya existe un registro de salida para hoy']}
+            # Una entrada encolada en otro worker se confirma en un intervalo de volcado: la salida
+            # llegada dentro de ese margen se rechaza como en el registro síncrono
+            if asistencia is None and not en_espera:
+                return None, {'registro': [Asistencia.SIN_ENTRADA]}
+        
+        return dict(validated_data, fecha=fecha, hora=now.time()), None
+    
+    def registrar_marcacion(self, data):
+        """
+        Registrar una marcación en el log de eventos con un único INSERT.
+        La asistencia se actualiza después, de forma asíncrona, por el proyector de marcaciones.
+        
+        Args:
+            data (dict): Datos del registro (empleado_id, tipo_registro, observaciones)
+            
+        Returns:
+            tuple: (marcacion, mensaje, None) si el registro es exitoso, (None, None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(asistencia_registro_schema, data)
+        if errors:
+            return None, None, errors
+        
+        # Verificar el empleado antes de aceptar la marcación: el proyector ya no puede rechazarla ante el cliente
+        empleado = Empleado.query.get(validated_data['empleado_id'])
+        if not empleado:
+            return None, None, {'empleado_id': ['Empleado no encontrado']}
+        if not empleado.estado:
+            return None, None, {'empleado_id': ['El empleado está inactivo']}
+        
+        marcacion = Marcacion(
+            empleado_id=validated_data['empleado_id'],
+            tipo_registro=validated_data['tipo_registro'],
+            marcado_en=datetime.utcnow(),
+            observaciones=validated_data.get('observaciones'),
+            origen='api'
+        )
+        
+        try:
+            db.session.add(marcacion)
+            db.session.commit()
+            return marcacion, 'Marcación recibida, pendiente de procesamiento', None
+        except Exception as e:
+            db.session.rollback()
+            return None, None, {'database': [str(e)]}
+    
+    def registrar_asistencias_lote(self, data):
+        """
+        Registrar un lote de entradas/salidas en una sola transacción
+        
+        Args:
+            data (dict): Datos del lote ({'registros': [{empleado_id, tipo_registro, observaciones}, ...]})
+            
+        Returns:
+            tuple: (resultados, None) si el lote se procesa, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(asistencia_lote_schema, data)
+        if errors:
+            return None, errors
+        
+        # Todas las marcaciones del lote comparten la hora de recepción
+        now = datetime.utcnow()
+        registros = [
+            dict(registro, fecha=now.date(), hora=now.time())
+            for registro in validated_data['registros']
+        ]
+        
+        resultados = self.aplicar_registros(registros)
+        
+        try:
+            # Serializar antes de confirmar: el commit expira los objetos y
+            # to_dict() volvería a consultar cada asistencia por separado
+            db.session.flush()
+            formateados = self._formatear_resultados(resultados)
+            self.confirmar_registros(resultados)
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+        
+        return formateados, None
+    
+    def sincronizar_eventos_kiosco(self, data):
+        """
+        Sincronizar marcaciones almacenadas por un kiosco sin conexión.
+        Los eventos ya recibidos se descartan por kiosco e ID (idempotencia); los nuevos se aplican
+        en orden de marcación por empleado, en una sola transacción.
+        
+        Args:
+            data (dict): Datos de sincronización (kiosco_id, eventos[{id, empleado_id, tipo_registro, timestamp, observaciones}])
+            
+        Returns:
+            tuple: (acuses, None) con un acuse por cada ID recibido, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(sincronizacion_kiosco_schema, data)
+        if errors:
+            return None, errors
+        
+        kiosco_id = validated_data['kiosco_id']
+        
+        # Un mismo ID repetido dentro del envío se procesa una sola vez
+        unicos = {}
+        for evento in validated_data['eventos']:
+            unicos.setdefault(evento['id'], evento)
+        eventos = list(unicos.values())
+        
+        # Descartar los eventos ya sincronizados en envíos anteriores
+        previos = {
+            e.id: e for e in EventoKiosco.query.filter(
+                EventoKiosco.kiosco_id == kiosco_id,
+                EventoKiosco.id.in_([evento['id'] for evento in eventos])
+            ).all()
+        }
+        
+        acuses = {}
+        for evento_id, previo in previos.items():
+            acuses[evento_id] = {'id': evento_id, 'estado': 'duplicado', 'resultado': previo.resultado,
+                                 'mensaje': previo.mensaje}
+        
+        nuevos = []
+        for evento in eventos:
+            if evento['id'] in previos:
+                continue
+            marcado_en = evento['timestamp']
+            if marcado_en.tzinfo:
+                marcado_en = marcado_en.astimezone(timezone.utc).replace(tzinfo=None)
+            nuevos.append(dict(evento, marcado_en=marcado_en, fecha=marcado_en.date(), hora=marcado_en.time()))
+        
+        # Aplicar en orden de marcación por empleado; los días que ya no admiten cambios se rechazan
+        nuevos.sort(key=lambda evento: (evento['empleado_id'], evento['marcado_en']))
+        resultados = self.aplicar_registros_permitidos(nuevos)
+        
+        for registro, asistencia, mensaje, error in resultados:
+            resultado = 'rechazado' if error else 'aplicado'
+            db.session.add(EventoKiosco(
+                id=registro['id'],
+                kiosco_id=kiosco_id,
+                empleado_id=registro['empleado_id'],
+                tipo_registro=registro['tipo_registro'],
+                marcado_en=registro['marcado_en'],
+                resultado=resultado,
+                mensaje=(error or mensaje)[:255]
+            ))
+            acuses[registro['id']] = {'id': registro['id'], 'estado': resultado, 'mensaje': error or mensaje}
+        
+        try:
+            if self.hay_cierre_concurrente(resultados):
+                db.session.rollback()
+                return None, {'periodo': ['Se cerró un período durante la sincronización; reintente el envío']}
+            
+            self.confirmar_registros(resultados)
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+        
+        # Responder en el orden de envío
+        return [acuses[evento['id']] for evento in eventos], None
+    
+    def aplicar_registros_permitidos(self, registros):
+        """
+        Aplica marcaciones como aplicar_registros, rechazando las de días que ya no admiten
+        cambios (asistencias procesadas, meses cerrados o archivados). No confirma la transacción:
+        antes del commit debe comprobarse hay_cierre_concurrente().
+        
+        Args:
+            registros (list): Marcaciones (empleado_id, tipo_registro, fecha, hora, observaciones)
+            
+        Returns:
+            list: Resultados por marcación como tuplas (registro, asistencia, mensaje, error); los rechazados al final
+        """
+        bloqueados = self._dias_bloqueados(registros)
+        resultados = self.aplicar_registros(
+            [registro for registro in registros if (registro['empleado_id'], registro['fecha']) not in bloqueados]
+        )
+        resultados.extend(
+            (registro, None, None, bloqueados[(registro['empleado_id'], registro['fecha'])])
+            for registro in registros if (registro['empleado_id'], registro['fecha']) in bloqueados
+        )
+        return resultados
+    
+    def hay_cierre_concurrente(self, resultados):
+        """
+        Indica si se cerró el mes de alguna marcación aplicada mientras se escribía.
+        Se comprueba después de escribir: un cierre concurrente espera a esta transacción
+        o ya es visible aquí (mismo criterio que aprobar_asistencia).
+        
+        Args:
+            resultados (list): Resultados de aplicar_registros_permitidos()
+            
+        Returns:
+            bool: True si hay que deshacer la transacción y reintentar
+        """
+        meses = {asistencia.fecha.replace(day=1) for registro, asistencia, mensaje, error in resultados if not error}
+        return bool(meses) and bool(meses & self.cierre_service.get_meses_cerrados(min(meses), max(meses)))
+    
+    def _dias_bloqueados(self, registros):
+        """
+        Días de un conjunto de marcaciones que ya no admiten cambios: asistencias aprobadas o
+        rechazadas (el resumen mensual ya las contabilizó), meses cerrados y meses archivados
+        
+        Args:
+            registros (list): Marcaciones (empleado_id, fecha)
+            
+        Returns:
+            dict: {(empleado_id, fecha): motivo del rechazo}
+        """
+        if not registros:
+            return {}
+        
+        empleado_ids = {r['empleado_id'] for r in registros}
+        fechas = {r['fecha'] for r in registros}
+        desde, hasta = min(fechas), max(fechas)
+        
+        cerrados = self.cierre_service.get_meses_cerrados(desde, hasta)
+        archivados = {
+            (archivo.periodo, archivo.unidad_productiva)
+            for archivo in self.archivo_service.get_periodos_archivados(desde, hasta)
+        }
+        procesadas = {
+            (fila.empleado_id, fila.fecha) for fila in db.session.query(Asistencia.empleado_id, Asistencia.fecha).filter(
+                Asistencia.empleado_id.in_(empleado_ids),
+                Asistencia.fecha.in_(fechas),
+                Asistencia.estado != 'Pendiente'
+            ).all()
+        }
+        unidades = {}
+        if archivados:
+            unidades = dict(db.session.query(Empleado.id, Empleado.unidad_productiva).filter(
+                Empleado.id.in_(empleado_ids)
+            ).all())
+        
+        bloqueados = {}
+        for registro in registros:
+            clave = (registro['empleado_id'], registro['fecha'])
+            mes = registro['fecha'].replace(day=1)
+            unidad = unidades.get(registro['empleado_id']) or self.archivo_service.SIN_UNIDAD
+            if mes in cerrados:
+                bloqueados[clave] = 'El período de esta marcación está cerrado'
+            elif (mes, unidad) in archivados:
+                bloqueados[clave] = 'El período de esta marcación está archivado'
+            elif clave in procesadas:
+                bloqueados[clave] = Asistencia.PROCESADA
+        return bloqueados
+    
+    def aplicar_registros(self, registros):
+        """
+        Aplica una lista de marcaciones sobre la sesión actual sin confirmar la transacción.
+        Resuelve los empleados con una sola consulta y escribe por conjuntos: un INSERT ... ON CONFLICT
+        de varias filas para las entradas y un UPDATE ... FROM (VALUES ...) para las salidas, con las
+        mismas condiciones atómicas que el registro individual. Las marcaciones repetidas de un mismo
+        empleado y día se aplican en rondas sucesivas, respetando su orden.
+        
+        Args:
+            registros (list): Marcaciones (empleado_id, tipo_registro, fecha, hora, observaciones)
+            
+        Returns:
+            list: Resultados por marcación como tuplas (registro, asistencia, mensaje, error)
+        """
+        empleado_ids = {r['empleado_id'] for r in registros}
+        empleados = {
+            e.id: e for e in Empleado.query.filter(Empleado.id.in_(empleado_ids)).all()
+        }
+        
+        resultados = [None] * len(registros)
+        rondas = []
+        ocurrencias = {}
+        for indice, registro in enumerate(registros):
+            empleado = empleados.get(registro['empleado_id'])
+            if not empleado:
+                resultados[indice] = (registro, None, None, 'Empleado no encontrado')
+                continue
+            if not empleado.estado:
+                resultados[indice] = (registro, None, None, 'El empleado está inactivo')
+                continue
+            
+            # Cada ronda contiene a lo sumo una marcación por empleado y día
+            clave = (empleado.id, registro['fecha'])
+            ronda = ocurrencias.get(clave, 0)
+            ocurrencias[clave] = ronda + 1
+            if ronda == len(rondas):
+                rondas.append([])
+            rondas[ronda].append((indice, registro, empleado))
+        
+        por_conjuntos = insert_con_conflicto() is not None
+        for ronda in rondas:
+            if not por_conjuntos:
+                for indice, registro, empleado in ronda:
+                    resultados[indice] = self._aplicar_registro(registro, empleado)
+                continue
+            
+            entradas = [(i, r, e) for i, r, e in ronda if r['tipo_registro'] == 'entrada']
+            salidas = [(i, r, e) for i, r, e in ronda if r['tipo_registro'] != 'entrada']
+            
+            if entradas:
+                registradas = Asistencia.registrar_entradas([registro for _, registro, _ in entradas])
+                for indice, registro, empleado in entradas:
+                    asistencia = registradas.get((empleado.id, registro['fecha']))
+                    if asistencia:
+                        resultados[indice] = (registro, asistencia, 'Entrada registrada correctamente', None)
+                    else:
+                        resultados[indice] = (registro, None, None, 'Ya existe un registro de entrada para hoy')
+            
+            if salidas:
+                registradas, errores = Asistencia.registrar_salidas([
+                    dict(registro, evaluador=self.regla_horas_service.get_evaluador(
+                        empleado.unidad_productiva, empleado.area))
+                    for _, registro, empleado in salidas
+                ])
+                for indice, registro, empleado in salidas:
+                    clave = (empleado.id, registro['fecha'])
+                    if clave in registradas:
+                        resultados[indice] = (registro, registradas[clave], 'Salida registrada correctamente', None)
+                    else:
+                        resultados[indice] = (registro, None, None, errores[clave])
+        
+        return resultados
+    
+    def _aplicar_registro(self, registro, empleado):
+        """Aplica una marcación con las sentencias del registro individual (motores sin upsert)"""
+        if registro['tipo_registro'] == 'entrada':
+            asistencia, mensaje = Asistencia.registrar_entrada(
+                empleado_id=empleado.id,
+                hora=registro['hora'],
+                observaciones=registro.get('observaciones'),
+                fecha=registro['fecha']
+            )
+            if asistencia:
+                db.session.add(asistencia)
+        else:  # salida
+            asistencia, mensaje = Asistencia.registrar_salida(
+                empleado_id=empleado.id,
+                hora=registro['hora'],
+                observaciones=registro.get('observaciones'),
+                evaluador=self.regla_horas_service.get_evaluador(empleado.unidad_productiva, empleado.area),
+                fecha=registro['fecha']
+            )
+        
+        if asistencia:
+            return (registro, asistencia, mensaje, None)
+        return (registro, None, None, mensaje)
+    
+    def confirmar_registros(self, resultados):
+        """
+        Confirma la transacción de un lote aplicado con aplicar_registros y publica
+        los cambios de presencia y de la caché del mes resultantes. Si el commit falla la excepción se propaga.
+        
+        Args:
+            resultados (list): Resultados devueltos por aplicar_registros
+        """
+        asistencias = [asistencia for registro, asistencia, mensaje, error in resultados if not error]
+        cambios = self.presencia_service.capturar(asistencias)
+        cambios_mes = self.cache_mes_actual.capturar(asistencias)
+        db.session.commit()
+        self.presencia_service.publicar(cambios)
+        self.cache_mes_actual.publicar(cambios_mes)
+    
+    def _formatear_resultados(self, resultados):
+        """Convierte los resultados de aplicar_registros en diccionarios para la respuesta"""
+        formateados = []
+        for indice, (registro, asistencia, mensaje, error) in enumerate(resultados):
+            item = {
+                'indice': indice,
+                'empleado_id': registro['empleado_id'],
+                'tipo_registro': registro['tipo_registro'],
+                'exito': error is None
+            }
+            if error:
+                item['error'] = error
+            else:
+                item['mensaje'] = mensaje
+                item['asistencia'] = asistencia.to_dict()
+            formateados.append(item)
+        return formateados
+    
     def get_asistencia_by_id(self, asistencia_id):
         """
         Obtener una asistencia por su ID
@@ -74,7 +523,8 @@ class AsistenciaService:
     
     def get_asistencias_by_empleado(self, empleado_id, fecha_inicio=None, fecha_fin=None):
         """
-        Obtener asistencias de un empleado en un rango de fechas
+        Obtener asistencias de un empleado en un rango de fechas.
+        Si el rango alcanza meses archivados, incluye también las asistencias del archivo.
         
         Args:
             empleado_id (int): ID del empleado
@@ -92,7 +542,16 @@ class AsistenciaService:
         if fecha_fin:
             query = query.filter(Asistencia.fecha <= fecha_fin)
         
-        return query.order_by(desc(Asistencia.fecha)).all()
+        asistencias = query.order_by(desc(Asistencia.fecha)).all()
+        
+        archivadas = self.archivo_service.get_asistencias_empleado(empleado_id, fecha_inicio, fecha_fin)
+        if not archivadas:
+            return asistencias
+        
+        # Si un día está en ambos (registro tardío en un mes archivado), prevalece la tabla
+        fechas = {asistencia.fecha for asistencia in asistencias}
+        asistencias.extend(a for a in archivadas if a.fecha not in fechas)
+        return sorted(asistencias, key=lambda a: a.fecha, reverse=True)
     
     def get_asistencia_del_dia(self, empleado_id):
         """
@@ -119,9 +578,106 @@ class AsistenciaService:
         Returns:
             tuple: (asistencias, total)
         """
-        query = Asistencia.query
+        query = self._filtrar_asistencias(Asistencia.query, **filters)
+        
+        # Ejecutar consulta con paginación
+        pagination = query.order_by(desc(Asistencia.fecha), Asistencia.empleado_id).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return pagination.items, pagination.total
+    
+    def get_asistencias_cursor(self, cursor=None, per_page=20, incluir_total=False, **filters):
+        """
+        Obtener asistencias con paginación por cursor (keyset) sobre (fecha DESC, empleado_id).
+        Cada página cuesta lo mismo sin importar su profundidad, ya que no usa OFFSET.
+        
+        Args:
+            cursor (str, optional): Cursor devuelto por la página anterior; None para la primera página
+            per_page (int): Elementos por página
+            incluir_total (bool): Si se debe calcular el total exacto (ejecuta un COUNT adicional)
+            **filters: Filtros adicionales (empleado_id, fecha_inicio, fecha_fin, estado, area, unidad_productiva)
+            
+        Returns:
+            tuple: (asistencias, next_cursor, total) donde total es None si no se solicitó
+            
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        query = self._filtrar_asistencias(Asistencia.query, **filters)
+        
+        total = query.order_by(None).count() if incluir_total else None
+        
+        if cursor:
+            fecha, empleado_id = self._decodificar_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Asistencia.fecha < fecha,
+                    and_(Asistencia.fecha == fecha, Asistencia.empleado_id > empleado_id)
+                )
+            )
+        
+        # Se pide un elemento extra para saber si existe una página siguiente
+        asistencias = query.order_by(desc(Asistencia.fecha), Asistencia.empleado_id).limit(per_page + 1).all()
+        
+        next_cursor = None
+        if len(asistencias) > per_page:
+            asistencias = asistencias[:per_page]
+            ultima = asistencias[-1]
+            next_cursor = self._codificar_cursor(ultima.fecha, ultima.empleado_id)
+        
+        return asistencias, next_cursor, total
+    
+    def iter_asistencias_export(self, **filters):
+        """
+        Recorrer asistencias para exportación sin cargarlas todas en memoria.
+        Usa un cursor del lado del servidor (yield_per) y solo selecciona columnas, sin objetos ORM.
+        
+        Args:
+            **filters: Filtros (empleado_id, fecha_inicio, fecha_fin, estado, area, unidad_productiva)
+            
+        Yields:
+            dict: Fila de asistencia con los datos del empleado
+        """
+        query = db.session.query(
+            Asistencia.id,
+            Asistencia.fecha,
+            Asistencia.empleado_id,
+            Empleado.cedula,
+            Empleado.nombres,
+            Empleado.apellidos,
+            Empleado.area,
+            Empleado.unidad_productiva,
+            Asistencia.hora_entrada,
+            Asistencia.hora_salida,
+            Asistencia.horas_trabajadas,
+            Asistencia.horas_extras,
+            Asistencia.estado,
+            Asistencia.observaciones
+        ).join(Empleado, Empleado.id == Asistencia.empleado_id)
         
-        # Aplicar filtros
+        query = self._filtrar_asistencias(query, empleado_unido=True, **filters)
+        query = query.order_by(Asistencia.fecha, Asistencia.empleado_id).yield_per(self.EXPORT_YIELD_PER)
+        
+        for fila in query:
+            yield {
+                'id': fila.id,
+                'fecha': fila.fecha.strftime('%Y-%m-%d'),
+                'empleado_id': fila.empleado_id,
+                'cedula': fila.cedula,
+                'nombre_completo': f"{fila.nombres} {fila.apellidos}",
+                'area': fila.area,
+                'unidad_productiva': fila.unidad_productiva,
+                'hora_entrada': fila.hora_entrada.strftime('%H:%M:%S') if fila.hora_entrada else None,
+                'hora_salida': fila.hora_salida.strftime('%H:%M:%S') if fila.hora_salida else None,
+                'horas_trabajadas': fila.horas_trabajadas,
+                'horas_extras': fila.horas_extras,
+                'estado': fila.estado,
+                'observaciones': fila.observaciones
+            }
+    
+    def _filtrar_asistencias(self, query, empleado_unido=False, **filters):
+        """Aplica los filtros comunes de listado a una consulta de asistencias"""
         if 'empleado_id' in filters and filters['empleado_id']:
             query = query.filter(Asistencia.empleado_id == filters['empleado_id'])
         
@@ -134,18 +690,31 @@ class AsistenciaService:
         if 'estado' in filters and filters['estado']:
             query = query.filter(Asistencia.estado == filters['estado'])
         
+        # Unir con empleados una sola vez aunque se filtre por área y unidad productiva
+        if not empleado_unido and (filters.get('area') or filters.get('unidad_productiva')):
+            query = query.join(Empleado, Empleado.id == Asistencia.empleado_id)
+        
         if 'area' in filters and filters['area']:
-            query = query.join(Empleado).filter(Empleado.area == filters['area'])
+            query = query.filter(Empleado.area == filters['area'])
         
         if 'unidad_productiva' in filters and filters['unidad_productiva']:
-            query = query.join(Empleado).filter(Empleado.unidad_productiva == filters['unidad_productiva'])
+            query = query.filter(Empleado.unidad_productiva == filters['unidad_productiva'])
         
-        # Ejecutar consulta con paginación
-        pagination = query.order_by(desc(Asistencia.fecha), Asistencia.empleado_id).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return pagination.items, pagination.total
+        return query
+    
+    def _codificar_cursor(self, fecha, empleado_id):
+        """Codifica la clave (fecha, empleado_id) de la última fila como cursor opaco"""
+        valor = f"{fecha.strftime('%Y-%m-%d')}|{empleado_id}"
+        return base64.urlsafe_b64encode(valor.encode('utf-8')).decode('ascii')
+    
+    def _decodificar_cursor(self, cursor):
+        """Decodifica un cursor en la clave (fecha, empleado_id)"""
+        try:
+            valor = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            fecha, empleado_id = valor.split('|')
+            return datetime.strptime(fecha, '%Y-%m-%d').date(), int(empleado_id)
+        except (ValueError, UnicodeError):
+            raise ValueError('Cursor inválido')
     
     def aprobar_asistencia(self, asistencia_id, usuario_id, data):
         """
@@ -195,12 +764,251 @@ class AsistenciaService:
                 asistencia.observaciones = f"{obs_prefix}{validated_data['observaciones']}"
         
         try:
+            # Comprobar el cierre con el bloqueo del mes tomado: un cierre concurrente espera a esta
+            # transacción o ya es visible aquí, de modo que la aprobación no queda fuera de sus totales
+            self.cierre_service.bloquear_periodos(asistencia.fecha, asistencia.fecha)
+            db.session.flush()
+            if self.cierre_service.esta_cerrado(asistencia.fecha):
+                db.session.rollback()
+                return None, {'asistencia': ['El período de esta asistencia está cerrado']}
+            
+            # Mantener el resumen mensual en la misma transacción
+            if asistencia.estado == 'Aprobado':
+                self.resumen_service.acumular([asistencia])
+            self.cache_reportes.registrar_fechas([asistencia.fecha])
+            cambios_mes = self.cache_mes_actual.capturar([asistencia])
+            
             db.session.commit()
+            self.cache_mes_actual.publicar(cambios_mes)
             return asistencia, None
         except Exception as e:
             db.session.rollback()
             return None, {'database': [str(e)]}
     
+    def aprobar_asistencias_lote(self, usuario_id, data):
+        """
+        Aprobar o rechazar un lote de asistencias pendientes con un único UPDATE condicionado
+        
+        Args:
+            usuario_id (int): ID del usuario que aprueba
+            data (dict): Datos de aprobación (estado, observaciones) y selección
+                         (ids, o filtro por fecha, area, unidad_productiva)
+            
+        Returns:
+            tuple: (resultados, None) si el lote se procesa, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(asistencia_aprobacion_lote_schema, data)
+        if errors:
+            return None, errors
+        
+        # Verificar el usuario y sus permisos una sola vez para todo el lote
+        usuario = Usuario.query.get(usuario_id)
+        if not usuario:
+            return None, {'usuario': ['Usuario no encontrado']}
+        
+        if usuario.rol not in ['administrador', 'talento_humano']:
+            return None, {'permisos': ['No tiene permisos para realizar esta acción']}
+        
+        estado = validated_data['estado']
+        ids = validated_data.get('ids')
+        
+        # Solo se modifican filas que siguen pendientes y cuyo mes no está cerrado
+        condiciones = [Asistencia.estado == 'Pendiente', self.cierre_service.condicion_abierta(Asistencia.fecha)]
+        if ids:
+            condiciones.append(Asistencia.id.in_(ids))
+        if validated_data.get('fecha'):
+            condiciones.append(Asistencia.fecha == validated_data['fecha'])
+        if validated_data.get('area') or validated_data.get('unidad_productiva'):
+            empleados = select(Empleado.id)
+            if validated_data.get('area'):
+                empleados = empleados.where(Empleado.area == validated_data['area'])
+            if validated_data.get('unidad_productiva'):
+                empleados = empleados.where(Empleado.unidad_productiva == validated_data['unidad_productiva'])
+            condiciones.append(Asistencia.empleado_id.in_(empleados))
+        
+        valores = {
+            'estado': estado,
+            'usuario_aprobacion': usuario_id,
+            'fecha_aprobacion': datetime.utcnow()
+        }
+        
+        if validated_data.get('observaciones'):
+            obs_prefix = "[Aprobación] " if estado == 'Aprobado' else "[Rechazo] "
+            nueva_obs = f"{obs_prefix}{validated_data['observaciones']}"
+            valores['observaciones'] = case(
+                (or_(Asistencia.observaciones.is_(None), Asistencia.observaciones == ''), nueva_obs),
+                else_=Asistencia.observaciones + '; ' + nueva_obs
+            )
+        
+        stmt = update(Asistencia).where(*condiciones).values(**valores).returning(
+            Asistencia.id,
+            Asistencia.empleado_id,
+            Asistencia.fecha,
+            Asistencia.horas_trabajadas,
+            Asistencia.horas_extras
+        ).execution_options(synchronize_session=False)
+        
+        try:
+            # Bloquear los meses de las filas candidatas antes del UPDATE (que vuelve a comprobar el
+            # cierre); las filas de otros meses que aparezcan entretanto no se tocan
+            desde, hasta = db.session.execute(
+                select(func.min(Asistencia.fecha), func.max(Asistencia.fecha)).where(*condiciones)
+            ).one()
+            if desde is None:
+                procesadas = []
+            else:
+                self.cierre_service.bloquear_periodos(desde, hasta)
+                procesadas = db.session.execute(stmt.where(Asistencia.fecha.between(desde, hasta))).all()
+            
+            # Mantener el resumen mensual en la misma transacción
+            if estado == 'Aprobado':
+                self.resumen_service.acumular(procesadas)
+            self.cache_reportes.registrar_fechas(fila.fecha for fila in procesadas)
+            cambios_mes = self.cache_mes_actual.capturar(procesadas, estado)
+            
+            db.session.commit()
+            self.cache_mes_actual.publicar(cambios_mes)
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+        
+        mensaje = 'Asistencia aprobada correctamente' if estado == 'Aprobado' else 'Asistencia rechazada correctamente'
+        resultados = [{'id': fila.id, 'exito': True, 'mensaje': mensaje} for fila in procesadas]
+        
+        # Para los IDs solicitados que no se modificaron, indicar el motivo
+        if ids:
+            procesadas_ids = {fila.id for fila in procesadas}
+            pendientes = [i for i in dict.fromkeys(ids) if i not in procesadas_ids]
+            if pendientes:
+                existentes = {
+                    fila.id: fila.estado for fila in
+                    db.session.query(Asistencia.id, Asistencia.estado).filter(Asistencia.id.in_(pendientes)).all()
+                }
+                for asistencia_id in pendientes:
+                    if asistencia_id not in existentes:
+                        error = 'Asistencia no encontrada'
+                    elif existentes[asistencia_id] == 'Pendiente':
+                        error = 'El período de esta asistencia está cerrado'
+                    else:
+                        error = 'Esta asistencia ya fue procesada'
+                    resultados.append({'id': asistencia_id, 'exito': False, 'error': error})
+        
+        return resultados, None
+    
+    def get_cola_pendientes(self, limite=50, cursor=None, **filters):
+        """
+        Obtener la cola de asistencias pendientes de aprobación, ordenada por (fecha, empleado_id).
+        Usa el índice parcial sobre las filas pendientes y paginación por cursor.
+        
+        Args:
+            limite (int): Número máximo de asistencias a devolver
+            cursor (str, optional): Cursor devuelto por la página anterior
+            **filters: Filtros adicionales (fecha_inicio, fecha_fin, area, unidad_productiva)
+            
+        Returns:
+            tuple: (asistencias, next_cursor, conteo_por_area)
+            
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        query = self._filtrar_pendientes(Asistencia.query, **filters)
+        
+        if cursor:
+            fecha, empleado_id = self._decodificar_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Asistencia.fecha > fecha,
+                    and_(Asistencia.fecha == fecha, Asistencia.empleado_id > empleado_id)
+                )
+            )
+        
+        asistencias = query.order_by(Asistencia.fecha, Asistencia.empleado_id).limit(limite + 1).all()
+        
+        next_cursor = None
+        if len(asistencias) > limite:
+            asistencias = asistencias[:limite]
+            ultima = asistencias[-1]
+            next_cursor = self._codificar_cursor(ultima.fecha, ultima.empleado_id)
+        
+        # Conteo de pendientes por área con los mismos filtros
+        conteo = self._filtrar_pendientes(
+            db.session.query(Empleado.area, func.count(Asistencia.id))
+            .select_from(Asistencia)
+            .join(Empleado, Empleado.id == Asistencia.empleado_id),
+            empleado_unido=True,
+            **filters
+        ).group_by(Empleado.area).all()
+        
+        conteo_por_area = {area: total for area, total in conteo}
+        
+        return asistencias, next_cursor, conteo_por_area
+    
+    def reclamar_pendientes(self, usuario_id, cantidad=20, **filters):
+        """
+        Reclamar un lote de asistencias pendientes para revisión.
+        Usa SELECT ... FOR UPDATE SKIP LOCKED para que varios aprobadores obtengan lotes
+        disjuntos sin bloquearse entre sí; el reclamo vence tras RECLAMO_DURACION.
+        
+        Args:
+            usuario_id (int): ID del usuario que reclama
+            cantidad (int): Número máximo de asistencias a reclamar
+            **filters: Filtros adicionales (fecha_inicio, fecha_fin, area, unidad_productiva)
+            
+        Returns:
+            tuple: (asistencias, None) si el reclamo es exitoso, (None, error) si hay error
+        """
+        ahora = datetime.utcnow()
+        
+        query = self._filtrar_pendientes(Asistencia.query, **filters).filter(
+            or_(
+                Asistencia.reclamado_hasta.is_(None),
+                Asistencia.reclamado_hasta < ahora,
+                Asistencia.reclamado_por == usuario_id
+            )
+        )
+        
+        try:
+            asistencias = query.order_by(Asistencia.fecha, Asistencia.empleado_id).limit(cantidad).with_for_update(
+                skip_locked=True, of=Asistencia
+            ).all()
+            
+            for asistencia in asistencias:
+                asistencia.reclamado_por = usuario_id
+                asistencia.reclamado_hasta = ahora + self.RECLAMO_DURACION
+            
+            db.session.commit()
+            return asistencias, None
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+    
+    def _filtrar_pendientes(self, query, empleado_unido=False, **filters):
+        """Restringe una consulta a asistencias pendientes de meses abiertos con los filtros de la cola"""
+        query = query.filter(Asistencia.estado == 'Pendiente', self.cierre_service.condicion_abierta(Asistencia.fecha))
+        
+        if filters.get('fecha_inicio'):
+            query = query.filter(Asistencia.fecha >= filters['fecha_inicio'])
+        
+        if filters.get('fecha_fin'):
+            query = query.filter(Asistencia.fecha <= filters['fecha_fin'])
+        
+        # Filtrar empleados por subconsulta para que FOR UPDATE solo bloquee asistencias
+        if not empleado_unido and (filters.get('area') or filters.get('unidad_productiva')):
+            empleados = select(Empleado.id)
+            if filters.get('area'):
+                empleados = empleados.where(Empleado.area == filters['area'])
+            if filters.get('unidad_productiva'):
+                empleados = empleados.where(Empleado.unidad_productiva == filters['unidad_productiva'])
+            query = query.filter(Asistencia.empleado_id.in_(empleados))
+        elif empleado_unido:
+            if filters.get('area'):
+                query = query.filter(Empleado.area == filters['area'])
+            if filters.get('unidad_productiva'):
+                query = query.filter(Empleado.unidad_productiva == filters['unidad_productiva'])
+        
+        return query
+    
     def calcular_horas_empleado(self, empleado_id, fecha_inicio, fecha_fin):
         """
         Calcular horas trabajadas y extras de un empleado en un período
@@ -218,34 +1026,96 @@ class AsistenciaService:
         if not empleado:
             return None
         
-        # Obtener asistencias aprobadas en el período
-        asistencias = Asistencia.query.filter(
-            Asistencia.empleado_id == empleado_id,
-            Asistencia.fecha.between(fecha_inicio, fecha_fin),
-            Asistencia.estado == 'Aprobado'
-        ).all()
-        
-        # Calcular totales
-        total_trabajadas = sum(a.horas_trabajadas for a in asistencias if a.horas_trabajadas is not None)
-        total_extras = sum(a.horas_extras for a in asistencias if a.horas_extras is not None)
-        dias_asistidos = len(asistencias)
-        
-        # Calcular días laborables en el período (lunes a sábado)
-        dias_periodo = 0
-        current_date = fecha_inicio
-        while current_date <= fecha_fin:
-            # 0 = lunes, 6 = domingo
-            if current_date.weekday() != 6:  # No contar domingos
-                dias_periodo += 1
-            current_date += timedelta(days=1)
-        
-        dias_faltantes = dias_periodo - dias_asistidos
+        # Período del mes en curso: agregar en memoria desde la caché columnar
+        if self.cache_mes_actual.cubre(fecha_inicio, fecha_fin):
+            totales = self.cache_mes_actual.totales(fecha_inicio, fecha_fin, [empleado_id]).get(empleado_id, (0, 0, 0))
+            dias_periodo = self.calendario_service.dias_laborables(fecha_inicio, fecha_fin)
+            return self._resumen_horas(*totales, dias_periodo)
+        
+        # Meses cerrados desde sus totales congelados, meses completos desde el resumen mensual
+        # y solo los extremos desde asistencias (y del archivo, si esos meses están archivados)
+        totales = self.resumen_service.totales_por_empleado(fecha_inicio, fecha_fin, empleado_ids=[empleado_id])
+        fila = db.session.query(
+            totales.c.total_trabajadas,
+            totales.c.total_extras,
+            totales.c.dias_asistidos
+        ).filter(
+            totales.c.empleado_id == empleado_id
+        ).first()
+        total_trabajadas, total_extras, dias_asistidos = fila if fila else (0, 0, 0)
+        
+        # Calcular días laborables en el período (lunes a sábado, sin feriados)
+        dias_periodo = self.calendario_service.dias_laborables(fecha_inicio, fecha_fin)
+        
+        return self._resumen_horas(total_trabajadas, total_extras, dias_asistidos, dias_periodo)
+    
+    def calcular_horas_empleados(self, data):
+        """
+        Calcular horas trabajadas y extras de varios empleados en un período con una sola consulta agregada
+        
+        Args:
+            data (dict): Período (fecha_inicio, fecha_fin) y selección (empleado_ids, o filtro por area, unidad_productiva)
+            
+        Returns:
+            tuple: (resultado, None) con {periodo, empleados, no_encontrados}, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(horas_empleados_schema, data)
+        if errors:
+            return None, errors
+        
+        fecha_inicio = validated_data['fecha_inicio']
+        fecha_fin = validated_data['fecha_fin']
+        empleado_ids = validated_data.get('empleado_ids')
+        
+        # Meses completos desde el resumen mensual, extremos desde asistencias
+        totales = self.resumen_service.totales_por_empleado(fecha_inicio, fecha_fin, empleado_ids=empleado_ids or None)
+        query = db.session.query(
+            Empleado.id,
+            totales.c.total_trabajadas,
+            totales.c.total_extras,
+            totales.c.dias_asistidos
+        ).outerjoin(
+            totales,
+            totales.c.empleado_id == Empleado.id
+        )
+        
+        # La misma consulta comprueba la existencia de los empleados solicitados
+        if empleado_ids:
+            query = query.filter(Empleado.id.in_(empleado_ids))
+        else:
+            query = self._filtrar_reporte(query, validated_data.get('area'), validated_data.get('unidad_productiva'))
+        
+        filas = query.order_by(Empleado.id).all()
+        
+        # Días laborables del período, una sola vez para todos los empleados
+        dias_periodo = self.calendario_service.dias_laborables(fecha_inicio, fecha_fin)
+        
+        encontrados = {fila.id for fila in filas}
+        no_encontrados = [i for i in dict.fromkeys(empleado_ids) if i not in encontrados] if empleado_ids else []
         
         return {
-            'total_trabajadas': round(total_trabajadas, 2),
-            'total_extras': round(total_extras, 2),
+            'periodo': {
+                'fecha_inicio': fecha_inicio.strftime('%Y-%m-%d'),
+                'fecha_fin': fecha_fin.strftime('%Y-%m-%d'),
+                'dias_laborables': dias_periodo
+            },
+            'empleados': [
+                dict(empleado_id=fila.id, **self._resumen_horas(
+                    fila.total_trabajadas, fila.total_extras, fila.dias_asistidos, dias_periodo))
+                for fila in filas
+            ],
+            'no_encontrados': no_encontrados
+        }, None
+    
+    def _resumen_horas(self, total_trabajadas, total_extras, dias_asistidos, dias_periodo):
+        """Formatea el resumen de horas de un empleado"""
+        dias_asistidos = int(dias_asistidos or 0)
+        return {
+            'total_trabajadas': round(float(total_trabajadas or 0), 2),
+            'total_extras': round(float(total_extras or 0), 2),
             'dias_asistidos': dias_asistidos,
-            'dias_faltantes': dias_faltantes,
+            'dias_faltantes': dias_periodo - dias_asistidos,
             'dias_periodo': dias_periodo
         }
     
@@ -260,57 +1130,57 @@ class AsistenciaService:
             unidad_productiva (str, optional): Filtrar por unidad productiva
             
         Returns:
-            dict: Reporte de asistencias
+            dict: Reporte de asistencias (compartido con la caché: no debe modificarse)
         """
-        # Construir query base
-        query = db.session.query(
-            Empleado.id,
-            Empleado.cedula,
-            Empleado.nombres,
-            Empleado.apellidos,
-            Empleado.area,
-            Empleado.unidad_productiva,
-            func.sum(Asistencia.horas_trabajadas).label('total_trabajadas'),
-            func.sum(Asistencia.horas_extras).label('total_extras'),
-            func.count(Asistencia.id).label('dias_asistidos')
-        ).join(
-            Asistencia, 
-            and_(
-                Empleado.id == Asistencia.empleado_id,
-                Asistencia.fecha.between(fecha_inicio, fecha_fin),
-                Asistencia.estado == 'Aprobado'
-            ),
-            isouter=True
-        ).group_by(
-            Empleado.id,
-            Empleado.cedula,
-            Empleado.nombres,
-            Empleado.apellidos,
-            Empleado.area,
-            Empleado.unidad_productiva
-        )
-        
-        # Aplicar filtros
-        if area:
-            query = query.filter(Empleado.area == area)
+        reporte = self.cache_reportes.obtener(fecha_inicio, fecha_fin, area, unidad_productiva)
+        if reporte is not None:
+            return reporte
+        version_cache = self.cache_reportes.version()
         
-        if unidad_productiva:
-            query = query.filter(Empleado.unidad_productiva == unidad_productiva)
-        
-        # Filtrar solo empleados activos
-        query = query.filter(Empleado.estado == True)
-        
-        # Ejecutar consulta
-        results = query.all()
+        if self.cache_mes_actual.cubre(fecha_inicio, fecha_fin):
+            # Período del mes en curso: la base de datos solo aporta los empleados,
+            # los totales se agregan en memoria desde la caché columnar
+            query = self._filtrar_reporte(db.session.query(
+                Empleado.id,
+                Empleado.cedula,
+                Empleado.nombres,
+                Empleado.apellidos,
+                Empleado.area,
+                Empleado.unidad_productiva
+            ), area, unidad_productiva)
+            totales_mes = self.cache_mes_actual.totales(fecha_inicio, fecha_fin)
+            results = [
+                FilaReporte(*empleado, *totales_mes.get(empleado.id, (None, None, None)))
+                for empleado in query.all()
+            ]
+        else:
+            # Totales por empleado: meses completos desde el resumen mensual, extremos desde asistencias
+            totales = self.resumen_service.totales_por_empleado(fecha_inicio, fecha_fin)
+            
+            # Construir query base
+            query = db.session.query(
+                Empleado.id,
+                Empleado.cedula,
+                Empleado.nombres,
+                Empleado.apellidos,
+                Empleado.area,
+                Empleado.unidad_productiva,
+                totales.c.total_trabajadas,
+                totales.c.total_extras,
+                totales.c.dias_asistidos
+            ).outerjoin(
+                totales,
+                totales.c.empleado_id == Empleado.id
+            )
+            
+            # Aplicar filtros (solo empleados activos)
+            query = self._filtrar_reporte(query, area, unidad_productiva)
+            
+            # Ejecutar consulta
+            results = query.all()
         
-        # Calcular días laborables en el período (lunes a sábado)
-        dias_periodo = 0
-        current_date = fecha_inicio
-        while current_date <= fecha_fin:
-            # 0 = lunes, 6 = domingo
-            if current_date.weekday() != 6:  # No contar domingos
-                dias_periodo += 1
-            current_date += timedelta(days=1)
+        # Calcular días laborables en el período (lunes a sábado, sin feriados)
+        dias_periodo = self.calendario_service.dias_laborables(fecha_inicio, fecha_fin)
         
         # Formatear resultados
         reporte = {
@@ -329,23 +1199,177 @@ class AsistenciaService:
                 'total_horas_extras': round(sum(r.total_extras or 0 for r in results), 2),
                 'promedio_asistencia': round(sum(r.dias_asistidos or 0 for r in results) / len(results) if results else 0, 2)
             },
-            'empleados': [
-                {
-                    'id': r.id,
-                    'cedula': r.cedula,
-                    'nombres': r.nombres,
-                    'apellidos': r.apellidos,
-                    'nombre_completo': f"{r.nombres} {r.apellidos}",
-                    'area': r.area,
-                    'unidad_productiva': r.unidad_productiva,
-                    'horas_trabajadas': round(r.total_trabajadas or 0, 2),
-                    'horas_extras': round(r.total_extras or 0, 2),
-                    'dias_asistidos': r.dias_asistidos or 0,
-                    'dias_faltantes': dias_periodo - (r.dias_asistidos or 0),
-                    'porcentaje_asistencia': round(((r.dias_asistidos or 0) / dias_periodo) * 100, 2) if dias_periodo > 0 else 0
-                }
-                for r in results
-            ]
+            'empleados': [self._fila_empleado_reporte(r, dias_periodo) for r in results]
         }
         
-        return reporte
\ No newline at end of file
+        self.cache_reportes.guardar(fecha_inicio, fecha_fin, area, unidad_productiva, reporte, version_cache)
+        return reporte
+    
+    def generar_reporte_consolidado(self, fecha_inicio, fecha_fin, area=None, unidad_productiva=None):
+        """
+        Generar reporte de asistencias con subtotales por unidad productiva y área.
+        En PostgreSQL todos los niveles se calculan en una sola consulta con GROUP BY ROLLUP;
+        en otros motores se agregan en una sola pasada sobre las filas por empleado.
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período
+            area (str, optional): Filtrar por área
+            unidad_productiva (str, optional): Filtrar por unidad productiva
+            
+        Returns:
+            dict: Reporte con resumen global y secciones anidadas unidades → areas → empleados
+        """
+        totales = self.resumen_service.totales_por_empleado(fecha_inicio, fecha_fin)
+        dias_periodo = self.calendario_service.dias_laborables(fecha_inicio, fecha_fin)
+        
+        resumen = self._nodo_consolidado()
+        unidades = {}
+        
+        def seccion_unidad(unidad):
+            return unidades.setdefault(unidad, {'unidad_productiva': unidad, 'resumen': self._nodo_consolidado(), 'areas': {}})
+        
+        def seccion_area(unidad, area_empleado):
+            areas = seccion_unidad(unidad)['areas']
+            return areas.setdefault(area_empleado, {'area': area_empleado, 'resumen': self._nodo_consolidado(), 'empleados': []})
+        
+        if dialecto_actual() == 'postgresql':
+            columnas_empleado = (Empleado.id, Empleado.cedula, Empleado.nombres, Empleado.apellidos)
+            query = db.session.query(
+                Empleado.unidad_productiva,
+                Empleado.area,
+                *columnas_empleado,
+                func.grouping(Empleado.unidad_productiva).label('g_unidad'),
+                func.grouping(Empleado.area).label('g_area'),
+                func.grouping(Empleado.id).label('g_empleado'),
+                func.sum(totales.c.total_trabajadas).label('total_trabajadas'),
+                func.sum(totales.c.total_extras).label('total_extras'),
+                func.sum(totales.c.dias_asistidos).label('dias_asistidos'),
+                func.count(Empleado.id).label('empleados')
+            ).outerjoin(
+                totales,
+                totales.c.empleado_id == Empleado.id
+            )
+            query = self._filtrar_reporte(query, area, unidad_productiva)
+            
+            # Niveles: empleado, área dentro de unidad, unidad y total general
+            filas = query.group_by(
+                func.rollup(Empleado.unidad_productiva, Empleado.area, tuple_(*columnas_empleado))
+            ).all()
+            
+            for r in filas:
+                if r.g_unidad:
+                    nodo = resumen
+                elif r.g_area:
+                    nodo = seccion_unidad(r.unidad_productiva)['resumen']
+                elif r.g_empleado:
+                    nodo = seccion_area(r.unidad_productiva, r.area)['resumen']
+                else:
+                    seccion_area(r.unidad_productiva, r.area)['empleados'].append(
+                        self._fila_empleado_reporte(r, dias_periodo))
+                    continue
+                self._acumular_nodo(nodo, r.empleados, r.total_trabajadas, r.total_extras, r.dias_asistidos)
+        else:
+            query = db.session.query(
+                Empleado.id,
+                Empleado.cedula,
+                Empleado.nombres,
+                Empleado.apellidos,
+                Empleado.area,
+                Empleado.unidad_productiva,
+                totales.c.total_trabajadas,
+                totales.c.total_extras,
+                totales.c.dias_asistidos
+            ).outerjoin(
+                totales,
+                totales.c.empleado_id == Empleado.id
+            )
+            query = self._filtrar_reporte(query, area, unidad_productiva)
+            
+            for r in query.all():
+                seccion = seccion_area(r.unidad_productiva, r.area)
+                seccion['empleados'].append(self._fila_empleado_reporte(r, dias_periodo))
+                for nodo in (seccion['resumen'], unidades[r.unidad_productiva]['resumen'], resumen):
+                    self._acumular_nodo(nodo, 1, r.total_trabajadas, r.total_extras, r.dias_asistidos)
+        
+        # Ordenar secciones y redondear totales
+        orden = lambda valor: (valor is None, valor or '')
+        secciones = []
+        for unidad in sorted(unidades, key=orden):
+            seccion = unidades[unidad]
+            areas = []
+            for area_empleado in sorted(seccion['areas'], key=orden):
+                seccion_area_empleado = seccion['areas'][area_empleado]
+                seccion_area_empleado['resumen'] = self._cerrar_nodo(seccion_area_empleado['resumen'], dias_periodo)
+                seccion_area_empleado['empleados'].sort(key=lambda e: (e['apellidos'], e['nombres']))
+                areas.append(seccion_area_empleado)
+            seccion['resumen'] = self._cerrar_nodo(seccion['resumen'], dias_periodo)
+            seccion['areas'] = areas
+            secciones.append(seccion)
+        
+        return {
+            'periodo': {
+                'fecha_inicio': fecha_inicio.strftime('%Y-%m-%d'),
+                'fecha_fin': fecha_fin.strftime('%Y-%m-%d'),
+                'dias_laborables': dias_periodo
+            },
+            'filtros': {
+                'area': area,
+                'unidad_productiva': unidad_productiva
+            },
+            'resumen': self._cerrar_nodo(resumen, dias_periodo),
+            'unidades': secciones
+        }
+    
+    def _filtrar_reporte(self, query, area=None, unidad_productiva=None):
+        """Aplica los filtros de los reportes (área, unidad productiva y solo empleados activos)"""
+        if area:
+            query = query.filter(Empleado.area == area)
+        
+        if unidad_productiva:
+            query = query.filter(Empleado.unidad_productiva == unidad_productiva)
+        
+        return query.filter(Empleado.estado == True)
+    
+    def _fila_empleado_reporte(self, r, dias_periodo):
+        """Formatea los totales de un empleado para los reportes"""
+        # SUM sobre enteros devuelve NUMERIC (Decimal) en PostgreSQL
+        dias_asistidos = int(r.dias_asistidos or 0)
+        return {
+            'id': r.id,
+            'cedula': r.cedula,
+            'nombres': r.nombres,
+            'apellidos': r.apellidos,
+            'nombre_completo': f"{r.nombres} {r.apellidos}",
+            'area': r.area,
+            'unidad_productiva': r.unidad_productiva,
+            'horas_trabajadas': round(float(r.total_trabajadas or 0), 2),
+            'horas_extras': round(float(r.total_extras or 0), 2),
+            'dias_asistidos': dias_asistidos,
+            'dias_faltantes': dias_periodo - dias_asistidos,
+            'porcentaje_asistencia': round((dias_asistidos / dias_periodo) * 100, 2) if dias_periodo > 0 else 0
+        }
+    
+    def _nodo_consolidado(self):
+        """Totales vacíos de un nivel del reporte consolidado"""
+        return {'total_empleados': 0, 'total_horas_trabajadas': 0, 'total_horas_extras': 0, 'dias_asistidos': 0}
+    
+    def _acumular_nodo(self, nodo, empleados, trabajadas, extras, dias):
+        """Suma totales a un nivel del reporte consolidado"""
+        nodo['total_empleados'] += int(empleados or 0)
+        nodo['total_horas_trabajadas'] += float(trabajadas or 0)
+        nodo['total_horas_extras'] += float(extras or 0)
+        nodo['dias_asistidos'] += int(dias or 0)
+    
+    def _cerrar_nodo(self, nodo, dias_periodo):
+        """Redondea los totales de un nivel y agrega sus promedios"""
+        empleados = nodo['total_empleados']
+        dias = nodo['dias_asistidos']
+        return {
+            'total_empleados': empleados,
+            'total_horas_trabajadas': round(nodo['total_horas_trabajadas'], 2),
+            'total_horas_extras': round(nodo['total_horas_extras'], 2),
+            'dias_asistidos': dias,
+            'promedio_asistencia': round(dias / empleados, 2) if empleados else 0,
+            'porcentaje_asistencia': round(dias / (dias_periodo * empleados) * 100, 2) if dias_periodo > 0 and empleados else 0
+        }
\ No newline at end of file
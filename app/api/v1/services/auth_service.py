@@ -3,10 +3,18 @@ from flask_jwt_extended import create_access_token
 from app import db
 from app.api.v1.models.usuario import Usuario
 from app.api.v1.schemas import validate_data, usuario_schema, usuario_login_schema
+from app.utils.busqueda import IndiceBusqueda, aplicar_busqueda
 
 class AuthService:
     """Servicio para gestionar la autenticación y usuarios"""
     
+    # Columnas en las que busca el filtro busqueda
+    COLUMNAS_BUSQUEDA = (Usuario.nombre_usuario, Usuario.nombre_completo, Usuario.email)
+    
+    def __init__(self):
+        # Índice de trigramas en memoria para motores sin pg_trgm
+        self._indice_busqueda = IndiceBusqueda(Usuario, self.COLUMNAS_BUSQUEDA)
+    
     def register(self, user_data):
         """
         Registra un nuevo usuario en el sistema
@@ -100,6 +108,7 @@ class AuthService:
             tuple: (pagination_obj, total)
         """
         query = Usuario.query
+        relevancia = None
         
         # Aplicar filtros
         if 'rol' in filters and filters['rol']:
@@ -112,15 +121,16 @@ class AuthService:
                 query = query.filter(Usuario.estado == False)
         
         if 'busqueda' in filters and filters['busqueda']:
-            search_term = f"%{filters['busqueda']}%"
-            query = query.filter(
-                (Usuario.nombre_usuario.ilike(search_term)) |
-                (Usuario.nombre_completo.ilike(search_term)) |
-                (Usuario.email.ilike(search_term))
+            # Sin distinguir tildes ni mayúsculas, tolerando errores de escritura
+            query, relevancia = aplicar_busqueda(
+                query, filters['busqueda'], self.COLUMNAS_BUSQUEDA, self._indice_busqueda
             )
+        
+        # Con búsqueda, los más relevantes primero
+        orden = [relevancia.desc()] if relevancia is not None else []
             
         # Ejecutar consulta con paginación
-        pagination = query.order_by(Usuario.nombre_usuario).paginate(
+        pagination = query.order_by(*orden, Usuario.nombre_usuario).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -0,0 +1,158 @@
+import heapq
+import os
+import threading
+import time as reloj
+from bisect import bisect_left
+from flask import current_app
+from app import db
+from app.api.v1.models.empleado import Empleado
+from app.utils.busqueda import normalizar
+
+class AutocompletadoEmpleados:
+    """
+    Índice de prefijos en memoria (por proceso) de los empleados activos para autocompletar.
+    Cada empleado aporta su cédula y cada palabra de su nombre completo (normalizadas, sin tildes)
+    a un arreglo ordenado de claves; un prefijo se resuelve con dos búsquedas binarias, sin
+    consultar la base de datos. Los empleados se numeran en orden de apellidos y nombres, de modo
+    que las sugerencias salen ordenadas tomando las posiciones menores.
+    
+    Se construye al primer uso. Los cambios de empleados de cualquier proceso llegan por el
+    registro de invalidaciones (CacheReportes.vigilar) y el índice se renueva además cada
+    CACHE_TTL. La renovación corre en un único hilo en segundo plano mientras las consultas
+    siguen usando el índice anterior; solo la primera construcción (sin índice previo) se hace
+    en la petición, y las peticiones concurrentes esperan a esa única construcción.
+    """
+    
+    # Segundos tras los cuales se renueva el índice aunque no haya invalidaciones
+    CACHE_TTL = 300
+    
+    # Máximo de sugerencias por consulta
+    LIMITE_MAXIMO = 50
+    
+    def __init__(self, cache_reportes):
+        self.cache_reportes = cache_reportes
+        self._lock = threading.Lock()
+        self._lock_construccion = threading.Lock()  # Una sola construcción a la vez por proceso
+        self._pid = None
+        self._cargado_en = 0
+        self._indice = None  # (claves, posiciones, empleados)
+        self._vigente = False
+        self._generacion = 0  # Cambia con cada invalidación; una construcción anterior queda vencida
+        
+        # Cualquier cambio en la tabla, de este u otro proceso, invalida el índice
+        self.cache_reportes.vigilar(Empleado, self.invalidar)
+    
+    def invalidar(self):
+        """Marca el índice como vencido; se sigue usando hasta que termine su renovación"""
+        with self._lock:
+            self._vigente = False
+            self._generacion += 1
+    
+    def sugerir(self, texto, limite=10):
+        """
+        Sugiere empleados activos cuya cédula o alguna palabra del nombre empieza por el texto.
+        Con varias palabras, cada una debe ser prefijo de la cédula o de alguna palabra del nombre.
+        
+        Args:
+            texto (str): Texto escrito por el usuario
+            limite (int): Máximo de sugerencias
+        
+        Returns:
+            list: Empleados (id, cedula, nombre_completo, area, unidad_productiva) ordenados
+                  por apellidos y nombres (compartidos con el índice: no deben modificarse)
+        """
+        terminos = normalizar(texto).split()
+        if not terminos:
+            return []
+        
+        claves, posiciones, empleados = self._obtener()
+        
+        # Rango de claves de cada término; se intersecan empezando por el más selectivo
+        rangos = sorted(
+            ((bisect_left(claves, t), bisect_left(claves, t + '\uffff')) for t in dict.fromkeys(terminos)),
+            key=lambda rango: rango[1] - rango[0]
+        )
+        inicio, fin = rangos[0]
+        candidatos = set(posiciones[inicio:fin])
+        for inicio, fin in rangos[1:]:
+            if not candidatos:
+                break
+            candidatos.intersection_update(posiciones[inicio:fin])
+        
+        return [empleados[p] for p in heapq.nsmallest(min(limite, self.LIMITE_MAXIMO), candidatos)]
+    
+    def _obtener(self):
+        """
+        Obtiene el índice. Si venció, lanza su renovación en segundo plano y devuelve el anterior;
+        si no existe (o es de otro proceso), lo construye en esta petición una sola vez.
+        """
+        self.cache_reportes.sincronizar()
+        
+        with self._lock:
+            indice = self._indice if self._pid == os.getpid() else None
+            vencido = not self._vigente or reloj.monotonic() - self._cargado_en >= self.CACHE_TTL
+        
+        if indice is not None:
+            if vencido and self._lock_construccion.acquire(blocking=False):
+                app = current_app._get_current_object()
+                threading.Thread(
+                    target=self._renovar, args=(app,), name='autocompletado-empleados', daemon=True
+                ).start()
+            return indice
+        
+        with self._lock_construccion:
+            # Otra petición pudo haberlo construido mientras se esperaba
+            with self._lock:
+                if self._indice is not None and self._pid == os.getpid():
+                    return self._indice
+            return self._construir()
+    
+    def _renovar(self, app):
+        """Renueva el índice en un hilo propio; libera el candado de construcción al terminar"""
+        try:
+            with app.app_context():
+                self._construir()
+        except Exception:
+            app.logger.exception("No se pudo renovar el índice de autocompletado de empleados")
+        finally:
+            self._lock_construccion.release()
+    
+    def _construir(self):
+        """Construye el índice de los empleados activos y lo publica"""
+        with self._lock:
+            generacion = self._generacion
+        
+        filas = db.session.query(
+            Empleado.id,
+            Empleado.cedula,
+            Empleado.nombres,
+            Empleado.apellidos,
+            Empleado.area,
+            Empleado.unidad_productiva
+        ).filter(
+            Empleado.estado == True
+        ).order_by(Empleado.apellidos, Empleado.nombres, Empleado.id).all()
+        
+        empleados = []
+        entradas = []
+        for posicion, fila in enumerate(filas):
+            empleados.append({
+                'id': fila.id,
+                'cedula': fila.cedula,
+                'nombre_completo': f"{fila.nombres} {fila.apellidos}",
+                'area': fila.area,
+                'unidad_productiva': fila.unidad_productiva
+            })
+            claves_empleado = {normalizar(fila.cedula), *normalizar(f"{fila.nombres} {fila.apellidos}").split()}
+            entradas.extend((clave, posicion) for clave in claves_empleado)
+        
+        entradas.sort()
+        indice = ([clave for clave, _ in entradas], [posicion for _, posicion in entradas], empleados)
+        
+        with self._lock:
+            self._indice = indice
+            self._pid = os.getpid()
+            self._cargado_en = reloj.monotonic()
+            # Si hubo una invalidación durante la construcción, la próxima consulta la renueva
+            self._vigente = self._generacion == generacion
+        return indice
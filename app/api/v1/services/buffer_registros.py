@@ -0,0 +1,266 @@
+import atexit
+import os
+import queue
+import threading
+import time as reloj
+from collections import Counter
+from datetime import datetime
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.marcacion import Marcacion
+
+class BufferRegistros:
+    """
+    Buffer en memoria (por proceso) para el registro diferido de marcaciones.
+    Las marcaciones validadas se encolan y un hilo las confirma por lotes cada
+    `intervalo_ms` milisegundos o al acumular `tamano_lote` elementos.
+    
+    El cliente ya recibió 202 cuando se confirma el lote, así que una marcación aceptada no se
+    descarta: si el lote falla se reintenta, luego se aplica marcación por marcación y las que aún
+    fallan se guardan en el log de marcaciones para que las aplique el proyector.
+    
+    Antes de encolar se rechaza lo que el volcado rechazaría con seguridad (validar_registro_diferido):
+    una salida solo se acepta si su entrada ya está registrada o encolada en este worker, que lleva la
+    cuenta de sus entradas sin confirmar. Al volcar se aplican los mismos bloqueos de días procesados,
+    cerrados y archivados que en los kioscos; lo que se rechace entonces (p. ej. un día aprobado entre
+    la recepción y el volcado) solo queda en el log de la aplicación.
+    
+    Cada worker tiene su propio buffer: una salida puede llegar a otro worker (o al registro síncrono
+    que se usa con el buffer lleno) antes de que se confirme su entrada. En el buffer, una salida sin
+    entrada se reintenta durante REINTENTOS_SALIDA volcados; en el registro síncrono se rechaza.
+    """
+    
+    # Intentos de confirmar un lote completo antes de aplicarlo marcación por marcación
+    REINTENTOS_LOTE = 3
+    
+    # Volcados en los que se reintenta una salida cuya entrada aún no está registrada
+    REINTENTOS_SALIDA = 10
+    
+    def __init__(self, asistencia_service):
+        self.asistencia_service = asistencia_service
+        self._lock = threading.Lock()
+        self._pid = None
+        self._app = None
+        self._cola = None
+        self._hilo = None
+        self._detener = None
+        self._capacidad = 5000
+        self._intervalo = 0.2
+        self._tamano_lote = 500
+        self._atexit_registrado = False
+        self._entradas_en_espera = Counter()  # (empleado_id, fecha) de entradas encoladas sin confirmar
+    
+    def encolar(self, app, registro):
+        """
+        Encola una marcación validada sin bloquear
+        
+        Args:
+            app (Flask): Aplicación, para abrir contexto en el hilo de volcado
+            registro (dict): Marcación (empleado_id, tipo_registro, fecha, hora, observaciones)
+            
+        Returns:
+            bool: True si se encoló, False si el buffer está lleno
+        """
+        self._asegurar_iniciado(app)
+        self._contar_entrada(registro, 1)
+        try:
+            self._cola.put_nowait(registro)
+            return True
+        except queue.Full:
+            self._contar_entrada(registro, -1)
+            return False
+    
+    def entrada_en_espera(self, empleado_id, fecha):
+        """
+        Indica si hay una entrada del empleado para la fecha encolada en este worker y aún sin confirmar
+        
+        Args:
+            empleado_id (int): ID del empleado
+            fecha (date): Fecha de la marcación
+        
+        Returns:
+            bool: True si la entrada está en espera
+        """
+        if self._pid != os.getpid():
+            return False
+        with self._lock:
+            return self._entradas_en_espera[(empleado_id, fecha)] > 0
+    
+    def _contar_entrada(self, registro, cambio):
+        """Actualiza la cuenta de entradas sin confirmar con una marcación encolada o ya volcada"""
+        if registro['tipo_registro'] != 'entrada':
+            return
+        clave = (registro['empleado_id'], registro['fecha'])
+        with self._lock:
+            self._entradas_en_espera[clave] += cambio
+            if self._entradas_en_espera[clave] <= 0:
+                del self._entradas_en_espera[clave]
+    
+    def pendientes(self):
+        """Número de marcaciones en espera de ser confirmadas"""
+        return self._cola.qsize() if self._cola else 0
+    
+    def drenar(self, timeout=10):
+        """
+        Detiene el hilo de volcado tras confirmar todas las marcaciones en espera.
+        Se invoca al terminar el worker (atexit y hook worker_exit de gunicorn).
+        
+        Args:
+            timeout (float): Segundos máximos de espera
+        """
+        with self._lock:
+            if not self._hilo or self._pid != os.getpid():
+                return
+            hilo = self._hilo
+            self._detener.set()
+        
+        hilo.join(timeout)
+        
+        # Si el hilo terminó por timeout o error, volcar lo que quede desde este hilo
+        if self._cola is not None and not self._cola.empty():
+            self._volcar(self._extraer_lote(sin_limite=True))
+        
+        with self._lock:
+            self._hilo = None
+    
+    def _asegurar_iniciado(self, app):
+        """Inicia la cola y el hilo de volcado en este proceso (también tras un fork de gunicorn)"""
+        if self._hilo is not None and self._pid == os.getpid():
+            return
+        
+        with self._lock:
+            if self._hilo is not None and self._pid == os.getpid():
+                return
+            
+            self._app = app
+            self._capacidad = app.config.get('BUFFER_REGISTROS_CAPACIDAD', self._capacidad)
+            self._intervalo = app.config.get('BUFFER_REGISTROS_INTERVALO_MS', self._intervalo * 1000) / 1000
+            self._tamano_lote = app.config.get('BUFFER_REGISTROS_LOTE', self._tamano_lote)
+            
+            self._pid = os.getpid()
+            self._cola = queue.Queue(maxsize=self._capacidad)
+            self._entradas_en_espera = Counter()
+            self._detener = threading.Event()
+            self._hilo = threading.Thread(target=self._ciclo, name='buffer-registros', daemon=True)
+            self._hilo.start()
+            
+            if not self._atexit_registrado:
+                atexit.register(self.drenar)
+                self._atexit_registrado = True
+    
+    def _ciclo(self):
+        """Bucle del hilo de volcado"""
+        while not self._detener.is_set() or not self._cola.empty():
+            lote = self._extraer_lote()
+            if lote:
+                self._volcar(lote)
+    
+    def _extraer_lote(self, sin_limite=False):
+        """Toma hasta tamano_lote marcaciones, esperando como máximo el intervalo configurado"""
+        lote = []
+        limite = None if sin_limite else self._tamano_lote
+        fin = reloj.monotonic() + self._intervalo
+        
+        while limite is None or len(lote) < limite:
+            restante = fin - reloj.monotonic()
+            try:
+                if sin_limite or restante <= 0:
+                    lote.append(self._cola.get_nowait())
+                else:
+                    lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        
+        return lote
+    
+    def _volcar(self, lote):
+        """Confirma un lote de marcaciones en una sola transacción, sin descartar ninguna si falla"""
+        with self._app.app_context():
+            for intento in range(self.REINTENTOS_LOTE):
+                resultados = self._confirmar(lote)
+                if resultados is not None:
+                    break
+                reloj.sleep(0.1 * 2 ** intento)
+            else:
+                # El lote sigue fallando: aplicar cada marcación en su propia transacción
+                resultados = []
+                fallidas = []
+                for registro in lote:
+                    resultado = self._confirmar([registro])
+                    if resultado is None:
+                        fallidas.append(registro)
+                    else:
+                        resultados.extend(resultado)
+                if fallidas:
+                    self._guardar_en_log(fallidas)
+            
+            for registro in lote:
+                self._contar_entrada(registro, -1)
+            
+            for registro, asistencia, mensaje, error in resultados:
+                if not error:
+                    continue
+                if self._reintentar_salida(registro, error):
+                    continue
+                self._app.logger.warning(
+                    'Marcación diferida rechazada (empleado %s, %s): %s',
+                    registro['empleado_id'], registro['tipo_registro'], error
+                )
+    
+    def _confirmar(self, lote):
+        """
+        Aplica y confirma marcaciones en una transacción
+        
+        Returns:
+            list or None: Resultados de aplicar_registros_permitidos, None si la transacción falló
+                          o se cerró un mes durante la escritura (se reintenta)
+        """
+        try:
+            resultados = self.asistencia_service.aplicar_registros_permitidos(lote)
+            if self.asistencia_service.hay_cierre_concurrente(resultados):
+                db.session.rollback()
+                return None
+            self.asistencia_service.confirmar_registros(resultados)
+            return resultados
+        except Exception as e:
+            db.session.rollback()
+            self._app.logger.warning('Error volcando buffer de registros (%s marcaciones): %s', len(lote), e)
+            return None
+    
+    def _reintentar_salida(self, registro, error):
+        """Vuelve a encolar una salida cuya entrada aún no existe; False si no corresponde reintentarla"""
+        if error != Asistencia.SIN_ENTRADA or self._detener.is_set():
+            return False
+        
+        intentos = registro.get('intentos', 0)
+        if intentos >= self.REINTENTOS_SALIDA:
+            return False
+        
+        try:
+            self._cola.put_nowait(dict(registro, intentos=intentos + 1))
+            return True
+        except queue.Full:
+            return False
+    
+    def _guardar_en_log(self, registros):
+        """Guarda en el log de marcaciones las marcaciones que no se pudieron confirmar"""
+        try:
+            for registro in registros:
+                db.session.add(Marcacion(
+                    empleado_id=registro['empleado_id'],
+                    tipo_registro=registro['tipo_registro'],
+                    marcado_en=datetime.combine(registro['fecha'], registro['hora']),
+                    observaciones=registro.get('observaciones'),
+                    origen='diferido'
+                ))
+            db.session.commit()
+            self._app.logger.warning(
+                '%s marcaciones diferidas guardadas en el log de marcaciones para el proyector', len(registros)
+            )
+        except Exception as e:
+            db.session.rollback()
+            for registro in registros:
+                self._app.logger.error(
+                    'Marcación diferida perdida (empleado %s, %s, %s %s): %s',
+                    registro['empleado_id'], registro['tipo_registro'], registro['fecha'], registro['hora'], e
+                )
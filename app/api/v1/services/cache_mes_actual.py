@@ -0,0 +1,324 @@
+import os
+import threading
+import time as reloj
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.services.cache_reportes import CacheReportes, LectorInvalidaciones
+
+class CacheMesActual:
+    """
+    Caché columnar en memoria (por proceso) de las asistencias del mes en curso.
+    Cada asistencia ocupa una posición en arreglos NumPy paralelos (empleado_id, ordinal de la
+    fecha, horas trabajadas, horas extras y código de estado), lo que permite agregar el mes
+    completo sin consultar la base de datos y ocupa una fracción de la memoria de los objetos ORM.
+    
+    Se carga al primer uso y al cambiar de mes. Los registros y aprobaciones confirmados en este
+    proceso se aplican directamente; los hechos por otros procesos se incorporan leyendo de nuevo
+    las fechas que registran en invalidaciones_reporte (como máximo cada INTERVALO_SINCRONIZACION
+    segundos), y cada RESYNC_SEGUNDOS se recarga completa. Las consultas se hacen fuera del lock de
+    los arreglos: mientras tanto se sigue respondiendo con los datos anteriores, y los cambios
+    publicados durante la lectura se vuelven a aplicar sobre lo leído.
+    """
+    
+    # Códigos de estado almacenados en la columna estado
+    ESTADOS = {'Pendiente': 0, 'Aprobado': 1, 'Rechazado': 2}
+    
+    # Segundos tras los cuales se recarga el mes completo desde la base de datos
+    # (menor que la retención de invalidaciones, 2 * CacheReportes.TTL, para no perder ninguna)
+    RESYNC_SEGUNDOS = 900
+    
+    # Segundos mínimos entre lecturas de invalidaciones de otros procesos
+    INTERVALO_SINCRONIZACION = 1.0
+    
+    # Capacidad inicial de los arreglos (crece al doble cuando se llena)
+    CAPACIDAD_INICIAL = 1024
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_sincronizacion = threading.Lock()
+        self._pid = None
+        self._mes = None
+        self._lector = LectorInvalidaciones()
+        self._cargado_en = 0
+        self._sincronizado_en = 0
+        self._forzar = False
+        self._cambios_en_lectura = None  # cambios publicados mientras se consulta la base de datos
+        self._filas = 0
+        self._posiciones = {}  # {(empleado_id, ordinal): posición en los arreglos}
+        self._reservar(self.CAPACIDAD_INICIAL)
+        
+        # Las invalidaciones confirmadas en este proceso (p. ej. un recálculo) se leen en la siguiente
+        # consulta; insert=True para ver la marca antes de que CacheReportes la retire de la sesión
+        event.listen(Session, 'after_commit', self._on_commit, insert=True)
+    
+    def _on_commit(self, session):
+        if session.info.get(CacheReportes.CLAVE_SESION):
+            self._forzar = True
+    
+    def cubre(self, fecha_inicio, fecha_fin):
+        """
+        Indica si un período está dentro del mes en curso
+        
+        Returns:
+            bool: True si la caché puede responder por el período
+        """
+        mes = datetime.utcnow().date().replace(day=1)
+        return fecha_inicio >= mes and fecha_fin < self._siguiente_mes(mes)
+    
+    def capturar(self, asistencias, estado=None):
+        """
+        Toma los valores de asistencias modificadas en la sesión actual.
+        Debe llamarse antes del commit: tras él los objetos expiran y leerlos volvería a consultar.
+        
+        Args:
+            asistencias (iterable): Objetos con empleado_id, fecha, horas_trabajadas, horas_extras (y estado)
+            estado (str, optional): Estado común de todas las asistencias (si no se toma de cada una)
+        
+        Returns:
+            list: Cambios (empleado_id, fecha, horas, extras, código de estado) para publicar()
+        """
+        mes = datetime.utcnow().date().replace(day=1)
+        cambios = []
+        for asistencia in asistencias:
+            if asistencia is None or asistencia.fecha < mes:
+                continue
+            # Las asistencias nuevas aún no tienen aplicados los valores por defecto de las columnas
+            cambios.append((
+                asistencia.empleado_id,
+                asistencia.fecha,
+                asistencia.horas_trabajadas or 0,
+                asistencia.horas_extras or 0,
+                self.ESTADOS.get(estado or asistencia.estado or 'Pendiente', -1)
+            ))
+        return cambios
+    
+    def publicar(self, cambios):
+        """
+        Aplica cambios ya confirmados. Si la caché aún no se ha cargado en este proceso
+        no hace nada: se cargará completa al consultarla. Si hay una lectura en curso, los
+        cambios se guardan también para aplicarlos sobre sus resultados.
+        
+        Args:
+            cambios (list): Cambios devueltos por capturar()
+        """
+        if not cambios:
+            return
+        
+        with self._lock:
+            if self._cambios_en_lectura is not None:
+                self._cambios_en_lectura.extend(cambios)
+            if self._mes is None or self._pid != os.getpid():
+                return
+            
+            fin = self._siguiente_mes(self._mes)
+            for empleado_id, fecha, horas, extras, estado in cambios:
+                if self._mes <= fecha < fin:
+                    self._escribir(empleado_id, fecha.toordinal(), horas, extras, estado)
+    
+    def totales(self, fecha_inicio, fecha_fin, empleado_ids=None):
+        """
+        Totales de asistencias aprobadas por empleado en un período del mes en curso
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período
+            empleado_ids (list, optional): Limitar a estos empleados
+        
+        Returns:
+            dict: {empleado_id: (horas_trabajadas, horas_extras, dias_asistidos)}
+        """
+        self._asegurar_cargado()
+        
+        with self._lock:
+            n = self._filas
+            ordinales = self._ordinal[:n]
+            seleccion = (
+                (self._estado[:n] == self.ESTADOS['Aprobado'])
+                & (ordinales >= fecha_inicio.toordinal())
+                & (ordinales <= fecha_fin.toordinal())
+            )
+            if empleado_ids is not None:
+                seleccion &= np.isin(self._empleado_id[:n], np.asarray(list(empleado_ids), dtype=np.int32))
+            
+            empleados, grupo = np.unique(self._empleado_id[:n][seleccion], return_inverse=True)
+            trabajadas = np.bincount(grupo, weights=self._horas[:n][seleccion], minlength=len(empleados))
+            extras = np.bincount(grupo, weights=self._extras[:n][seleccion], minlength=len(empleados))
+            dias = np.bincount(grupo, minlength=len(empleados))
+        
+        return {
+            int(empleado_id): (float(t), float(e), int(d))
+            for empleado_id, t, e, d in zip(empleados, trabajadas, extras, dias)
+        }
+    
+    def get_estadisticas(self):
+        """
+        Obtiene el tamaño de la caché de este proceso
+        
+        Returns:
+            dict: {mes, filas, capacidad, bytes, pid}
+        """
+        with self._lock:
+            return {
+                'mes': self._mes.strftime('%Y-%m') if self._mes else None,
+                'filas': self._filas,
+                'capacidad': len(self._empleado_id),
+                'bytes': sum(columna.nbytes for columna in self._columnas()),
+                'pid': os.getpid()
+            }
+    
+    def _asegurar_cargado(self):
+        """
+        Carga el mes si no existe, es de otro mes/proceso o venció, y aplica invalidaciones nuevas
+        si pasó el intervalo de sincronización; no debe tenerse el lock de los arreglos
+        """
+        mes = datetime.utcnow().date().replace(day=1)
+        utilizable = self._pid == os.getpid() and self._mes == mes
+        ahora = reloj.monotonic()
+        if (utilizable and not self._forzar and ahora - self._cargado_en < self.RESYNC_SEGUNDOS
+                and ahora - self._sincronizado_en < self.INTERVALO_SINCRONIZACION):
+            return
+        
+        # Si ya hay otra lectura en curso y los datos sirven, se responde con ellos sin esperar
+        # (salvo que haya cambios propios por leer)
+        if not self._lock_sincronizacion.acquire(blocking=not utilizable or self._forzar):
+            return
+        try:
+            utilizable = self._pid == os.getpid() and self._mes == mes
+            ahora = reloj.monotonic()
+            if not utilizable or ahora - self._cargado_en >= self.RESYNC_SEGUNDOS:
+                self._forzar = False
+                self._cargar(mes)
+            elif self._forzar or ahora - self._sincronizado_en >= self.INTERVALO_SINCRONIZACION:
+                self._forzar = False
+                self._sincronizar(mes)
+        finally:
+            self._lock_sincronizacion.release()
+    
+    def _cargar(self, mes):
+        """Carga completa de las asistencias de un mes; requiere el lock de sincronización"""
+        fin = self._siguiente_mes(mes) - timedelta(days=1)
+        with self._lock:
+            self._cambios_en_lectura = []
+        try:
+            with db.engine.connect() as conexion:
+                # Fijar la posición en las invalidaciones antes de leer: las posteriores se aplicarán después
+                self._lector.iniciar(conexion)
+                filas = self._consultar(conexion, mes, fin)
+        except Exception:
+            with self._lock:
+                self._cambios_en_lectura = None
+            raise
+        
+        with self._lock:
+            self._filas = 0
+            self._posiciones = {}
+            self._reservar(max(self.CAPACIDAD_INICIAL, len(filas)))
+            for fila in filas:
+                self._escribir(*fila)
+            
+            self._pid = os.getpid()
+            self._mes = mes
+            self._aplicar_cambios_en_lectura()
+        
+        self._cargado_en = self._sincronizado_en = reloj.monotonic()
+    
+    def _sincronizar(self, mes):
+        """Vuelve a leer las fechas del mes con invalidaciones nuevas; requiere el lock de sincronización"""
+        self._sincronizado_en = reloj.monotonic()
+        fin = self._siguiente_mes(mes) - timedelta(days=1)
+        with self._lock:
+            self._cambios_en_lectura = []
+        try:
+            rangos = []
+            with db.engine.connect() as conexion:
+                for invalidacion in self._lector.leer(conexion):
+                    # Las invalidaciones globales (empleados, feriados) no cambian las asistencias
+                    if invalidacion.fecha_inicio is None and invalidacion.fecha_fin is None:
+                        continue
+                    desde = max(invalidacion.fecha_inicio or mes, mes)
+                    hasta = min(invalidacion.fecha_fin or fin, fin)
+                    if desde <= hasta:
+                        rangos.append((desde, hasta, self._consultar(conexion, desde, hasta)))
+        except Exception:
+            with self._lock:
+                self._cambios_en_lectura = None
+            raise
+        
+        with self._lock:
+            for desde, hasta, filas in rangos:
+                # Las filas del rango que ya no existan quedan con un estado que no se agrega
+                n = self._filas
+                self._estado[:n][(self._ordinal[:n] >= desde.toordinal()) & (self._ordinal[:n] <= hasta.toordinal())] = -1
+                for fila in filas:
+                    self._escribir(*fila)
+            self._aplicar_cambios_en_lectura()
+    
+    def _aplicar_cambios_en_lectura(self):
+        """Vuelve a aplicar los cambios publicados durante una lectura; requiere el lock"""
+        cambios, self._cambios_en_lectura = self._cambios_en_lectura, None
+        fin = self._siguiente_mes(self._mes)
+        for empleado_id, fecha, horas, extras, estado in cambios or []:
+            if self._mes <= fecha < fin:
+                self._escribir(empleado_id, fecha.toordinal(), horas, extras, estado)
+    
+    def _consultar(self, conexion, desde, hasta):
+        """Lee las columnas de la caché para un rango de fechas"""
+        filas = conexion.execute(
+            select(
+                Asistencia.empleado_id,
+                Asistencia.fecha,
+                Asistencia.horas_trabajadas,
+                Asistencia.horas_extras,
+                Asistencia.estado
+            ).where(Asistencia.fecha.between(desde, hasta))
+        ).all()
+        return [
+            (fila.empleado_id, fila.fecha.toordinal(), fila.horas_trabajadas or 0, fila.horas_extras or 0,
+             self.ESTADOS.get(fila.estado, -1))
+            for fila in filas
+        ]
+    
+    def _escribir(self, empleado_id, ordinal, horas, extras, estado):
+        """Inserta o actualiza la posición de una asistencia; requiere el lock"""
+        clave = (empleado_id, ordinal)
+        posicion = self._posiciones.get(clave)
+        if posicion is None:
+            if self._filas == len(self._empleado_id):
+                self._reservar(2 * self._filas)
+            posicion = self._filas
+            self._posiciones[clave] = posicion
+            self._filas += 1
+            self._empleado_id[posicion] = empleado_id
+            self._ordinal[posicion] = ordinal
+        
+        self._horas[posicion] = horas
+        self._extras[posicion] = extras
+        self._estado[posicion] = estado
+    
+    def _reservar(self, capacidad):
+        """Crea o amplía los arreglos conservando las filas existentes"""
+        n = self._filas
+        columnas = (
+            ('_empleado_id', np.int32),
+            ('_ordinal', np.int32),
+            ('_horas', np.float64),
+            ('_extras', np.float64),
+            ('_estado', np.int8)
+        )
+        for nombre, tipo in columnas:
+            nueva = np.zeros(capacidad, dtype=tipo)
+            if n:
+                nueva[:n] = getattr(self, nombre)[:n]
+            setattr(self, nombre, nueva)
+    
+    def _columnas(self):
+        """Arreglos de la caché"""
+        return (self._empleado_id, self._ordinal, self._horas, self._extras, self._estado)
+    
+    def _siguiente_mes(self, mes):
+        """Primer día del mes siguiente"""
+        return date(mes.year + 1, 1, 1) if mes.month == 12 else date(mes.year, mes.month + 1, 1)
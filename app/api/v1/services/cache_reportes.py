@@ -0,0 +1,317 @@
+import os
+import threading
+import time as reloj
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, func, insert, delete, or_
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.api.v1.models.empleado import Empleado
+from app.api.v1.models.feriado import Feriado
+from app.api.v1.models.invalidacion_reporte import InvalidacionReporte
+
+class CacheReportes:
+    """
+    Caché en memoria (por proceso) de reportes de asistencias, con TTL y desalojo LRU.
+    Las claves son (fecha_inicio, fecha_fin, area, unidad_productiva).
+    
+    Las modificaciones que alteran un reporte registran, en su misma transacción, el rango de
+    fechas afectado en la tabla invalidaciones_reporte. Cada proceso lee las invalidaciones nuevas
+    como máximo cada INTERVALO_SINCRONIZACION segundos (y siempre tras confirmar una propia) y
+    descarta solo las entradas cuyo período se solapa con ellas, de modo que los cambios hechos por
+    otros workers o por comandos CLI (recálculo, reconstrucción del resumen) también se respetan.
+    La consulta se hace fuera del lock de la caché: los aciertos no esperan a la base de datos.
+    
+    El mismo registro propaga entre procesos los cambios de tablas que otros servicios mantienen
+    en memoria (reglas de horas, feriados, empleados): se vigilan con vigilar() y quien las usa
+    llama a sincronizar() antes de leer su caché.
+    """
+    
+    # Número máximo de reportes en caché
+    CAPACIDAD = 128
+    
+    # Segundos de vigencia de un reporte en caché
+    TTL = 600
+    
+    # Segundos mínimos entre lecturas de invalidaciones de otros procesos
+    INTERVALO_SINCRONIZACION = 1.0
+    
+    # Clave en session.info que indica que la transacción registró invalidaciones
+    CLAVE_SESION = 'invalidaciones_reporte'
+    
+    # Tablas cuyos cambios afectan a todos los reportes (el resto solo se notifica a sus suscriptores)
+    TABLAS_REPORTE = ('empleados', 'feriados')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_sincronizacion = threading.Lock()
+        self._pid = None
+        self._lector = LectorInvalidaciones()
+        self._sincronizado_en = 0
+        self._forzar = False
+        self._version = 0
+        self._entradas = OrderedDict()  # {clave: (reporte, guardado_en)}
+        self._estadisticas = {'aciertos': 0, 'fallos': 0, 'desalojos': 0, 'expiradas': 0, 'invalidadas': 0}
+        self._suscriptores = {}  # {tabla: [funciones a llamar cuando otro proceso la modifica]}
+        
+        # Cambios de empleados (área, unidad, estado) o feriados afectan a todos los reportes
+        for modelo in (Empleado, Feriado):
+            self.vigilar(modelo)
+        
+        # Tras confirmar invalidaciones propias se leen en la siguiente consulta, sin esperar el intervalo
+        event.listen(Session, 'after_commit', self._on_commit)
+        event.listen(Session, 'after_rollback', self._on_rollback)
+    
+    def vigilar(self, modelo, funcion=None):
+        """
+        Registra en invalidaciones_reporte cada cambio de un modelo y, si se indica, llama a una
+        función cuando se lee un cambio de ese modelo (hecho por este u otro proceso)
+        
+        Args:
+            modelo: Clase del modelo a vigilar
+            funcion (callable, optional): Función sin argumentos (p. ej. la invalidación de una caché)
+        """
+        tabla = modelo.__tablename__
+        if tabla not in self._suscriptores:
+            self._suscriptores[tabla] = []
+            for evento in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(modelo, evento, self._on_cambio_global)
+        if funcion is not None:
+            self._suscriptores[tabla].append(funcion)
+    
+    def sincronizar(self):
+        """
+        Lee las invalidaciones nuevas si venció el intervalo (o hay propias sin leer), avisando a
+        los suscriptores de las tablas modificadas. Llamarlo antes de usar una caché vigilada.
+        """
+        self._sincronizar()
+    
+    def _on_cambio_global(self, mapper, connection, target):
+        connection.execute(insert(InvalidacionReporte).values(origen=target.__tablename__, creado_en=datetime.utcnow()))
+        sesion = object_session(target)
+        if sesion is not None:
+            sesion.info[self.CLAVE_SESION] = True
+    
+    def _on_commit(self, session):
+        if session.info.pop(self.CLAVE_SESION, False):
+            self._forzar = True
+    
+    def _on_rollback(self, session):
+        session.info.pop(self.CLAVE_SESION, None)
+    
+    def obtener(self, fecha_inicio, fecha_fin, area=None, unidad_productiva=None):
+        """
+        Obtiene un reporte en caché
+        
+        Returns:
+            dict or None: El reporte si está en caché y vigente, None si no
+        """
+        clave = (fecha_inicio, fecha_fin, area, unidad_productiva)
+        self._sincronizar()
+        
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._estadisticas['fallos'] += 1
+                return None
+            
+            reporte, guardado_en = entrada
+            if reloj.monotonic() - guardado_en >= self.TTL:
+                del self._entradas[clave]
+                self._estadisticas['expiradas'] += 1
+                self._estadisticas['fallos'] += 1
+                return None
+            
+            self._entradas.move_to_end(clave)
+            self._estadisticas['aciertos'] += 1
+            return reporte
+    
+    def version(self):
+        """
+        Versión de la caché, a capturar antes de calcular un reporte y pasar a guardar().
+        Cambia con cada invalidación aplicada en este proceso.
+        """
+        with self._lock:
+            return self._version
+    
+    def guardar(self, fecha_inicio, fecha_fin, area, unidad_productiva, reporte, version):
+        """
+        Guarda un reporte calculado, salvo que se haya invalidado algo mientras se calculaba
+        
+        Args:
+            reporte (dict): Reporte calculado
+            version (int): Valor de version() capturado antes de calcular el reporte
+        """
+        clave = (fecha_inicio, fecha_fin, area, unidad_productiva)
+        self._sincronizar()
+        
+        with self._lock:
+            if version != self._version:
+                return
+            
+            self._entradas[clave] = (reporte, reloj.monotonic())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.CAPACIDAD:
+                self._entradas.popitem(last=False)
+                self._estadisticas['desalojos'] += 1
+    
+    def registrar_fechas(self, fechas):
+        """
+        Registra la invalidación de los reportes que cubren alguna de las fechas dadas.
+        No confirma la transacción: debe llamarse dentro de la misma transacción que el cambio.
+        
+        Args:
+            fechas (iterable): Fechas afectadas
+        """
+        # Agrupar fechas consecutivas en rangos para registrar una fila por rango
+        rangos = []
+        for fecha in sorted(set(fechas)):
+            if rangos and fecha - rangos[-1][1] == timedelta(days=1):
+                rangos[-1][1] = fecha
+            else:
+                rangos.append([fecha, fecha])
+        
+        for fecha_inicio, fecha_fin in rangos:
+            self.registrar_rango(fecha_inicio, fecha_fin)
+    
+    def registrar_rango(self, fecha_inicio=None, fecha_fin=None):
+        """
+        Registra la invalidación de los reportes que se solapan con un rango de fechas.
+        No confirma la transacción: debe llamarse dentro de la misma transacción que el cambio.
+        
+        Args:
+            fecha_inicio (date, optional): Inicio del rango (sin límite si es None)
+            fecha_fin (date, optional): Fin del rango (sin límite si es None)
+        """
+        ahora = datetime.utcnow()
+        db.session.add(InvalidacionReporte(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, creado_en=ahora))
+        db.session.info[self.CLAVE_SESION] = True
+        
+        # Las invalidaciones anteriores a dos TTL ya no pueden afectar a ninguna entrada vigente
+        db.session.execute(
+            delete(InvalidacionReporte).where(InvalidacionReporte.creado_en < ahora - timedelta(seconds=2 * self.TTL))
+        )
+    
+    def get_estadisticas(self):
+        """
+        Obtiene los contadores de la caché de este proceso
+        
+        Returns:
+            dict: {aciertos, fallos, tasa_aciertos, desalojos, expiradas, invalidadas, entradas, capacidad, ttl}
+        """
+        with self._lock:
+            estadisticas = dict(self._estadisticas)
+            consultas = estadisticas['aciertos'] + estadisticas['fallos']
+            estadisticas['tasa_aciertos'] = round(estadisticas['aciertos'] / consultas, 4) if consultas else 0
+            estadisticas['entradas'] = len(self._entradas)
+            estadisticas['capacidad'] = self.CAPACIDAD
+            estadisticas['ttl'] = self.TTL
+            estadisticas['pid'] = os.getpid()
+            return estadisticas
+    
+    def _sincronizar(self):
+        """
+        Aplica las invalidaciones registradas desde la última lectura si venció el intervalo
+        o hay invalidaciones propias recién confirmadas; no debe tenerse el lock de la caché
+        """
+        if (not self._forzar and self._pid == os.getpid()
+                and reloj.monotonic() - self._sincronizado_en < self.INTERVALO_SINCRONIZACION):
+            return
+        
+        # Una sola lectura a la vez; quien espera vuelve a comprobar si aún hace falta
+        with self._lock_sincronizacion:
+            if (not self._forzar and self._pid == os.getpid()
+                    and reloj.monotonic() - self._sincronizado_en < self.INTERVALO_SINCRONIZACION):
+                return
+            self._forzar = False
+            self._sincronizado_en = reloj.monotonic()
+            
+            if self._pid != os.getpid():
+                # Primer uso en este proceso: la caché está vacía, basta con fijar la posición
+                with db.engine.connect() as conexion:
+                    self._lector.iniciar(conexion)
+                with self._lock:
+                    self._entradas.clear()
+                    self._pid = os.getpid()
+                return
+            
+            with db.engine.connect() as conexion:
+                invalidaciones = self._lector.leer(conexion)
+            
+            for tabla in {invalidacion.origen for invalidacion in invalidaciones if invalidacion.origen}:
+                for funcion in self._suscriptores.get(tabla, ()):
+                    funcion()
+            
+            invalidaciones = [
+                invalidacion for invalidacion in invalidaciones
+                if invalidacion.origen is None or invalidacion.origen in self.TABLAS_REPORTE
+            ]
+            if not invalidaciones:
+                return
+            
+            with self._lock:
+                self._version += 1
+                for clave in list(self._entradas):
+                    fecha_inicio, fecha_fin = clave[0], clave[1]
+                    for invalidacion in invalidaciones:
+                        if ((invalidacion.fecha_inicio is None or invalidacion.fecha_inicio <= fecha_fin) and
+                                (invalidacion.fecha_fin is None or invalidacion.fecha_fin >= fecha_inicio)):
+                            del self._entradas[clave]
+                            self._estadisticas['invalidadas'] += 1
+                            break
+
+class LectorInvalidaciones:
+    """
+    Lector incremental de invalidaciones_reporte. Los IDs se asignan antes del commit, así que una
+    invalidación con ID menor puede confirmarse después de otra mayor ya leída: los IDs que faltan
+    al leer se vuelven a consultar hasta que aparecen o pasan ESPERA_HUECOS segundos (transacción
+    revertida). No es seguro entre hilos: cada caché serializa sus lecturas.
+    """
+    
+    # Segundos durante los que se sigue buscando un ID faltante (menor que la retención de 2 * TTL)
+    ESPERA_HUECOS = 600
+    
+    # Máximo de IDs faltantes consecutivos que se vigilan (saltos de secuencia tras reinicios)
+    MAX_HUECOS = 1000
+    
+    def __init__(self):
+        self._ultimo_id = 0
+        self._huecos = {}  # {id: visto_en}
+    
+    def iniciar(self, conexion):
+        """Fija la posición en la última invalidación registrada"""
+        self._ultimo_id = conexion.execute(select(func.coalesce(func.max(InvalidacionReporte.id), 0))).scalar()
+        self._huecos = {}
+    
+    def leer(self, conexion):
+        """
+        Lee las invalidaciones nuevas y las confirmadas tarde desde la última lectura
+        
+        Returns:
+            list: Filas (id, fecha_inicio, fecha_fin, origen)
+        """
+        condicion = InvalidacionReporte.id > self._ultimo_id
+        if self._huecos:
+            condicion = or_(condicion, InvalidacionReporte.id.in_(list(self._huecos)))
+        
+        filas = conexion.execute(
+            select(InvalidacionReporte.id, InvalidacionReporte.fecha_inicio, InvalidacionReporte.fecha_fin,
+                   InvalidacionReporte.origen)
+            .where(condicion)
+            .order_by(InvalidacionReporte.id)
+        ).all()
+        
+        ahora = reloj.monotonic()
+        for fila in filas:
+            self._huecos.pop(fila.id, None)
+        
+        nuevos = [fila.id for fila in filas if fila.id > self._ultimo_id]
+        if nuevos:
+            leidos = set(nuevos)
+            for faltante in range(max(self._ultimo_id + 1, nuevos[-1] - self.MAX_HUECOS), nuevos[-1]):
+                if faltante not in leidos:
+                    self._huecos[faltante] = ahora
+            self._ultimo_id = nuevos[-1]
+        
+        self._huecos = {i: visto_en for i, visto_en in self._huecos.items() if ahora - visto_en < self.ESPERA_HUECOS}
+        return filas
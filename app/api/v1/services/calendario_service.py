@@ -0,0 +1,176 @@
+import threading
+import time as reloj
+from bisect import bisect_left, bisect_right
+from datetime import date
+from app import db
+from app.api.v1.models.feriado import Feriado
+from app.api.v1.schemas import validate_data, feriado_schema
+
+class CalendarioService:
+    """
+    Servicio de calendario laboral (lunes a sábado, sin feriados).
+    Los feriados se mantienen en memoria como ordinales ordenados, por lo que contar
+    días laborables de cualquier rango cuesta O(log n) sin recorrer día por día.
+    
+    Los cambios de feriados se leen del registro de invalidaciones compartido con la caché de
+    reportes, que descarta la caché de feriados antes que los reportes afectados: un reporte
+    recalculado tras un cambio en otro proceso ya cuenta los días con el calendario nuevo.
+    """
+    
+    # Segundos tras los cuales se recargan los feriados aunque no se haya leído ningún cambio
+    CACHE_TTL = 300
+    
+    def __init__(self, cache_reportes):
+        self.cache_reportes = cache_reportes
+        self._lock = threading.Lock()
+        self._feriados = None  # Ordinales de feriados que caen de lunes a sábado
+        self._cargado_en = 0
+        self._generacion = 0  # Cambia con cada invalidación; una carga anterior no se guarda
+        
+        # Cualquier cambio en la tabla, desde este u otro proceso, invalida la caché
+        self.cache_reportes.vigilar(Feriado, self.invalidar)
+    
+    def invalidar(self):
+        """Descarta la caché de feriados; se recargará en la próxima consulta"""
+        with self._lock:
+            self._feriados = None
+            self._generacion += 1
+    
+    def _get_feriados(self):
+        """Obtiene los ordinales de feriados laborables, cargándolos si la caché no es válida"""
+        self.cache_reportes.sincronizar()
+        
+        with self._lock:
+            if self._feriados is not None and reloj.monotonic() - self._cargado_en < self.CACHE_TTL:
+                return self._feriados
+            generacion = self._generacion
+        
+        fechas = [f[0] for f in db.session.query(Feriado.fecha).all()]
+        # Los feriados en domingo no restan días laborables
+        feriados = sorted(f.toordinal() for f in fechas if f.weekday() != 6)
+        
+        with self._lock:
+            if self._generacion == generacion:
+                self._feriados = feriados
+                self._cargado_en = reloj.monotonic()
+        return feriados
+    
+    def dias_laborables(self, fecha_inicio, fecha_fin):
+        """
+        Cuenta los días laborables (lunes a sábado, excluyendo feriados) de un período
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período (inclusive)
+            
+        Returns:
+            int: Número de días laborables
+        """
+        if fecha_inicio > fecha_fin:
+            return 0
+        
+        inicio = fecha_inicio.toordinal()
+        fin = fecha_fin.toordinal()
+        
+        # El ordinal 1 (0001-01-01) es lunes, así que los domingos son los múltiplos de 7
+        domingos = fin // 7 - (inicio - 1) // 7
+        
+        feriados = self._get_feriados()
+        en_rango = bisect_right(feriados, fin) - bisect_left(feriados, inicio)
+        
+        return (fin - inicio + 1) - domingos - en_rango
+    
+    def ordinales_laborables(self, fecha_inicio, fecha_fin):
+        """
+        Obtiene los días laborables de un período como ordinales (date.toordinal())
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período (inclusive)
+            
+        Returns:
+            list: Ordinales de los días laborables, ordenados
+        """
+        feriados = set(self._get_feriados())
+        return [
+            ordinal for ordinal in range(fecha_inicio.toordinal(), fecha_fin.toordinal() + 1)
+            if ordinal % 7 != 0 and ordinal not in feriados
+        ]
+    
+    def es_laborable(self, fecha):
+        """
+        Indica si una fecha es día laborable
+        
+        Args:
+            fecha (date): Fecha a verificar
+            
+        Returns:
+            bool: True si es laborable, False si es domingo o feriado
+        """
+        return self.dias_laborables(fecha, fecha) == 1
+    
+    def get_feriados(self, anio=None):
+        """
+        Obtener los feriados registrados
+        
+        Args:
+            anio (int, optional): Filtrar por año
+            
+        Returns:
+            list: Lista de feriados ordenados por fecha
+        """
+        query = Feriado.query
+        if anio:
+            query = query.filter(Feriado.fecha.between(date(anio, 1, 1), date(anio, 12, 31)))
+        return query.order_by(Feriado.fecha).all()
+    
+    def create_feriado(self, data):
+        """
+        Registrar un feriado
+        
+        Args:
+            data (dict): Datos del feriado (fecha, descripcion)
+            
+        Returns:
+            tuple: (feriado, None) si la creación es exitosa, (None, error) si hay error
+        """
+        validated_data, errors = validate_data(feriado_schema, data)
+        if errors:
+            return None, errors
+        
+        if Feriado.query.filter_by(fecha=validated_data['fecha']).first():
+            return None, {'fecha': ['Ya existe un feriado en esta fecha']}
+        
+        feriado = Feriado(**validated_data)
+        
+        try:
+            db.session.add(feriado)
+            db.session.commit()
+            self.invalidar()
+            return feriado, None
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+    
+    def delete_feriado(self, feriado_id):
+        """
+        Eliminar un feriado
+        
+        Args:
+            feriado_id (int): ID del feriado
+            
+        Returns:
+            bool: True si la eliminación es exitosa, False si no existe o hay error
+        """
+        feriado = Feriado.query.get(feriado_id)
+        if not feriado:
+            return False
+        
+        try:
+            db.session.delete(feriado)
+            db.session.commit()
+            self.invalidar()
+            return True
+        except Exception:
+            db.session.rollback()
+            return False
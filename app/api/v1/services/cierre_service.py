@@ -0,0 +1,264 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, exists, literal, or_
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.empleado import Empleado
+from app.api.v1.models.cierre import PeriodoCerrado, Cierre
+from app.utils.sql import dialecto_actual
+
+class CierreService:
+    """
+    Servicio para el cierre mensual de nómina.
+    Cerrar un mes congela los totales aprobados de cada empleado en la tabla cierres con un único
+    INSERT ... SELECT y bloquea la aprobación o rechazo de las asistencias del mes. Los reportes
+    leen los meses cerrados de cierres en lugar de volver a agregar las asistencias.
+    """
+    
+    # Filas por lote al recorrer un cierre para exportarlo
+    EXPORT_YIELD_PER = 1000
+    
+    # Primera clave de los bloqueos consultivos por mes (la segunda es el ordinal del mes)
+    CLAVE_BLOQUEO = 4107
+    
+    def __init__(self, resumen_service, calendario_service, cache_reportes):
+        self.resumen_service = resumen_service
+        self.calendario_service = calendario_service
+        self.cache_reportes = cache_reportes
+    
+    def cerrar_periodo(self, periodo, usuario_id):
+        """
+        Cierra un mes: registra el cierre, congela los totales por empleado y bloquea sus asistencias
+        
+        Args:
+            periodo (date): Primer día del mes
+            usuario_id (int): ID del usuario que cierra
+        
+        Returns:
+            tuple: (periodo_cerrado, None) si el cierre es exitoso, (None, error) si hay error
+        """
+        fecha_inicio = periodo
+        fecha_fin = self._fin_de_mes(periodo)
+        
+        # Solo meses terminados: el mes en curso aún recibe registros
+        if fecha_fin >= datetime.utcnow().date():
+            return None, {'periodo': ['Solo se pueden cerrar meses ya terminados']}
+        
+        if PeriodoCerrado.query.filter_by(periodo=periodo).first():
+            return None, {'periodo': ['El período ya está cerrado']}
+        
+        try:
+            # Se esperan las aprobaciones en curso del mes y se bloquean las nuevas hasta el commit,
+            # para que los totales congelados incluyan todo lo aprobado antes del cierre; las
+            # marcaciones y las aprobaciones de otros meses no se detienen
+            self.bloquear_periodos(fecha_inicio, fecha_fin, compartido=False)
+            
+            cierre = PeriodoCerrado(
+                periodo=periodo,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                dias_laborables=self.calendario_service.dias_laborables(fecha_inicio, fecha_fin),
+                usuario_cierre=usuario_id
+            )
+            db.session.add(cierre)
+            db.session.flush()
+            
+            # Totales desde el resumen mensual (no desde cierres, que aún no tiene este mes)
+            totales = self.resumen_service.totales_por_empleado(fecha_inicio, fecha_fin, usar_cierres=False)
+            seleccion = select(
+                literal(periodo),
+                Empleado.id,
+                Empleado.cedula,
+                Empleado.nombres,
+                Empleado.apellidos,
+                Empleado.area,
+                Empleado.unidad_productiva,
+                func.coalesce(totales.c.total_trabajadas, 0),
+                func.coalesce(totales.c.total_extras, 0),
+                func.coalesce(totales.c.dias_asistidos, 0)
+            ).outerjoin(
+                totales,
+                totales.c.empleado_id == Empleado.id
+            ).where(
+                # Empleados activos y los inactivos que tuvieron asistencias aprobadas en el mes
+                or_(Empleado.estado == True, totales.c.empleado_id.isnot(None))
+            )
+            
+            resultado = db.session.execute(insert(Cierre).from_select([
+                'periodo', 'empleado_id', 'cedula', 'nombres', 'apellidos', 'area', 'unidad_productiva',
+                'horas_trabajadas', 'horas_extras', 'dias_asistidos'
+            ], seleccion))
+            
+            cierre.empleados = resultado.rowcount
+            cierre.pendientes = db.session.execute(
+                select(func.count(Asistencia.id)).where(
+                    Asistencia.fecha.between(fecha_inicio, fecha_fin),
+                    Asistencia.estado == 'Pendiente'
+                )
+            ).scalar()
+            
+            # Los reportes del mes pasan a leerse del cierre
+            self.cache_reportes.registrar_rango(fecha_inicio, fecha_fin)
+            
+            db.session.commit()
+            return cierre, None
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+    
+    def reabrir_periodo(self, periodo):
+        """
+        Reabre un mes cerrado, descartando sus totales congelados
+        
+        Args:
+            periodo (date): Primer día del mes
+        
+        Returns:
+            bool: True si se reabrió, False si no estaba cerrado o hay error
+        """
+        cierre = PeriodoCerrado.query.filter_by(periodo=periodo).first()
+        if not cierre:
+            return False
+        
+        try:
+            db.session.execute(delete(Cierre).where(Cierre.periodo == periodo))
+            db.session.delete(cierre)
+            self.cache_reportes.registrar_rango(cierre.fecha_inicio, cierre.fecha_fin)
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            return False
+    
+    def get_periodos_cerrados(self):
+        """
+        Obtener los meses cerrados
+        
+        Returns:
+            list: Meses cerrados, del más reciente al más antiguo
+        """
+        return PeriodoCerrado.query.order_by(PeriodoCerrado.periodo.desc()).all()
+    
+    def get_periodo_cerrado(self, periodo):
+        """
+        Obtener el cierre de un mes
+        
+        Args:
+            periodo (date): Primer día del mes
+        
+        Returns:
+            PeriodoCerrado: Cierre del mes o None si no está cerrado
+        """
+        return PeriodoCerrado.query.filter_by(periodo=periodo).first()
+    
+    def iter_cierre(self, periodo, dias_laborables):
+        """
+        Recorrer los totales congelados de un mes sin cargarlos todos en memoria
+        
+        Args:
+            periodo (date): Primer día del mes
+            dias_laborables (int): Días laborables del mes registrados en el cierre
+        
+        Yields:
+            dict: Totales de un empleado
+        """
+        query = db.session.query(
+            Cierre.empleado_id,
+            Cierre.cedula,
+            Cierre.nombres,
+            Cierre.apellidos,
+            Cierre.area,
+            Cierre.unidad_productiva,
+            Cierre.horas_trabajadas,
+            Cierre.horas_extras,
+            Cierre.dias_asistidos
+        ).filter(
+            Cierre.periodo == periodo
+        ).order_by(
+            Cierre.unidad_productiva, Cierre.area, Cierre.apellidos, Cierre.nombres
+        ).yield_per(self.EXPORT_YIELD_PER)
+        
+        for fila in query:
+            yield {
+                'periodo': periodo.strftime('%Y-%m'),
+                'empleado_id': fila.empleado_id,
+                'cedula': fila.cedula,
+                'nombre_completo': f"{fila.nombres} {fila.apellidos}",
+                'area': fila.area,
+                'unidad_productiva': fila.unidad_productiva,
+                'horas_trabajadas': round(fila.horas_trabajadas, 2),
+                'horas_extras': round(fila.horas_extras, 2),
+                'dias_asistidos': fila.dias_asistidos,
+                'dias_faltantes': dias_laborables - fila.dias_asistidos,
+                'dias_laborables': dias_laborables
+            }
+    
+    def esta_cerrado(self, fecha):
+        """
+        Indica si una fecha pertenece a un mes cerrado
+        
+        Args:
+            fecha (date): Fecha a consultar
+        
+        Returns:
+            bool: True si el mes de la fecha está cerrado
+        """
+        return db.session.execute(select(exists().where(*self._cubre(fecha)))).scalar()
+    
+    def get_meses_cerrados(self, fecha_inicio, fecha_fin):
+        """
+        Obtener los meses cerrados que se solapan con un rango de fechas
+        
+        Args:
+            fecha_inicio (date): Inicio del rango
+            fecha_fin (date): Fin del rango
+        
+        Returns:
+            set: Primer día de cada mes cerrado del rango
+        """
+        return set(db.session.execute(
+            select(PeriodoCerrado.periodo).where(
+                PeriodoCerrado.fecha_fin >= fecha_inicio,
+                PeriodoCerrado.fecha_inicio <= fecha_fin
+            )
+        ).scalars())
+    
+    def condicion_abierta(self, fecha):
+        """
+        Condición SQL que excluye las filas de meses cerrados, evaluada en la misma sentencia
+        
+        Args:
+            fecha: Columna o valor de fecha
+        
+        Returns:
+            ColumnElement: NOT EXISTS sobre periodos_cerrados
+        """
+        return ~exists().where(*self._cubre(fecha))
+    
+    def bloquear_periodos(self, fecha_inicio, fecha_fin, compartido=True):
+        """
+        Toma hasta el fin de la transacción el bloqueo consultivo de cada mes del rango (solo en
+        PostgreSQL). Las aprobaciones lo toman compartido y el cierre exclusivo, de modo que un
+        cierre espera a las aprobaciones en curso de su mes y las siguientes ven el cierre.
+        
+        Args:
+            fecha_inicio (date): Inicio del rango
+            fecha_fin (date): Fin del rango
+            compartido (bool): Bloqueo compartido (aprobaciones) o exclusivo (cierre)
+        """
+        if dialecto_actual() != 'postgresql':
+            return
+        
+        bloquear = func.pg_advisory_xact_lock_shared if compartido else func.pg_advisory_xact_lock
+        mes = fecha_inicio.replace(day=1)
+        while mes <= fecha_fin:
+            db.session.execute(select(bloquear(self.CLAVE_BLOQUEO, mes.toordinal())))
+            mes = self._fin_de_mes(mes) + timedelta(days=1)
+    
+    def _cubre(self, fecha):
+        """Condición de un cierre cuyo mes contiene la fecha"""
+        return PeriodoCerrado.fecha_inicio <= fecha, PeriodoCerrado.fecha_fin >= fecha
+    
+    def _fin_de_mes(self, fecha):
+        """Último día del mes de una fecha"""
+        siguiente = fecha.replace(day=28) + timedelta(days=4)
+        return siguiente - timedelta(days=siguiente.day)
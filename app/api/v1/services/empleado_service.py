@@ -1,12 +1,20 @@
 from datetime import datetime
-from sqlalchemy import or_
 from app import db
 from app.api.v1.models.empleado import Empleado
 from app.api.v1.schemas import validate_data, empleado_schema, empleado_update_schema
+from app.utils.busqueda import IndiceBusqueda, aplicar_busqueda
 
 class EmpleadoService:
     """Servicio para gestionar empleados"""
     
+    # Columnas en las que busca el filtro busqueda
+    COLUMNAS_BUSQUEDA = (Empleado.cedula, Empleado.nombres, Empleado.apellidos)
+    
+    def __init__(self, autocompletado):
+        self.autocompletado = autocompletado
+        # Índice de trigramas en memoria para motores sin pg_trgm
+        self._indice_busqueda = IndiceBusqueda(Empleado, self.COLUMNAS_BUSQUEDA)
+    
     def create_empleado(self, empleado_data):
         """
         Crear un nuevo empleado
@@ -32,6 +40,7 @@ class EmpleadoService:
         try:
             db.session.add(nuevo_empleado)
             db.session.commit()
+            self.autocompletado.invalidar()
             return nuevo_empleado, None
         except Exception as e:
             db.session.rollback()
@@ -74,6 +83,7 @@ class EmpleadoService:
             tuple: (empleados, total)
         """
         query = Empleado.query
+        relevancia = None
         
         # Aplicar filtros
         if 'area' in filters and filters['area']:
@@ -87,22 +97,34 @@ class EmpleadoService:
             query = query.filter(Empleado.unidad_productiva == filters['unidad_productiva'])
         
         if 'busqueda' in filters and filters['busqueda']:
-            search_term = f"%{filters['busqueda']}%"
-            query = query.filter(
-                or_(
-                    Empleado.cedula.ilike(search_term),
-                    Empleado.nombres.ilike(search_term),
-                    Empleado.apellidos.ilike(search_term)
-                )
+            # Sin distinguir tildes ni mayúsculas, tolerando errores de escritura
+            query, relevancia = aplicar_busqueda(
+                query, filters['busqueda'], self.COLUMNAS_BUSQUEDA, self._indice_busqueda
             )
         
+        # Con búsqueda, los más relevantes primero
+        orden = [relevancia.desc()] if relevancia is not None else []
+        
         # Ejecutar consulta con paginación
-        pagination = query.order_by(Empleado.apellidos, Empleado.nombres).paginate(
+        pagination = query.order_by(*orden, Empleado.apellidos, Empleado.nombres).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return pagination.items, pagination.total
     
+    def autocompletar(self, texto, limite=10):
+        """
+        Sugerencias de empleados activos por prefijo de cédula o de nombre, desde el índice en memoria
+        
+        Args:
+            texto (str): Texto escrito por el usuario
+            limite (int): Máximo de sugerencias
+            
+        Returns:
+            list: Empleados (id, cedula, nombre_completo, area, unidad_productiva)
+        """
+        return self.autocompletado.sugerir(texto, limite)
+    
     def get_areas(self):
         """
         Obtener todas las áreas distintas de los empleados
@@ -156,6 +178,7 @@ class EmpleadoService:
         
         try:
             db.session.commit()
+            self.autocompletado.invalidar()
             return empleado, None
         except Exception as e:
             db.session.rollback()
@@ -179,6 +202,7 @@ class EmpleadoService:
         
         try:
             db.session.commit()
+            self.autocompletado.invalidar()
             return True
         except:
             db.session.rollback()
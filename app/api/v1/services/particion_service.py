@@ -0,0 +1,141 @@
+import re
+from datetime import date
+from sqlalchemy import select, text, union
+from app import db
+from app.api.v1.models.archivo_asistencia import ArchivoAsistencia
+from app.api.v1.models.cierre import PeriodoCerrado
+from app.utils.sql import dialecto_actual
+
+class ParticionService:
+    """
+    Servicio para mantener las particiones mensuales de la tabla asistencias (PostgreSQL).
+    Cada mes vive en la partición asistencias_pYYYYMM; las fechas sin partición caen en asistencias_default.
+    """
+    
+    TABLA = 'asistencias'
+    PATRON_PARTICION = re.compile(r'^asistencias_p(\d{4})(\d{2})$')
+    
+    def asegurar(self, meses_futuros=3, retencion_meses=None, hoy=None):
+        """
+        Crea las particiones del mes actual y de los próximos meses, y separa (DETACH) las
+        particiones anteriores al período de retención cuyo mes ya está cerrado o archivado; las
+        demás siguen adjuntas porque sus filas aún se consultan y aprueban. Las particiones
+        separadas se conservan como tablas independientes con sus datos.
+        
+        Args:
+            meses_futuros (int): Meses a crear por adelantado
+            retencion_meses (int, optional): Meses a mantener adjuntos, además del actual (None o 0: no separar)
+            hoy (date, optional): Fecha de referencia (por defecto la fecha actual)
+        
+        Returns:
+            dict: {creadas, separadas, retenidas} con los nombres de las particiones afectadas
+                  (retenidas: anteriores a la retención que siguen adjuntas por no estar cerradas ni archivadas)
+        
+        Raises:
+            RuntimeError: Si la base de datos no es PostgreSQL
+        """
+        if dialecto_actual() != 'postgresql':
+            raise RuntimeError('El particionamiento de asistencias solo está disponible en PostgreSQL')
+        
+        mes_actual = (hoy or date.today()).replace(day=1)
+        existentes = set(self.get_particiones())
+        creadas = []
+        separadas = []
+        retenidas = []
+        
+        try:
+            mes = mes_actual
+            for _ in range(meses_futuros + 1):
+                if mes not in existentes:
+                    creadas.append(self._crear_particion(mes))
+                mes = self._sumar_meses(mes, 1)
+            
+            if retencion_meses:
+                corte = self._sumar_meses(mes_actual, -retencion_meses)
+                cubiertos = self._meses_cubiertos()
+                for mes in sorted(existentes):
+                    if mes >= corte:
+                        continue
+                    nombre = self._nombre(mes)
+                    if mes not in cubiertos:
+                        retenidas.append(nombre)
+                        continue
+                    db.session.execute(text(f'ALTER TABLE {self.TABLA} DETACH PARTITION {nombre}'))
+                    separadas.append(nombre)
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return {'creadas': creadas, 'separadas': separadas, 'retenidas': retenidas}
+    
+    def get_particiones(self):
+        """
+        Obtiene los meses con partición adjunta a la tabla asistencias
+        
+        Returns:
+            list: Primer día de cada mes con partición, ordenados
+        """
+        nombres = db.session.execute(text("""
+            SELECT hija.relname
+            FROM pg_inherits
+            JOIN pg_class padre ON padre.oid = pg_inherits.inhparent
+            JOIN pg_class hija ON hija.oid = pg_inherits.inhrelid
+            WHERE padre.relname = :tabla
+        """), {'tabla': self.TABLA}).scalars().all()
+        
+        meses = []
+        for nombre in nombres:
+            coincidencia = self.PATRON_PARTICION.match(nombre)
+            if coincidencia:
+                meses.append(date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1))
+        return sorted(meses)
+    
+    def _meses_cubiertos(self):
+        """Meses cerrados o archivados, cuyas filas ya no se leen de la tabla"""
+        return set(db.session.execute(union(
+            select(PeriodoCerrado.periodo),
+            select(ArchivoAsistencia.periodo)
+        )).scalars())
+    
+    def _crear_particion(self, mes):
+        """Crea la partición de un mes, moviendo a ella las filas de ese mes que estén en la partición por defecto"""
+        nombre = self._nombre(mes)
+        desde = mes.isoformat()
+        hasta = self._sumar_meses(mes, 1).isoformat()
+        
+        en_default = db.session.execute(text(
+            'SELECT EXISTS (SELECT 1 FROM asistencias_default WHERE fecha >= :desde AND fecha < :hasta)'
+        ), {'desde': desde, 'hasta': hasta}).scalar()
+        
+        if not en_default:
+            db.session.execute(text(
+                f"CREATE TABLE {nombre} PARTITION OF {self.TABLA} FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+            ))
+            return nombre
+        
+        # No se puede crear una partición cuyas filas ya están en la partición por defecto:
+        # se crea como tabla independiente, se mueven las filas y luego se adjunta
+        db.session.execute(text(
+            f'CREATE TABLE {nombre} (LIKE {self.TABLA} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        db.session.execute(text(f"""
+            WITH movidas AS (
+                DELETE FROM asistencias_default WHERE fecha >= :desde AND fecha < :hasta RETURNING *
+            )
+            INSERT INTO {nombre} SELECT * FROM movidas
+        """), {'desde': desde, 'hasta': hasta})
+        db.session.execute(text(
+            f"ALTER TABLE {self.TABLA} ATTACH PARTITION {nombre} FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+        ))
+        return nombre
+    
+    def _nombre(self, mes):
+        """Nombre de la partición de un mes"""
+        return f'{self.TABLA}_p{mes:%Y%m}'
+    
+    def _sumar_meses(self, mes, meses):
+        """Suma (o resta) meses al primer día de un mes"""
+        indice = mes.year * 12 + mes.month - 1 + meses
+        return date(indice // 12, indice % 12 + 1, 1)
@@ -0,0 +1,245 @@
+import os
+import queue
+import threading
+import time as reloj
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.empleado import Empleado
+
+class PresenciaService:
+    """
+    Índice en memoria (por proceso) de los empleados presentes hoy, agrupados por unidad productiva.
+    Se alimenta de los registros de entrada/salida confirmados en este proceso y se reconstruye
+    desde las asistencias del día al primer uso, al cambiar de día y cada RESYNC_SEGUNDOS
+    (para incorporar marcaciones confirmadas por otros workers o por el proyector).
+    Los cambios se publican como deltas a los suscriptores del stream SSE.
+    
+    La consulta de reconstrucción se hace sin el lock del índice, de modo que publicar y los
+    streams no esperan a la base de datos; las reconstrucciones se serializan con su propio lock.
+    """
+    
+    # Segundos tras los cuales se reconstruye el índice desde la base de datos
+    RESYNC_SEGUNDOS = 60
+    
+    # Deltas en espera por suscriptor antes de forzar el reenvío de una instantánea
+    CAPACIDAD_SUSCRIPTOR = 1000
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()
+        self._pid = None
+        self._fecha = None
+        self._presentes = {}  # {unidad_productiva: {empleado_id: entrada}}
+        self._cargado_en = 0
+        self._suscriptores = {}  # {cola: unidad_productiva o None}
+        self._secuencia = 0  # Cambios publicados en este proceso
+        self._publicados = {}  # {empleado_id: secuencia de su último cambio publicado}
+    
+    def capturar(self, asistencias):
+        """
+        Toma el estado de presencia de asistencias modificadas en la sesión actual.
+        Debe llamarse antes del commit: tras él los objetos expiran y leerlos volvería a consultar.
+        
+        Args:
+            asistencias (list): Asistencias registradas (con su empleado ya cargado en la sesión)
+        
+        Returns:
+            list: Cambios (unidad_productiva, empleado_id, entrada o None) para publicar()
+        """
+        hoy = datetime.utcnow().date()
+        cambios = []
+        for asistencia in asistencias:
+            if asistencia is None or asistencia.fecha != hoy:
+                continue
+            empleado = asistencia.empleado
+            presente = asistencia.hora_entrada is not None and asistencia.hora_salida is None
+            cambios.append((
+                empleado.unidad_productiva,
+                empleado.id,
+                self._entrada(empleado.id, empleado.nombres, empleado.apellidos, empleado.area,
+                              empleado.unidad_productiva, asistencia.hora_entrada) if presente else None
+            ))
+        return cambios
+    
+    def publicar(self, cambios):
+        """
+        Aplica al índice los cambios ya confirmados y notifica los deltas a los suscriptores.
+        Si el índice aún no se ha cargado en este proceso no hace nada: se cargará completo al consultarlo.
+        
+        Args:
+            cambios (list): Cambios devueltos por capturar()
+        """
+        if not cambios:
+            return
+        
+        with self._lock:
+            if self._fecha is None or self._pid != os.getpid():
+                return
+            if self._fecha == datetime.utcnow().date():
+                for unidad, empleado_id, entrada in cambios:
+                    self._secuencia += 1
+                    self._publicados[empleado_id] = self._secuencia
+                    self._aplicar(unidad, empleado_id, entrada)
+                return
+        
+        # Cambió el día: la reconstrucción ya incluye estos registros
+        self._asegurar_cargado()
+    
+    def get_snapshot(self, unidad_productiva=None):
+        """
+        Obtiene los empleados presentes hoy
+        
+        Args:
+            unidad_productiva (str, optional): Limitar a una unidad productiva
+        
+        Returns:
+            dict: {fecha, total, unidades: {unidad: {total, empleados}}}
+        """
+        self._asegurar_cargado()
+        
+        with self._lock:
+            unidades = {}
+            for unidad, presentes in self._presentes.items():
+                if unidad_productiva and unidad != unidad_productiva:
+                    continue
+                if not presentes:
+                    continue
+                empleados = sorted(presentes.values(), key=lambda e: (e['apellidos'], e['nombres']))
+                unidades[unidad] = {'total': len(empleados), 'empleados': empleados}
+            
+            return {
+                'fecha': self._fecha.isoformat(),
+                'total': sum(u['total'] for u in unidades.values()),
+                'unidades': unidades
+            }
+    
+    def sincronizar(self):
+        """Reconstruye el índice si venció su vigencia (lo invoca el stream en cada heartbeat)"""
+        self._asegurar_cargado()
+    
+    def suscribir(self, unidad_productiva=None):
+        """
+        Registra un suscriptor de deltas de presencia
+        
+        Args:
+            unidad_productiva (str, optional): Recibir solo los deltas de esta unidad
+        
+        Returns:
+            queue.Queue: Cola de la que leer los deltas
+        """
+        cola = queue.Queue(maxsize=self.CAPACIDAD_SUSCRIPTOR)
+        with self._lock:
+            self._suscriptores[cola] = unidad_productiva
+        return cola
+    
+    def cancelar(self, cola):
+        """Elimina un suscriptor"""
+        with self._lock:
+            self._suscriptores.pop(cola, None)
+    
+    def _asegurar_cargado(self):
+        """Reconstruye el índice si no existe, es de otro día/proceso o venció; no debe tenerse el lock"""
+        hoy = datetime.utcnow().date()
+        with self._lock:
+            if self._vigente(hoy):
+                return
+            disponible = self._pid == os.getpid() and self._fecha == hoy
+        
+        # Con un índice del día ya cargado no se espera a otra reconstrucción en curso
+        if not self._lock_carga.acquire(blocking=not disponible):
+            return
+        try:
+            with self._lock:
+                if self._vigente(hoy):
+                    return
+                inicio = self._secuencia
+            
+            consulta = select(
+                Empleado.id, Empleado.nombres, Empleado.apellidos, Empleado.area,
+                Empleado.unidad_productiva, Asistencia.hora_entrada
+            ).join(Asistencia, Asistencia.empleado_id == Empleado.id).where(
+                Asistencia.fecha == hoy,
+                Asistencia.hora_entrada.isnot(None),
+                Asistencia.hora_salida.is_(None)
+            )
+            
+            # Conexión propia para no dejar abierta una transacción en la sesión del request (o del stream)
+            with db.engine.connect() as conexion:
+                filas = conexion.execute(consulta).all()
+            
+            nuevos = {}
+            for fila in filas:
+                nuevos.setdefault(fila.unidad_productiva, {})[fila.id] = self._entrada(*fila)
+            
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Proceso recién creado (fork): no hay suscriptores heredados que notificar
+                    self._suscriptores = {}
+                    self._presentes = nuevos
+                else:
+                    # Publicar como deltas las diferencias con el índice anterior, salvo las de empleados
+                    # cuyo cambio se publicó durante la consulta (el índice ya tiene el estado más reciente)
+                    for unidad in set(self._presentes) | set(nuevos):
+                        anteriores = self._presentes.get(unidad, {})
+                        actuales = nuevos.get(unidad, {})
+                        for empleado_id in set(anteriores) | set(actuales):
+                            if self._publicados.get(empleado_id, 0) > inicio:
+                                continue
+                            if anteriores.get(empleado_id) != actuales.get(empleado_id):
+                                self._aplicar(unidad, empleado_id, actuales.get(empleado_id))
+                
+                self._publicados = {}
+                self._pid = os.getpid()
+                self._fecha = hoy
+                self._cargado_en = reloj.monotonic()
+        finally:
+            self._lock_carga.release()
+    
+    def _vigente(self, hoy):
+        """Indica si el índice es de este proceso y día y no ha vencido; requiere el lock"""
+        return (self._pid == os.getpid() and self._fecha == hoy
+                and reloj.monotonic() - self._cargado_en < self.RESYNC_SEGUNDOS)
+    
+    def _aplicar(self, unidad, empleado_id, entrada):
+        """Actualiza el índice y notifica el delta si el estado cambió; requiere el lock"""
+        presentes = self._presentes.setdefault(unidad, {})
+        if presentes.get(empleado_id) == entrada:
+            return
+        
+        if entrada:
+            presentes[empleado_id] = entrada
+            delta = {'tipo': 'presente', 'unidad_productiva': unidad, 'empleado': entrada}
+        else:
+            presentes.pop(empleado_id, None)
+            delta = {'tipo': 'ausente', 'unidad_productiva': unidad, 'empleado': {'id': empleado_id}}
+        
+        for cola, filtro in self._suscriptores.items():
+            if filtro and filtro != unidad:
+                continue
+            try:
+                cola.put_nowait(delta)
+            except queue.Full:
+                # Suscriptor demasiado lento: descartar sus deltas y pedirle una instantánea nueva
+                self._vaciar(cola)
+                cola.put_nowait({'tipo': 'reinicio'})
+    
+    def _vaciar(self, cola):
+        """Descarta los deltas pendientes de una cola"""
+        try:
+            while True:
+                cola.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def _entrada(self, empleado_id, nombres, apellidos, area, unidad_productiva, hora_entrada):
+        """Representación de un empleado presente en el índice"""
+        return {
+            'id': empleado_id,
+            'nombres': nombres,
+            'apellidos': apellidos,
+            'area': area,
+            'unidad_productiva': unidad_productiva,
+            'hora_entrada': hora_entrada.strftime('%H:%M:%S') if hora_entrada else None
+        }
@@ -0,0 +1,140 @@
+from datetime import datetime
+from sqlalchemy import update
+from app import db
+from app.api.v1.models.marcacion import Marcacion, Proyeccion
+
+class ProyeccionService:
+    """
+    Proyector de marcaciones: aplica por lotes las marcaciones pendientes sobre las asistencias
+    y las marca como proyectadas en la misma transacción. No se usa solo una marca de agua por ID
+    porque una marcación con ID menor puede confirmarse después de otra mayor y se perdería.
+    Las marcaciones de días procesados, meses cerrados o archivados se rechazan, igual que en
+    la sincronización de kioscos, también al reproyectar el historial.
+    """
+    
+    NOMBRE = 'asistencias'
+    
+    # Marcaciones procesadas por lote
+    TAMANO_LOTE = 1000
+    
+    def __init__(self, asistencia_service):
+        self.asistencia_service = asistencia_service
+    
+    def proyectar(self, tamano_lote=None):
+        """
+        Proyecta el siguiente lote de marcaciones pendientes sobre las asistencias
+        
+        Args:
+            tamano_lote (int, optional): Número máximo de marcaciones a procesar
+            
+        Returns:
+            dict: Estadísticas {procesadas, aplicadas, rechazadas, ultimo_id, rechazos}
+        """
+        tamano_lote = tamano_lote or self.TAMANO_LOTE
+        
+        try:
+            # Bloquear la fila del proyector para que dos proyectores no apliquen el mismo lote
+            proyeccion = self._get_proyeccion(bloquear=True)
+            
+            marcaciones = Marcacion.query.filter(
+                Marcacion.proyectada == False
+            ).order_by(Marcacion.id).limit(tamano_lote).all()
+            
+            if not marcaciones:
+                db.session.rollback()
+                return {'procesadas': 0, 'aplicadas': 0, 'rechazadas': 0,
+                        'ultimo_id': proyeccion.ultimo_id, 'rechazos': []}
+            
+            registros = [
+                {
+                    'marcacion_id': m.id,
+                    'empleado_id': m.empleado_id,
+                    'tipo_registro': m.tipo_registro,
+                    'observaciones': m.observaciones,
+                    'fecha': m.marcado_en.date(),
+                    'hora': m.marcado_en.time()
+                }
+                for m in marcaciones
+            ]
+            
+            resultados = self.asistencia_service.aplicar_registros_permitidos(registros)
+            
+            if self.asistencia_service.hay_cierre_concurrente(resultados):
+                # El mes ya se ve cerrado: al repetir el lote sus marcaciones se rechazan
+                db.session.rollback()
+                return self.proyectar(tamano_lote)
+            
+            db.session.execute(
+                update(Marcacion)
+                .where(Marcacion.id.in_([m.id for m in marcaciones]))
+                .values(proyectada=True)
+                .execution_options(synchronize_session=False)
+            )
+            proyeccion.ultimo_id = max(proyeccion.ultimo_id, marcaciones[-1].id)
+            proyeccion.actualizado_en = datetime.utcnow()
+            
+            self.asistencia_service.confirmar_registros(resultados)
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        rechazos = [
+            {'marcacion_id': registro['marcacion_id'], 'error': error}
+            for registro, asistencia, mensaje, error in resultados if error
+        ]
+        
+        return {
+            'procesadas': len(resultados),
+            'aplicadas': len(resultados) - len(rechazos),
+            'rechazadas': len(rechazos),
+            'ultimo_id': proyeccion.ultimo_id,
+            'rechazos': rechazos
+        }
+    
+    def reiniciar(self, ultimo_id=0):
+        """
+        Marca como pendientes las marcaciones posteriores a un ID para volver a proyectarlas.
+        Las asistencias derivadas del rango a reproyectar deben depurarse antes.
+        
+        Args:
+            ultimo_id (int): Última marcación considerada ya proyectada
+        """
+        try:
+            proyeccion = self._get_proyeccion(bloquear=True)
+            db.session.execute(
+                update(Marcacion)
+                .where(Marcacion.id > ultimo_id)
+                .values(proyectada=False)
+                .execution_options(synchronize_session=False)
+            )
+            proyeccion.ultimo_id = ultimo_id
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def get_estado(self):
+        """
+        Obtiene el estado del proyector
+        
+        Returns:
+            dict: {ultimo_id, pendientes} con el mayor ID proyectado y las marcaciones por proyectar
+        """
+        proyeccion = Proyeccion.query.get(self.NOMBRE)
+        ultimo_id = proyeccion.ultimo_id if proyeccion else 0
+        pendientes = Marcacion.query.filter(Marcacion.proyectada == False).count()
+        return {'ultimo_id': ultimo_id, 'pendientes': pendientes}
+    
+    def _get_proyeccion(self, bloquear=False):
+        """Obtiene (o crea) la fila de estado del proyector"""
+        query = Proyeccion.query.filter_by(nombre=self.NOMBRE)
+        if bloquear:
+            query = query.with_for_update()
+        proyeccion = query.first()
+        
+        if not proyeccion:
+            proyeccion = Proyeccion(nombre=self.NOMBRE, ultimo_id=0)
+            db.session.add(proyeccion)
+            db.session.flush()
+        
+        return proyeccion
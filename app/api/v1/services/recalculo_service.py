@@ -0,0 +1,143 @@
+import time as reloj
+import numpy as np
+from sqlalchemy import select, update, values, column, Integer, Float
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.empleado import Empleado
+from app.utils.horas import segundos_del_dia
+from app.utils.sql import dialecto_actual
+
+class RecalculoService:
+    """Servicio para recalcular masivamente horas trabajadas y extras"""
+    
+    # Filas leídas y escritas por lote
+    TAMANO_LOTE = 5000
+    
+    def __init__(self, resumen_service, regla_horas_service, cierre_service, cache_reportes):
+        self.resumen_service = resumen_service
+        self.regla_horas_service = regla_horas_service
+        self.cierre_service = cierre_service
+        self.cache_reportes = cache_reportes
+    
+    def recalcular_horas(self, fecha_inicio, fecha_fin, tamano_lote=None):
+        """
+        Recalcula horas_trabajadas y horas_extras de las asistencias de un período.
+        Lee por lotes (keyset sobre id), calcula con operaciones vectorizadas aplicando la
+        regla de horas de la unidad/área de cada empleado y escribe solo las filas cuyo valor cambió.
+        Los meses cerrados se omiten: sus totales están congelados en el cierre.
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período
+            tamano_lote (int, optional): Filas por lote
+            
+        Returns:
+            dict: Estadísticas {procesadas, actualizadas, segundos, filas_por_segundo}
+        """
+        tamano_lote = tamano_lote or self.TAMANO_LOTE
+        inicio = reloj.perf_counter()
+        procesadas = 0
+        actualizadas = 0
+        ultimo_id = 0
+        
+        try:
+            while True:
+                filas = db.session.execute(
+                    select(
+                        Asistencia.id,
+                        Asistencia.fecha,
+                        Asistencia.hora_entrada,
+                        Asistencia.hora_salida,
+                        Asistencia.horas_trabajadas,
+                        Asistencia.horas_extras,
+                        Empleado.unidad_productiva,
+                        Empleado.area
+                    ).join(Empleado, Empleado.id == Asistencia.empleado_id).where(
+                        Asistencia.fecha.between(fecha_inicio, fecha_fin),
+                        Asistencia.id > ultimo_id,
+                        self.cierre_service.condicion_abierta(Asistencia.fecha)
+                    ).order_by(Asistencia.id).limit(tamano_lote)
+                ).all()
+                
+                if not filas:
+                    break
+                
+                n = len(filas)
+                ids = np.fromiter((f.id for f in filas), dtype=np.int64, count=n)
+                ordinales = np.fromiter((f.fecha.toordinal() for f in filas), dtype=np.int64, count=n)
+                entrada = np.fromiter((segundos_del_dia(f.hora_entrada) for f in filas), dtype=np.float64, count=n)
+                salida = np.fromiter((segundos_del_dia(f.hora_salida) for f in filas), dtype=np.float64, count=n)
+                actuales_trab = np.fromiter((f.horas_trabajadas or 0 for f in filas), dtype=np.float64, count=n)
+                actuales_ext = np.fromiter((f.horas_extras or 0 for f in filas), dtype=np.float64, count=n)
+                
+                # Un cálculo vectorizado por cada combinación de unidad y área del lote
+                grupos = {}
+                grupo = np.fromiter(
+                    (grupos.setdefault((f.unidad_productiva, f.area), len(grupos)) for f in filas),
+                    dtype=np.int64, count=n
+                )
+                trabajadas = np.zeros(n)
+                extras = np.zeros(n)
+                for (unidad_productiva, area), indice in grupos.items():
+                    seleccion = grupo == indice
+                    evaluador = self.regla_horas_service.get_evaluador(unidad_productiva, area)
+                    trabajadas[seleccion], extras[seleccion] = evaluador.calcular_lote(
+                        ordinales[seleccion], entrada[seleccion], salida[seleccion])
+                
+                # Solo se escriben las filas cuyo resultado difiere del almacenado
+                cambio = ~(np.isclose(trabajadas, actuales_trab) & np.isclose(extras, actuales_ext))
+                if cambio.any():
+                    self._escribir_lote(ids[cambio], trabajadas[cambio], extras[cambio])
+                    actualizadas += int(cambio.sum())
+                
+                procesadas += n
+                ultimo_id = int(ids[-1])
+            
+            # Los reportes en caché y la caché del mes en curso de cada worker vuelven a leer el período
+            if actualizadas:
+                self.cache_reportes.registrar_rango(fecha_inicio, fecha_fin)
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        # Las horas de asistencias aprobadas alimentan el resumen mensual
+        if actualizadas:
+            self.resumen_service.reconstruir(fecha_inicio, fecha_fin)
+        
+        segundos = reloj.perf_counter() - inicio
+        return {
+            'procesadas': procesadas,
+            'actualizadas': actualizadas,
+            'segundos': round(segundos, 3),
+            'filas_por_segundo': round(procesadas / segundos, 1) if segundos > 0 else procesadas
+        }
+    
+    def _escribir_lote(self, ids, trabajadas, extras):
+        """
+        Escribe un lote de horas recalculadas.
+        En PostgreSQL usa un único UPDATE ... FROM (VALUES ...); en otros motores, UPDATE por id en executemany.
+        """
+        filas = [
+            (int(i), float(t), float(e))
+            for i, t, e in zip(ids.tolist(), trabajadas.tolist(), extras.tolist())
+        ]
+        
+        if dialecto_actual() == 'postgresql':
+            nuevos = values(
+                column('id', Integer),
+                column('horas_trabajadas', Float),
+                column('horas_extras', Float),
+                name='nuevos'
+            ).data(filas)
+            db.session.execute(
+                update(Asistencia.__table__)
+                .where(Asistencia.__table__.c.id == nuevos.c.id)
+                .values(horas_trabajadas=nuevos.c.horas_trabajadas, horas_extras=nuevos.c.horas_extras)
+            )
+        else:
+            db.session.execute(
+                update(Asistencia),
+                [{'id': i, 'horas_trabajadas': t, 'horas_extras': e} for i, t, e in filas]
+            )
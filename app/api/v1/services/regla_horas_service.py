@@ -0,0 +1,206 @@
+import threading
+import time as reloj
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.regla_horas import ReglaHoras
+from app.api.v1.schemas import validate_data, regla_horas_schema
+from app.utils.horas import EvaluadorHoras
+
+class ReglaHorasService:
+    """
+    Servicio de reglas de cálculo de horas por unidad productiva y área.
+    Las reglas se compilan una vez en evaluadores (EvaluadorHoras) que se mantienen en memoria,
+    de modo que calcular las horas de una marcación no consulta la base de datos.
+    A un empleado se le aplica la regla más específica: unidad y área, solo unidad, solo área
+    o la regla general; sin ninguna, la jornada normal de Asistencia.
+    
+    Los cambios de reglas se registran en invalidaciones_reporte, por lo que los demás procesos
+    descartan sus evaluadores en cuanto sincronizan (como máximo cada
+    CacheReportes.INTERVALO_SINCRONIZACION segundos).
+    """
+    
+    # Segundos tras los cuales se recargan las reglas aunque no se haya leído ningún cambio
+    CACHE_TTL = 300
+    
+    def __init__(self, cache_reportes):
+        self.cache_reportes = cache_reportes
+        self._lock = threading.Lock()
+        self._reglas = None  # {(unidad_productiva, area): evaluador} de las reglas registradas
+        self._resueltos = {}  # {(unidad_productiva, area): evaluador} ya resueltos por empleado
+        self._cargado_en = 0
+        self._generacion = 0  # Cambia con cada invalidación; una carga anterior no se guarda
+        self._por_defecto = EvaluadorHoras(Asistencia.JORNADA_NORMAL)
+        
+        # Cualquier cambio en la tabla, desde este u otro proceso, invalida los evaluadores
+        self.cache_reportes.vigilar(ReglaHoras, self.invalidar)
+    
+    def invalidar(self):
+        """Descarta los evaluadores compilados; se recompilarán en la próxima consulta"""
+        with self._lock:
+            self._reglas = None
+            self._resueltos = {}
+            self._generacion += 1
+    
+    def get_evaluador(self, unidad_productiva, area):
+        """
+        Obtiene el evaluador de horas que corresponde a un empleado
+        
+        Args:
+            unidad_productiva (str): Unidad productiva del empleado
+            area (str): Área del empleado
+        
+        Returns:
+            EvaluadorHoras: Evaluador compilado de la regla más específica
+        """
+        self.cache_reportes.sincronizar()
+        
+        clave = (unidad_productiva, area)
+        with self._lock:
+            if self._reglas is not None and reloj.monotonic() - self._cargado_en < self.CACHE_TTL:
+                evaluador = self._resueltos.get(clave)
+                if evaluador is not None:
+                    return evaluador
+                reglas = self._reglas
+            else:
+                reglas = None
+        
+        if reglas is None:
+            reglas = self._cargar()
+        
+        evaluador = (reglas.get((unidad_productiva, area)) or reglas.get((unidad_productiva, None))
+                     or reglas.get((None, area)) or reglas.get((None, None)) or self._por_defecto)
+        
+        with self._lock:
+            if self._reglas is reglas:
+                self._resueltos[clave] = evaluador
+        return evaluador
+    
+    def _cargar(self):
+        """Lee y compila todas las reglas; solo las guarda si no hubo una invalidación mientras tanto"""
+        with self._lock:
+            generacion = self._generacion
+        
+        reglas = {
+            (regla.unidad_productiva, regla.area): EvaluadorHoras(
+                regla.jornada_normal, regla.jornada_sabado,
+                regla.nocturno_inicio, regla.nocturno_fin, regla.recargo_nocturno
+            )
+            for regla in ReglaHoras.query.all()
+        }
+        
+        with self._lock:
+            if self._generacion == generacion:
+                self._reglas = reglas
+                self._resueltos = {}
+                self._cargado_en = reloj.monotonic()
+        return reglas
+    
+    def get_reglas(self):
+        """
+        Obtener las reglas registradas
+        
+        Returns:
+            list: Reglas ordenadas por unidad productiva y área
+        """
+        return ReglaHoras.query.order_by(ReglaHoras.unidad_productiva, ReglaHoras.area).all()
+    
+    def create_regla(self, data):
+        """
+        Registrar una regla de horas
+        
+        Args:
+            data (dict): Datos de la regla (unidad_productiva, area, jornada_normal, jornada_sabado,
+                         nocturno_inicio, nocturno_fin, recargo_nocturno)
+        
+        Returns:
+            tuple: (regla, None) si la creación es exitosa, (None, error) si hay error
+        """
+        validated_data, errors = validate_data(regla_horas_schema, data)
+        if errors:
+            return None, errors
+        
+        if self._buscar(validated_data.get('unidad_productiva'), validated_data.get('area')):
+            return None, {'regla': ['Ya existe una regla para esta unidad productiva y área']}
+        
+        regla = ReglaHoras(**validated_data)
+        
+        try:
+            db.session.add(regla)
+            db.session.commit()
+            self.invalidar()
+            return regla, None
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+    
+    def update_regla(self, regla_id, data):
+        """
+        Actualizar una regla de horas
+        
+        Args:
+            regla_id (int): ID de la regla
+            data (dict): Datos a actualizar
+        
+        Returns:
+            tuple: (regla, None) si la actualización es exitosa, (None, error) si hay error
+        """
+        regla = ReglaHoras.query.get(regla_id)
+        if not regla:
+            return None, {'regla': ['Regla no encontrada']}
+        
+        validated_data, errors = validate_data(regla_horas_schema, data, partial=True)
+        if errors:
+            return None, errors
+        
+        unidad_productiva = validated_data.get('unidad_productiva', regla.unidad_productiva)
+        area = validated_data.get('area', regla.area)
+        existente = self._buscar(unidad_productiva, area)
+        if existente and existente.id != regla.id:
+            return None, {'regla': ['Ya existe una regla para esta unidad productiva y área']}
+        
+        for key, value in validated_data.items():
+            setattr(regla, key, value)
+        
+        # El recargo debe quedar con su franja completa también tras una actualización parcial
+        if regla.recargo_nocturno and (not regla.nocturno_inicio or not regla.nocturno_fin):
+            db.session.rollback()
+            return None, {'recargo_nocturno': ['El recargo nocturno requiere nocturno_inicio y nocturno_fin']}
+        
+        try:
+            db.session.commit()
+            self.invalidar()
+            return regla, None
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+    
+    def delete_regla(self, regla_id):
+        """
+        Eliminar una regla de horas
+        
+        Args:
+            regla_id (int): ID de la regla
+        
+        Returns:
+            bool: True si la eliminación es exitosa, False si no existe o hay error
+        """
+        regla = ReglaHoras.query.get(regla_id)
+        if not regla:
+            return False
+        
+        try:
+            db.session.delete(regla)
+            db.session.commit()
+            self.invalidar()
+            return True
+        except Exception:
+            db.session.rollback()
+            return False
+    
+    def _buscar(self, unidad_productiva, area):
+        """Busca la regla de una combinación de unidad productiva y área (comparando también los nulos)"""
+        return ReglaHoras.query.filter(
+            ReglaHoras.unidad_productiva.is_(None) if unidad_productiva is None
+            else ReglaHoras.unidad_productiva == unidad_productiva,
+            ReglaHoras.area.is_(None) if area is None else ReglaHoras.area == area
+        ).first()
@@ -0,0 +1,258 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, union_all, insert, delete, and_, Integer, Float, values, column
+from app import db
+from app.api.v1.models.asistencia import Asistencia
+from app.api.v1.models.resumen_asistencia import ResumenAsistencia
+from app.api.v1.models.archivo_asistencia import ArchivoAsistencia
+from app.api.v1.models.cierre import PeriodoCerrado, Cierre
+from app.utils.sql import insert_con_conflicto, inicio_de_mes, dialecto_actual
+
+class ResumenService:
+    """Servicio para mantener y consultar los totales mensuales de asistencias aprobadas"""
+    
+    def __init__(self, cache_reportes, archivo_service):
+        self.cache_reportes = cache_reportes
+        self.archivo_service = archivo_service
+    
+    def acumular(self, asistencias):
+        """
+        Suma al resumen mensual asistencias que acaban de pasar a 'Aprobado'.
+        No confirma la transacción: debe llamarse dentro de la misma transacción que la aprobación.
+        
+        Args:
+            asistencias (iterable): Objetos con empleado_id, fecha, horas_trabajadas y horas_extras
+        """
+        incrementos = defaultdict(lambda: [0.0, 0.0, 0])
+        for asistencia in asistencias:
+            clave = (asistencia.empleado_id, asistencia.fecha.replace(day=1))
+            incrementos[clave][0] += asistencia.horas_trabajadas or 0
+            incrementos[clave][1] += asistencia.horas_extras or 0
+            incrementos[clave][2] += 1
+        
+        if not incrementos:
+            return
+        
+        ahora = datetime.utcnow()
+        insert_upsert = insert_con_conflicto()
+        
+        if insert_upsert is None:
+            self._acumular_sin_upsert(incrementos, ahora)
+            return
+        
+        stmt = insert_upsert(ResumenAsistencia).values([
+            {
+                'empleado_id': empleado_id,
+                'periodo': periodo,
+                'horas_trabajadas': trabajadas,
+                'horas_extras': extras,
+                'dias_asistidos': dias,
+                'actualizado_en': ahora
+            }
+            for (empleado_id, periodo), (trabajadas, extras, dias) in incrementos.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['empleado_id', 'periodo'],
+            set_={
+                'horas_trabajadas': ResumenAsistencia.horas_trabajadas + stmt.excluded.horas_trabajadas,
+                'horas_extras': ResumenAsistencia.horas_extras + stmt.excluded.horas_extras,
+                'dias_asistidos': ResumenAsistencia.dias_asistidos + stmt.excluded.dias_asistidos,
+                'actualizado_en': stmt.excluded.actualizado_en
+            }
+        )
+        db.session.execute(stmt)
+    
+    def _acumular_sin_upsert(self, incrementos, ahora):
+        """Acumulación por lectura y escritura para motores sin ON CONFLICT"""
+        for (empleado_id, periodo), (trabajadas, extras, dias) in incrementos.items():
+            resumen = ResumenAsistencia.query.filter_by(empleado_id=empleado_id, periodo=periodo).first()
+            if not resumen:
+                resumen = ResumenAsistencia(empleado_id=empleado_id, periodo=periodo,
+                                            horas_trabajadas=0, horas_extras=0, dias_asistidos=0)
+                db.session.add(resumen)
+            resumen.horas_trabajadas += trabajadas
+            resumen.horas_extras += extras
+            resumen.dias_asistidos += dias
+            resumen.actualizado_en = ahora
+    
+    def reconstruir(self, fecha_inicio=None, fecha_fin=None):
+        """
+        Reconstruye el resumen mensual desde las asistencias aprobadas.
+        El rango se amplía a meses completos. Los meses archivados se conservan tal cual:
+        sus asistencias ya no están en la tabla.
+        
+        Args:
+            fecha_inicio (date, optional): Inicio del rango a reconstruir (todo el histórico si es None)
+            fecha_fin (date, optional): Fin del rango a reconstruir (todo el histórico si es None)
+            
+        Returns:
+            int: Número de filas de resumen generadas
+        """
+        desde = fecha_inicio.replace(day=1) if fecha_inicio else None
+        hasta = self._fin_de_mes(fecha_fin) if fecha_fin else None
+        
+        borrar = delete(ResumenAsistencia)
+        periodo = inicio_de_mes(Asistencia.fecha)
+        seleccion = select(
+            Asistencia.empleado_id,
+            periodo,
+            func.sum(func.coalesce(Asistencia.horas_trabajadas, 0)),
+            func.sum(func.coalesce(Asistencia.horas_extras, 0)),
+            func.count(Asistencia.id),
+            func.current_timestamp()
+        ).where(Asistencia.estado == 'Aprobado').group_by(Asistencia.empleado_id, periodo)
+        
+        archivados = select(ArchivoAsistencia.periodo).distinct()
+        borrar = borrar.where(ResumenAsistencia.periodo.notin_(archivados))
+        seleccion = seleccion.where(periodo.notin_(archivados))
+        
+        if desde:
+            borrar = borrar.where(ResumenAsistencia.periodo >= desde)
+            seleccion = seleccion.where(Asistencia.fecha >= desde)
+        if hasta:
+            borrar = borrar.where(ResumenAsistencia.periodo <= hasta)
+            seleccion = seleccion.where(Asistencia.fecha <= hasta)
+        
+        try:
+            db.session.execute(borrar)
+            self.cache_reportes.registrar_rango(desde, hasta)
+            resultado = db.session.execute(
+                insert(ResumenAsistencia).from_select(
+                    ['empleado_id', 'periodo', 'horas_trabajadas', 'horas_extras', 'dias_asistidos', 'actualizado_en'],
+                    seleccion
+                )
+            )
+            db.session.commit()
+            return resultado.rowcount
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def totales_por_empleado(self, fecha_inicio, fecha_fin, usar_cierres=True, empleado_ids=None):
+        """
+        Subconsulta de totales aprobados por empleado en un período.
+        Los meses completos se leen del resumen (o de sus totales congelados, si el mes está cerrado)
+        y solo los extremos parciales de la tabla de asistencias (y del archivo, si esos meses están archivados).
+        
+        Args:
+            fecha_inicio (date): Fecha de inicio del período
+            fecha_fin (date): Fecha fin del período
+            usar_cierres (bool): Leer los meses cerrados de cierres en lugar del resumen
+            empleado_ids (list, optional): Limitar a estos empleados (también la lectura del archivo)
+            
+        Returns:
+            Subquery: Columnas empleado_id, total_trabajadas, total_extras, dias_asistidos
+        """
+        partes = []
+        rangos_crudos = [(fecha_inicio, fecha_fin)]
+        
+        meses_completos = self._meses_completos(fecha_inicio, fecha_fin)
+        if meses_completos:
+            primer_mes, ultimo_mes = meses_completos
+            resumen = select(
+                ResumenAsistencia.empleado_id.label('empleado_id'),
+                ResumenAsistencia.horas_trabajadas.label('horas_trabajadas'),
+                ResumenAsistencia.horas_extras.label('horas_extras'),
+                ResumenAsistencia.dias_asistidos.label('dias_asistidos')
+            ).where(ResumenAsistencia.periodo.between(primer_mes, ultimo_mes))
+            if empleado_ids is not None:
+                resumen = resumen.where(ResumenAsistencia.empleado_id.in_(empleado_ids))
+            
+            if usar_cierres:
+                # Los meses cerrados aportan sus totales congelados y se excluyen del resumen
+                resumen = resumen.where(ResumenAsistencia.periodo.notin_(
+                    select(PeriodoCerrado.periodo).where(PeriodoCerrado.periodo.between(primer_mes, ultimo_mes))
+                ))
+                cerrados = select(
+                    Cierre.empleado_id.label('empleado_id'),
+                    Cierre.horas_trabajadas.label('horas_trabajadas'),
+                    Cierre.horas_extras.label('horas_extras'),
+                    Cierre.dias_asistidos.label('dias_asistidos')
+                ).where(Cierre.periodo.between(primer_mes, ultimo_mes))
+                if empleado_ids is not None:
+                    cerrados = cerrados.where(Cierre.empleado_id.in_(empleado_ids))
+                partes.append(cerrados)
+            partes.append(resumen)
+            
+            rangos_crudos = []
+            if fecha_inicio < primer_mes:
+                rangos_crudos.append((fecha_inicio, primer_mes - timedelta(days=1)))
+            fin_cubierto = self._fin_de_mes(ultimo_mes)
+            if fecha_fin > fin_cubierto:
+                rangos_crudos.append((fin_cubierto + timedelta(days=1), fecha_fin))
+        
+        for desde, hasta in rangos_crudos:
+            crudos = select(
+                Asistencia.empleado_id.label('empleado_id'),
+                func.sum(Asistencia.horas_trabajadas).label('horas_trabajadas'),
+                func.sum(Asistencia.horas_extras).label('horas_extras'),
+                func.count(Asistencia.id).label('dias_asistidos')
+            ).where(
+                and_(
+                    Asistencia.fecha.between(desde, hasta),
+                    Asistencia.estado == 'Aprobado'
+                )
+            )
+            if empleado_ids is not None:
+                crudos = crudos.where(Asistencia.empleado_id.in_(empleado_ids))
+            partes.append(crudos.group_by(Asistencia.empleado_id))
+            
+            archivadas = self.archivo_service.totales_por_empleado(desde, hasta, empleado_ids)
+            if archivadas:
+                partes.append(self._select_totales(archivadas))
+        
+        fuente = union_all(*partes).subquery() if len(partes) > 1 else partes[0].subquery()
+        
+        return select(
+            fuente.c.empleado_id,
+            func.sum(fuente.c.horas_trabajadas).label('total_trabajadas'),
+            func.sum(fuente.c.horas_extras).label('total_extras'),
+            func.sum(fuente.c.dias_asistidos).cast(Integer).label('dias_asistidos')
+        ).group_by(fuente.c.empleado_id).subquery()
+    
+    def _select_totales(self, totales):
+        """Select de totales (empleado_id, horas_trabajadas, horas_extras, dias_asistidos) calculados fuera de la base de datos"""
+        if dialecto_actual() == 'postgresql':
+            return select(values(
+                column('empleado_id', Integer),
+                column('horas_trabajadas', Float),
+                column('horas_extras', Float),
+                column('dias_asistidos', Integer),
+                name='archivadas'
+            ).data(totales))
+        
+        # Otros motores: las filas viajan como un único parámetro JSON
+        filas = func.json_each(json.dumps(totales)).table_valued('value')
+        return select(
+            func.json_extract(filas.c.value, '$[0]').cast(Integer).label('empleado_id'),
+            func.json_extract(filas.c.value, '$[1]').cast(Float).label('horas_trabajadas'),
+            func.json_extract(filas.c.value, '$[2]').cast(Float).label('horas_extras'),
+            func.json_extract(filas.c.value, '$[3]').cast(Integer).label('dias_asistidos')
+        )
+    
+    def _meses_completos(self, fecha_inicio, fecha_fin):
+        """
+        Obtiene el primer y último mes (como primer día del mes) totalmente contenidos en el período
+        
+        Returns:
+            tuple or None: (primer_mes, ultimo_mes) o None si el período no contiene meses completos
+        """
+        if fecha_inicio.day == 1:
+            primer_mes = fecha_inicio
+        else:
+            primer_mes = self._fin_de_mes(fecha_inicio) + timedelta(days=1)
+        
+        if fecha_fin == self._fin_de_mes(fecha_fin):
+            ultimo_mes = fecha_fin.replace(day=1)
+        else:
+            ultimo_mes = (fecha_fin.replace(day=1) - timedelta(days=1)).replace(day=1)
+        
+        if primer_mes > ultimo_mes:
+            return None
+        return primer_mes, ultimo_mes
+    
+    def _fin_de_mes(self, fecha):
+        """Último día del mes de una fecha"""
+        siguiente = fecha.replace(day=28) + timedelta(days=4)
+        return siguiente - timedelta(days=siguiente.day)
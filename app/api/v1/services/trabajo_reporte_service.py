@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete
+from app import db
+from app.api.v1.models.trabajo_reporte import TrabajoReporte
+from app.api.v1.schemas import validate_data, reporte_trabajo_schema
+
+# Aplicación del proceso hijo del pool (se crea una vez por proceso)
+_app_proceso = None
+
+def _inicializar_proceso():
+    """Inicializador de cada proceso del pool: crea su propia aplicación y conexiones"""
+    global _app_proceso
+    from app import create_app
+    _app_proceso = create_app()
+
+def _ejecutar_trabajo(trabajo_id):
+    """Punto de entrada en el proceso hijo"""
+    with _app_proceso.app_context():
+        from app.api.v1.services import trabajo_reporte_service
+        trabajo_reporte_service.ejecutar(trabajo_id)
+
+class TrabajoReporteService:
+    """
+    Servicio para generar reportes de asistencias en segundo plano.
+    Los trabajos se registran en la tabla trabajos_reporte y se ejecutan en un pool de
+    procesos local (uno por worker, con inicio 'spawn'), fuera del timeout de la petición.
+    """
+    
+    # Tiempo tras el cual un trabajo sin terminar se considera interrumpido
+    TIEMPO_MAXIMO = timedelta(hours=1)
+    
+    # Antigüedad a partir de la cual se eliminan los trabajos
+    RETENCION = timedelta(days=7)
+    
+    def __init__(self, asistencia_service):
+        self.asistencia_service = asistencia_service
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+    
+    def crear_trabajo(self, usuario_id, data):
+        """
+        Registrar un trabajo de reporte y enviarlo al pool de procesos
+        
+        Args:
+            usuario_id (int): ID del usuario que solicita el reporte
+            data (dict): Parámetros del reporte (fecha_inicio, fecha_fin, area, unidad_productiva)
+        
+        Returns:
+            tuple: (trabajo, None) si se encoló, (None, error) si hay error
+        """
+        # Validar datos de entrada
+        validated_data, errors = validate_data(reporte_trabajo_schema, data)
+        if errors:
+            return None, errors
+        
+        parametros = {
+            'fecha_inicio': validated_data['fecha_inicio'].isoformat(),
+            'fecha_fin': validated_data['fecha_fin'].isoformat(),
+            'area': validated_data.get('area'),
+            'unidad_productiva': validated_data.get('unidad_productiva')
+        }
+        
+        trabajo = TrabajoReporte(
+            id=str(uuid.uuid4()),
+            estado='pendiente',
+            parametros=parametros,
+            usuario_id=int(usuario_id) if usuario_id else None
+        )
+        
+        try:
+            # Depurar trabajos antiguos junto con el alta
+            db.session.execute(
+                delete(TrabajoReporte).where(TrabajoReporte.creado_en < datetime.utcnow() - self.RETENCION)
+            )
+            db.session.add(trabajo)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return None, {'database': [str(e)]}
+        
+        try:
+            self._enviar(trabajo.id)
+        except Exception as e:
+            trabajo.estado = 'error'
+            trabajo.error = f'No se pudo encolar el trabajo: {str(e)}'
+            trabajo.finalizado_en = datetime.utcnow()
+            db.session.commit()
+            return None, {'trabajo': [trabajo.error]}
+        
+        return trabajo, None
+    
+    def get_trabajo(self, trabajo_id):
+        """
+        Obtener un trabajo de reporte. Los trabajos que exceden el tiempo máximo
+        sin terminar (p. ej. por reinicio del worker) se marcan como error.
+        
+        Args:
+            trabajo_id (str): ID del trabajo
+        
+        Returns:
+            TrabajoReporte or None: El trabajo si existe, None si no
+        """
+        trabajo = TrabajoReporte.query.get(trabajo_id)
+        
+        if (trabajo and trabajo.estado in ('pendiente', 'en_proceso')
+                and trabajo.creado_en < datetime.utcnow() - self.TIEMPO_MAXIMO):
+            trabajo.estado = 'error'
+            trabajo.error = 'El trabajo fue interrumpido o excedió el tiempo máximo'
+            trabajo.finalizado_en = datetime.utcnow()
+            db.session.commit()
+        
+        return trabajo
+    
+    def ejecutar(self, trabajo_id):
+        """
+        Generar el reporte de un trabajo y guardar su resultado (se ejecuta en el proceso hijo)
+        
+        Args:
+            trabajo_id (str): ID del trabajo
+        """
+        trabajo = TrabajoReporte.query.get(trabajo_id)
+        if not trabajo or trabajo.estado != 'pendiente':
+            return
+        
+        trabajo.estado = 'en_proceso'
+        trabajo.iniciado_en = datetime.utcnow()
+        db.session.commit()
+        
+        parametros = trabajo.parametros
+        try:
+            reporte = self.asistencia_service.generar_reporte_asistencias(
+                date.fromisoformat(parametros['fecha_inicio']),
+                date.fromisoformat(parametros['fecha_fin']),
+                parametros.get('area'),
+                parametros.get('unidad_productiva')
+            )
+            trabajo.resultado = reporte
+            trabajo.estado = 'completado'
+        except Exception as e:
+            db.session.rollback()
+            trabajo = TrabajoReporte.query.get(trabajo_id)
+            trabajo.estado = 'error'
+            trabajo.error = str(e)
+        
+        trabajo.finalizado_en = datetime.utcnow()
+        db.session.commit()
+    
+    def cerrar(self):
+        """Detiene el pool de procesos de este worker sin esperar los trabajos en curso"""
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _enviar(self, trabajo_id):
+        """Envía un trabajo al pool, recreándolo si un proceso hijo terminó de forma abrupta"""
+        try:
+            self._get_pool().submit(_ejecutar_trabajo, trabajo_id)
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            self._get_pool().submit(_ejecutar_trabajo, trabajo_id)
+    
+    def _get_pool(self):
+        """Obtiene el pool de procesos de este worker, creándolo al primer uso"""
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=current_app.config.get('REPORTE_TRABAJOS_PROCESOS', 2),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_inicializar_proceso
+                )
+                self._pid = os.getpid()
+            return self._pool
@@ -18,4 +18,33 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
     
     # Configuración de Paginación
-    ITEMS_PER_PAGE = 20
\ No newline at end of file
+    ITEMS_PER_PAGE = 20
+    
+    # Modo de registro de marcaciones:
+    # 'sincrono' actualiza la asistencia en la solicitud,
+    # 'eventos' solo inserta en marcaciones y el proyector actualiza las asistencias,
+    # 'diferido' encola en memoria y un hilo por worker confirma por lotes
+    # (una salida atendida por otro worker antes de confirmar su entrada se reintenta; ver BufferRegistros)
+    ASISTENCIA_REGISTRO_MODO = os.environ.get('ASISTENCIA_REGISTRO_MODO', 'sincrono')
+    
+    # Configuración del buffer de registro diferido
+    BUFFER_REGISTROS_CAPACIDAD = int(os.environ.get('BUFFER_REGISTROS_CAPACIDAD', 5000))
+    BUFFER_REGISTROS_INTERVALO_MS = int(os.environ.get('BUFFER_REGISTROS_INTERVALO_MS', 200))
+    BUFFER_REGISTROS_LOTE = int(os.environ.get('BUFFER_REGISTROS_LOTE', 500))
+    
+    # Streams de presencia (SSE) abiertos a la vez por worker; cada uno ocupa un hilo de gunicorn
+    # durante la conexión, así que debe quedar por debajo de GUNICORN_THREADS
+    PRESENCIA_MAX_STREAMS = int(os.environ.get('PRESENCIA_MAX_STREAMS', 4))
+    
+    # Procesos por worker para generar reportes asíncronos
+    REPORTE_TRABAJOS_PROCESOS = int(os.environ.get('REPORTE_TRABAJOS_PROCESOS', 2))
+    
+    # Particiones mensuales de asistencias (PostgreSQL): meses creados por adelantado
+    # y meses adjuntos conservados (0 para no separar particiones antiguas)
+    PARTICIONES_MESES_FUTUROS = int(os.environ.get('PARTICIONES_MESES_FUTUROS', 3))
+    PARTICIONES_RETENCION_MESES = int(os.environ.get('PARTICIONES_RETENCION_MESES', 0))
+    
+    # Archivo en frío de asistencias: directorio de los archivos Parquet
+    # y meses conservados en la tabla además del actual
+    ARCHIVO_ASISTENCIAS_DIR = os.environ.get('ARCHIVO_ASISTENCIAS_DIR') or os.path.join(os.path.dirname(os.path.dirname(basedir)), 'archivo')
+    ARCHIVO_MESES_ACTIVOS = int(os.environ.get('ARCHIVO_MESES_ACTIVOS', 18))
\ No newline at end of file
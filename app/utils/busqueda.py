@@ -0,0 +1,182 @@
+import os
+import threading
+import time as reloj
+import unicodedata
+from collections import Counter
+from sqlalchemy import event, func, case, false, literal_column, String
+from app import db
+from app.utils.sql import dialecto_actual
+
+# Fracción mínima de trigramas del término presentes en el texto para aceptar una coincidencia
+# aproximada (el mismo valor por defecto que pg_trgm.word_similarity_threshold)
+UMBRAL_SIMILITUD = 0.6
+
+def normalizar(texto):
+    """
+    Normaliza un texto para búsqueda: minúsculas y sin tildes ni diacríticos
+    
+    Args:
+        texto (str): Texto a normalizar
+    
+    Returns:
+        str: Texto normalizado
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+def trigramas(texto):
+    """
+    Trigramas de un texto normalizado como los calcula pg_trgm: cada palabra se rellena
+    con dos espacios al inicio y uno al final
+    
+    Args:
+        texto (str): Texto normalizado
+    
+    Returns:
+        set: Trigramas del texto
+    """
+    resultado = set()
+    for palabra in ''.join(c if c.isalnum() else ' ' for c in texto).split():
+        relleno = f'  {palabra} '
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+def texto_busqueda(*columnas):
+    """
+    Expresión SQL (PostgreSQL) con las columnas concatenadas, en minúsculas y sin tildes.
+    Debe coincidir con la expresión de los índices GIN de trigramas creados en la migración.
+    
+    Args:
+        *columnas: Columnas de texto no nulas
+    
+    Returns:
+        Expresión SQL de tipo texto
+    """
+    concatenado = columnas[0]
+    for columna in columnas[1:]:
+        concatenado = concatenado + literal_column("' '") + columna
+    return func.f_unaccent(func.lower(concatenado), type_=String)
+
+def aplicar_busqueda(query, termino, columnas, indice):
+    """
+    Filtra una consulta por un término de búsqueda sin distinguir tildes ni mayúsculas.
+    Acepta el término como subcadena o, con errores de escritura, por similitud de trigramas.
+    En PostgreSQL usa pg_trgm (índices GIN); en otros motores, el índice en memoria.
+    
+    Args:
+        query: Consulta sobre el modelo del índice
+        termino (str): Término de búsqueda
+        columnas (tuple): Columnas de texto en las que se busca
+        indice (IndiceBusqueda): Índice en memoria del modelo (fallback)
+    
+    Returns:
+        tuple: (query filtrada, expresión de relevancia para ordenar de forma descendente)
+    """
+    if dialecto_actual() == 'postgresql':
+        texto = texto_busqueda(*columnas)
+        termino_sql = func.f_unaccent(func.lower(termino), type_=String)
+        patron = termino.replace('/', '//').replace('%', '/%').replace('_', '/_')
+        coincide = texto.like('%' + func.f_unaccent(func.lower(patron), type_=String) + '%', escape='/')
+        # texto %> término: similitud de palabra sobre el umbral de pg_trgm (usa el índice GIN)
+        query = query.filter(coincide | texto.op('%>', is_comparison=True)(termino_sql))
+        return query, func.word_similarity(termino_sql, texto)
+    
+    puntajes = indice.buscar(termino)
+    if not puntajes:
+        return query.filter(false()), None
+    
+    id_columna = indice.modelo.id
+    query = query.filter(id_columna.in_(list(puntajes)))
+    return query, case(puntajes, value=id_columna, else_=0)
+
+class IndiceBusqueda:
+    """
+    Índice invertido de trigramas en memoria (por proceso) sobre columnas de texto de un modelo.
+    Reemplaza a pg_trgm en motores sin la extensión (SQLite en pruebas): se construye al primer
+    uso, se invalida con cualquier cambio del modelo en este proceso y se recarga cada CACHE_TTL.
+    """
+    
+    # Segundos tras los cuales se reconstruye el índice (cambios hechos por otros procesos)
+    CACHE_TTL = 300
+    
+    def __init__(self, modelo, columnas):
+        self.modelo = modelo
+        self.columnas = columnas
+        self._lock = threading.Lock()
+        self._pid = None
+        self._cargado_en = 0
+        self._textos = None  # {id: texto normalizado}
+        self._postings = {}  # {trigrama: {ids}}
+        
+        for evento in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(modelo, evento, self._on_cambio)
+    
+    def _on_cambio(self, mapper, connection, target):
+        self.invalidar()
+    
+    def invalidar(self):
+        """Descarta el índice; se reconstruirá en la próxima búsqueda"""
+        with self._lock:
+            self._textos = None
+            self._postings = {}
+    
+    def buscar(self, termino):
+        """
+        Busca un término en el índice
+        
+        Args:
+            termino (str): Término de búsqueda
+        
+        Returns:
+            dict: {id: relevancia} de los registros que contienen el término o lo aproximan
+        """
+        termino = normalizar(termino).strip()
+        if not termino:
+            return {}
+        
+        textos, postings = self._obtener()
+        
+        # Subcadena: los trigramas internos del término deben estar todos en el texto
+        internos = {termino[i:i + 3] for i in range(len(termino) - 2)}
+        if internos and all(t in postings for t in internos):
+            candidatos = set.intersection(*(postings[t] for t in internos))
+        elif internos:
+            candidatos = set()
+        else:
+            # Términos de una o dos letras: no hay trigramas internos que acoten la búsqueda
+            candidatos = textos.keys()
+        exactos = {i for i in candidatos if termino in textos[i]}
+        
+        # Similitud: fracción de trigramas del término presentes en el texto
+        del_termino = trigramas(termino)
+        coincidencias = Counter(i for t in del_termino for i in postings.get(t, ()))
+        puntajes = {
+            i: n / len(del_termino) for i, n in coincidencias.items()
+            if n / len(del_termino) >= UMBRAL_SIMILITUD or i in exactos
+        }
+        for i in exactos:
+            puntajes.setdefault(i, 0.0)
+        return puntajes
+    
+    def _obtener(self):
+        """Obtiene el índice, construyéndolo si no existe, es de otro proceso o venció"""
+        with self._lock:
+            if (self._textos is not None and self._pid == os.getpid()
+                    and reloj.monotonic() - self._cargado_en < self.CACHE_TTL):
+                return self._textos, self._postings
+        
+        filas = db.session.query(self.modelo.id, *self.columnas).all()
+        textos = {}
+        postings = {}
+        for id_, *valores in filas:
+            texto = normalizar(' '.join(v or '' for v in valores))
+            textos[id_] = texto
+            for trigrama in trigramas(texto) | {texto[i:i + 3] for i in range(len(texto) - 2)}:
+                postings.setdefault(trigrama, set()).add(id_)
+        
+        with self._lock:
+            self._textos = textos
+            self._postings = postings
+            self._pid = os.getpid()
+            self._cargado_en = reloj.monotonic()
+        return textos, postings
@@ -0,0 +1,135 @@
+import numpy as np
+
+SEGUNDOS_DIA = 24 * 3600
+
+def segundos_del_dia(hora):
+    """
+    Convierte una hora del día en segundos desde la medianoche
+    
+    Args:
+        hora (time): Hora a convertir
+        
+    Returns:
+        float: Segundos desde la medianoche, NaN si la hora es None
+    """
+    if hora is None:
+        return np.nan
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+def calcular_horas_vectorizado(entrada_seg, salida_seg, jornada_normal):
+    """
+    Calcula horas trabajadas y extras para arreglos de marcaciones,
+    con la misma regla que Asistencia.calcular_horas
+    
+    Args:
+        entrada_seg (ndarray): Segundos desde la medianoche de la entrada (NaN si no hay)
+        salida_seg (ndarray): Segundos desde la medianoche de la salida (NaN si no hay)
+        jornada_normal (float or ndarray): Horas de la jornada normal
+        
+    Returns:
+        tuple: (horas_trabajadas, horas_extras) como ndarrays
+    """
+    entrada_seg = np.asarray(entrada_seg, dtype=np.float64)
+    salida_seg = np.asarray(salida_seg, dtype=np.float64)
+    
+    completo = ~(np.isnan(entrada_seg) | np.isnan(salida_seg))
+    
+    # Si la salida es antes que la entrada, se asume que pasó la medianoche
+    total_seg = salida_seg - entrada_seg
+    total_seg = np.where(total_seg < 0, total_seg + SEGUNDOS_DIA, total_seg)
+    total_horas = total_seg / 3600
+    
+    horas_trabajadas = np.where(completo, np.minimum(total_horas, jornada_normal), 0.0)
+    horas_extras = np.where(completo, np.maximum(0.0, total_horas - jornada_normal), 0.0)
+    
+    return horas_trabajadas, horas_extras
+
+class EvaluadorHoras:
+    """
+    Regla de horas compilada: valores de la regla precalculados en segundos para evaluar
+    una marcación (calcular) o un lote de marcaciones (calcular_lote) sin consultar la base de datos.
+    
+    - Jornada normal (y opcionalmente una distinta para el sábado): el excedente son horas extras.
+    - Recargo nocturno: cada hora trabajada dentro de la franja nocturna suma la fracción
+      recargo_nocturno a las horas extras.
+    """
+    
+    __slots__ = ('jornada_normal', 'jornada_sabado', 'nocturno', 'recargo_nocturno')
+    
+    def __init__(self, jornada_normal, jornada_sabado=None, nocturno_inicio=None, nocturno_fin=None,
+                 recargo_nocturno=0):
+        self.jornada_normal = float(jornada_normal)
+        self.jornada_sabado = float(jornada_sabado) if jornada_sabado is not None else self.jornada_normal
+        self.recargo_nocturno = float(recargo_nocturno or 0)
+        
+        # Franja nocturna como intervalos en segundos de un eje de tres días (ayer, hoy y mañana),
+        # de modo que cubra jornadas que cruzan la medianoche y franjas como 22:00-06:00
+        self.nocturno = ()
+        if nocturno_inicio is not None and nocturno_fin is not None and self.recargo_nocturno:
+            inicio = segundos_del_dia(nocturno_inicio)
+            fin = segundos_del_dia(nocturno_fin)
+            if fin <= inicio:
+                fin += SEGUNDOS_DIA
+            self.nocturno = tuple((inicio + k * SEGUNDOS_DIA, fin + k * SEGUNDOS_DIA) for k in (-1, 0, 1))
+    
+    def calcular(self, fecha, hora_entrada, hora_salida):
+        """
+        Calcula horas trabajadas y extras de una marcación
+        
+        Args:
+            fecha (date): Fecha de la asistencia
+            hora_entrada (time): Hora de entrada (o None)
+            hora_salida (time): Hora de salida (o None)
+            
+        Returns:
+            tuple: (horas_trabajadas, horas_extras)
+        """
+        if not hora_entrada or not hora_salida:
+            return 0, 0
+        
+        entrada = segundos_del_dia(hora_entrada)
+        salida = segundos_del_dia(hora_salida)
+        
+        # Si la salida es antes que la entrada, se asume que pasó la medianoche
+        if salida < entrada:
+            salida += SEGUNDOS_DIA
+        total_horas = (salida - entrada) / 3600
+        
+        jornada = self.jornada_sabado if fecha.weekday() == 5 else self.jornada_normal
+        horas_trabajadas = min(total_horas, jornada)
+        horas_extras = max(0, total_horas - jornada)
+        
+        if self.nocturno:
+            nocturnos = sum(max(0, min(salida, fin) - max(entrada, inicio)) for inicio, fin in self.nocturno)
+            horas_extras += self.recargo_nocturno * nocturnos / 3600
+        
+        return horas_trabajadas, horas_extras
+    
+    def calcular_lote(self, ordinales, entrada_seg, salida_seg):
+        """
+        Calcula horas trabajadas y extras de un lote de marcaciones con operaciones vectorizadas
+        
+        Args:
+            ordinales (ndarray): Fechas como ordinales (date.toordinal())
+            entrada_seg (ndarray): Segundos desde la medianoche de la entrada (NaN si no hay)
+            salida_seg (ndarray): Segundos desde la medianoche de la salida (NaN si no hay)
+            
+        Returns:
+            tuple: (horas_trabajadas, horas_extras) como ndarrays
+        """
+        entrada_seg = np.asarray(entrada_seg, dtype=np.float64)
+        salida_seg = np.asarray(salida_seg, dtype=np.float64)
+        
+        # El ordinal 1 (0001-01-01) es lunes: el sábado deja resto 6 al dividir entre 7
+        jornada = np.where(np.asarray(ordinales) % 7 == 6, self.jornada_sabado, self.jornada_normal)
+        horas_trabajadas, horas_extras = calcular_horas_vectorizado(entrada_seg, salida_seg, jornada)
+        
+        if self.nocturno:
+            completo = ~(np.isnan(entrada_seg) | np.isnan(salida_seg))
+            salida = np.where(salida_seg < entrada_seg, salida_seg + SEGUNDOS_DIA, salida_seg)
+            nocturnos = np.zeros(len(entrada_seg))
+            for inicio, fin in self.nocturno:
+                nocturnos += np.maximum(0, np.minimum(salida, fin) - np.maximum(entrada_seg, inicio))
+            horas_extras = horas_extras + np.where(completo, self.recargo_nocturno * nocturnos / 3600, 0.0)
+        
+        return horas_trabajadas, horas_extras
@@ -0,0 +1,98 @@
+import json
+from sqlalchemy import func, literal_column, select, values, column, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+def dialecto_actual():
+    """
+    Obtiene el nombre del dialecto de la base de datos en uso
+    
+    Returns:
+        str: Nombre del dialecto ('postgresql', 'sqlite', ...)
+    """
+    return db.session.get_bind().dialect.name
+
+def insert_con_conflicto():
+    """
+    Obtiene el constructor INSERT con soporte ON CONFLICT del dialecto activo
+    
+    Returns:
+        callable or None: postgresql.insert o sqlite.insert, None si el motor no soporta upsert
+    """
+    dialecto = dialecto_actual()
+    if dialecto == 'postgresql':
+        return postgresql.insert
+    if dialecto == 'sqlite':
+        return sqlite.insert
+    return None
+
+def inicio_de_mes(columna):
+    """
+    Expresión SQL que trunca una columna de fecha al primer día de su mes
+    
+    Args:
+        columna: Columna o expresión de tipo fecha
+        
+    Returns:
+        Expresión SQL de tipo fecha
+    """
+    if dialecto_actual() == 'postgresql':
+        return func.date_trunc('month', columna).cast(db.Date)
+    return func.date(columna, 'start of month')
+
+def ordinal_fecha(columna):
+    """
+    Expresión SQL con el ordinal proléptico de una fecha (date.toordinal(): 0001-01-01 es 1)
+    
+    Args:
+        columna: Columna o expresión de tipo fecha
+        
+    Returns:
+        Expresión SQL de tipo entero
+    """
+    if dialecto_actual() == 'postgresql':
+        return columna - literal_column("DATE '0001-01-01'") + 1
+    return func.cast(func.julianday(columna) - 1721424.5, db.Integer)
+
+def segundos_del_dia(columna):
+    """
+    Expresión SQL con los segundos transcurridos desde la medianoche de una hora
+    
+    Args:
+        columna: Columna o expresión de tipo hora
+        
+    Returns:
+        Expresión SQL numérica (NULL si la hora es NULL)
+    """
+    if dialecto_actual() == 'postgresql':
+        return func.extract('epoch', columna)
+    return func.round((func.julianday(columna) - func.julianday('00:00:00')) * 86400)
+
+def tabla_valores(nombre, columnas, filas):
+    """
+    Tabla de valores literales para usar en FROM (p. ej. UPDATE ... FROM) con una sola sentencia
+    
+    Args:
+        nombre (str): Alias de la tabla
+        columnas (list): Tuplas (nombre, tipo SQLAlchemy instanciado)
+        filas (list): Tuplas de valores en el orden de las columnas
+        
+    Returns:
+        FromClause: Tabla con las columnas indicadas
+    """
+    if dialecto_actual() == 'postgresql':
+        return values(*(column(nombre_columna, tipo) for nombre_columna, tipo in columnas), name=nombre).data(filas)
+    
+    # Otros motores: las filas viajan como un único parámetro JSON, convertidas como las guardaría la columna
+    dialecto = db.session.get_bind().dialect
+    procesadores = [tipo.dialect_impl(dialecto).bind_processor(dialecto) for _, tipo in columnas]
+    datos = [
+        [procesador(valor) if procesador and valor is not None else valor
+         for procesador, valor in zip(procesadores, fila)]
+        for fila in filas
+    ]
+    elementos = func.json_each(json.dumps(datos)).table_valued('value')
+    return select(*(
+        type_coerce(func.json_extract(elementos.c.value, f'$[{indice}]'), tipo).label(nombre_columna)
+        for indice, (nombre_columna, tipo) in enumerate(columnas)
+    )).subquery(nombre)
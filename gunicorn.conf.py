@@ -0,0 +1,17 @@
+# Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo)
+import os
+
+# Workers con hilos: cada conexión abierta del stream de presencia (SSE) ocupa un hilo,
+# no el worker completo, y el worker sigue notificando al árbitro mientras los streams siguen abiertos.
+# PRESENCIA_MAX_STREAMS limita esos hilos para que queden libres para las demás solicitudes
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+def worker_exit(server, worker):
+    """
+    Confirma las marcaciones diferidas en memoria y detiene el pool de reportes
+    antes de que termine el worker
+    """
+    from app.api.v1.services import buffer_registros, trabajo_reporte_service
+    buffer_registros.drenar()
+    trabajo_reporte_service.cerrar()
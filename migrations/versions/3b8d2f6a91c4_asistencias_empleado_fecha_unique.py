@@ -0,0 +1,28 @@
+"""Unique index on asistencias (empleado_id, fecha)
+
+Revision ID: 3b8d2f6a91c4
+Revises: 7967f6b355ca
+Create Date: 2026-10-16 09:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8d2f6a91c4'
+down_revision = '7967f6b355ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nota: si existen registros duplicados para un mismo empleado y día,
+    # deben depurarse antes de aplicar esta migración.
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.create_index('ix_asistencias_empleado_fecha', ['empleado_id', 'fecha'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.drop_index('ix_asistencias_empleado_fecha')
@@ -0,0 +1,30 @@
+"""Holiday calendar table
+
+Revision ID: 5a0b6d2e8f47
+Revises: e41f9c3a7d25
+Create Date: 2026-10-16 12:40:19.337106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a0b6d2e8f47'
+down_revision = 'e41f9c3a7d25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('feriados',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('descripcion', sa.String(length=150), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fecha')
+    )
+
+
+def downgrade():
+    op.drop_table('feriados')
@@ -0,0 +1,36 @@
+"""Pending approval queue: partial index and claim columns
+
+Revision ID: 9d7c1e4b2a68
+Revises: 5a0b6d2e8f47
+Create Date: 2026-10-16 13:55:42.610274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d7c1e4b2a68'
+down_revision = '5a0b6d2e8f47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reclamado_por', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('reclamado_hasta', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('fk_asistencias_reclamado_por', 'usuarios', ['reclamado_por'], ['id'])
+
+    op.create_index('ix_asistencias_pendientes', 'asistencias', ['fecha', 'empleado_id'], unique=False,
+                    postgresql_where=sa.text("estado = 'Pendiente'"),
+                    sqlite_where=sa.text("estado = 'Pendiente'"))
+
+
+def downgrade():
+    op.drop_index('ix_asistencias_pendientes', table_name='asistencias')
+
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_asistencias_reclamado_por', type_='foreignkey')
+        batch_op.drop_column('reclamado_hasta')
+        batch_op.drop_column('reclamado_por')
@@ -0,0 +1,55 @@
+"""Monthly payroll close with frozen per-employee totals
+
+Revision ID: a3d8c6f1e204
+Revises: f5b9e2c8a416
+Create Date: 2026-10-16 21:18:44.517630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d8c6f1e204'
+down_revision = 'f5b9e2c8a416'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('periodos_cerrados',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('periodo', sa.Date(), nullable=False),
+    sa.Column('fecha_inicio', sa.Date(), nullable=False),
+    sa.Column('fecha_fin', sa.Date(), nullable=False),
+    sa.Column('dias_laborables', sa.Integer(), nullable=False),
+    sa.Column('empleados', sa.Integer(), nullable=False),
+    sa.Column('pendientes', sa.Integer(), nullable=False),
+    sa.Column('usuario_cierre', sa.Integer(), nullable=False),
+    sa.Column('cerrado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_cierre'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('periodo')
+    )
+    op.create_table('cierres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('periodo', sa.Date(), nullable=False),
+    sa.Column('empleado_id', sa.Integer(), nullable=False),
+    sa.Column('cedula', sa.String(length=20), nullable=False),
+    sa.Column('nombres', sa.String(length=100), nullable=False),
+    sa.Column('apellidos', sa.String(length=100), nullable=False),
+    sa.Column('area', sa.String(length=100), nullable=True),
+    sa.Column('unidad_productiva', sa.String(length=100), nullable=True),
+    sa.Column('horas_trabajadas', sa.Float(), nullable=False),
+    sa.Column('horas_extras', sa.Float(), nullable=False),
+    sa.Column('dias_asistidos', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['empleado_id'], ['empleados.id'], ),
+    sa.ForeignKeyConstraint(['periodo'], ['periodos_cerrados.periodo'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('periodo', 'empleado_id', name='uq_cierres_periodo_empleado')
+    )
+
+
+def downgrade():
+    op.drop_table('cierres')
+    op.drop_table('periodos_cerrados')
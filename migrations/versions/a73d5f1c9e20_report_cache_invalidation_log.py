@@ -0,0 +1,35 @@
+"""Report cache invalidation log
+
+Revision ID: a73d5f1c9e20
+Revises: f28a4c6e1b93
+Create Date: 2026-10-16 17:02:41.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a73d5f1c9e20'
+down_revision = 'f28a4c6e1b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('invalidaciones_reporte',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('fecha_inicio', sa.Date(), nullable=True),
+    sa.Column('fecha_fin', sa.Date(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('invalidaciones_reporte', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invalidaciones_reporte_creado_en'), ['creado_en'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('invalidaciones_reporte', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invalidaciones_reporte_creado_en'))
+
+    op.drop_table('invalidaciones_reporte')
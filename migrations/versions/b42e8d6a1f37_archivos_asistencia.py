@@ -0,0 +1,39 @@
+"""Cold archive index of attendance Parquet files
+
+Revision ID: b42e8d6a1f37
+Revises: e83c2a5d7f19
+Create Date: 2026-10-16 19:14:08.226731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b42e8d6a1f37'
+down_revision = 'e83c2a5d7f19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archivos_asistencia',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('periodo', sa.Date(), nullable=False),
+    sa.Column('unidad_productiva', sa.String(length=100), nullable=False),
+    sa.Column('ruta', sa.String(length=500), nullable=False),
+    sa.Column('filas', sa.Integer(), nullable=False),
+    sa.Column('bytes', sa.BigInteger(), nullable=False),
+    sa.Column('archivado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('periodo', 'unidad_productiva', name='uq_archivo_periodo_unidad')
+    )
+    with op.batch_alter_table('archivos_asistencia', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archivos_asistencia_periodo'), ['periodo'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('archivos_asistencia', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archivos_asistencia_periodo'))
+
+    op.drop_table('archivos_asistencia')
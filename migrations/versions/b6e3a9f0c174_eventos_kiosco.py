@@ -0,0 +1,34 @@
+"""Idempotency table for offline kiosk sync
+
+Revision ID: b6e3a9f0c174
+Revises: 9d7c1e4b2a68
+Create Date: 2026-10-16 15:08:37.442981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e3a9f0c174'
+down_revision = '9d7c1e4b2a68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('eventos_kiosco',
+    sa.Column('kiosco_id', sa.String(length=64), nullable=False),
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('empleado_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_registro', sa.String(length=10), nullable=False),
+    sa.Column('marcado_en', sa.DateTime(), nullable=False),
+    sa.Column('resultado', sa.String(length=20), nullable=False),
+    sa.Column('mensaje', sa.String(length=255), nullable=True),
+    sa.Column('recibido_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kiosco_id', 'id')
+    )
+
+
+def downgrade():
+    op.drop_table('eventos_kiosco')
@@ -0,0 +1,38 @@
+"""Per-row projected flag on marcaciones
+
+Revision ID: c4a9e7f2d815
+Revises: d6e1b9a4f358
+Create Date: 2026-10-17 09:12:40.318752
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e7f2d815'
+down_revision = 'd6e1b9a4f358'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('marcaciones', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('proyectada', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    # Las marcaciones hasta la marca de agua actual ya fueron proyectadas
+    op.execute(
+        "UPDATE marcaciones SET proyectada = TRUE "
+        "WHERE id <= (SELECT COALESCE(MAX(ultimo_id), 0) FROM proyecciones WHERE nombre = 'asistencias')"
+    )
+
+    op.create_index('ix_marcaciones_pendientes', 'marcaciones', ['id'], unique=False,
+                    postgresql_where=sa.text('NOT proyectada'),
+                    sqlite_where=sa.text('NOT proyectada'))
+
+
+def downgrade():
+    op.drop_index('ix_marcaciones_pendientes', table_name='marcaciones')
+
+    with op.batch_alter_table('marcaciones', schema=None) as batch_op:
+        batch_op.drop_column('proyectada')
@@ -0,0 +1,24 @@
+"""Index on asistencias (fecha DESC, empleado_id) for keyset pagination
+
+Revision ID: c52e7a0d8b13
+Revises: 3b8d2f6a91c4
+Create Date: 2026-10-16 10:03:48.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e7a0d8b13'
+down_revision = '3b8d2f6a91c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_asistencias_fecha_empleado', 'asistencias', [sa.text('fecha DESC'), 'empleado_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_asistencias_fecha_empleado', table_name='asistencias')
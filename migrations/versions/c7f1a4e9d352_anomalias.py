@@ -0,0 +1,44 @@
+"""Attendance anomalies found by the nightly scan
+
+Revision ID: c7f1a4e9d352
+Revises: b42e8d6a1f37
+Create Date: 2026-10-16 20:02:51.384107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f1a4e9d352'
+down_revision = 'b42e8d6a1f37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('anomalias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=30), nullable=False),
+    sa.Column('empleado_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('asistencia_id', sa.Integer(), nullable=True),
+    sa.Column('detalle', sa.String(length=255), nullable=True),
+    sa.Column('detectado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['empleado_id'], ['empleados.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tipo', 'empleado_id', 'fecha', name='uq_anomalias_tipo_empleado_fecha')
+    )
+    op.create_index('ix_anomalias_fecha_id', 'anomalias', [sa.text('fecha DESC'), 'id'], unique=False)
+    with op.batch_alter_table('anomalias', schema=None) as batch_op:
+        batch_op.create_index('ix_anomalias_tipo_fecha', ['tipo', 'fecha'], unique=False)
+        batch_op.create_index('ix_anomalias_empleado_fecha', ['empleado_id', 'fecha'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('anomalias', schema=None) as batch_op:
+        batch_op.drop_index('ix_anomalias_empleado_fecha')
+        batch_op.drop_index('ix_anomalias_tipo_fecha')
+    op.drop_index('ix_anomalias_fecha_id', table_name='anomalias')
+
+    op.drop_table('anomalias')
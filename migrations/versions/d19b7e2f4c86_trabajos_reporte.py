@@ -0,0 +1,41 @@
+"""Asynchronous report jobs
+
+Revision ID: d19b7e2f4c86
+Revises: a73d5f1c9e20
+Create Date: 2026-10-16 17:48:12.905377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd19b7e2f4c86'
+down_revision = 'a73d5f1c9e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('trabajos_reporte',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('parametros', sa.JSON(), nullable=False),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.Column('iniciado_en', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('trabajos_reporte', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_trabajos_reporte_creado_en'), ['creado_en'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trabajos_reporte', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_trabajos_reporte_creado_en'))
+
+    op.drop_table('trabajos_reporte')
@@ -0,0 +1,52 @@
+"""Trigram indexes for accent-insensitive employee and user search (PostgreSQL)
+
+Revision ID: d6e1b9a4f358
+Revises: a3d8c6f1e204
+Create Date: 2026-10-16 22:09:35.284716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6e1b9a4f358'
+down_revision = 'a3d8c6f1e204'
+branch_labels = None
+depends_on = None
+
+# Las expresiones deben coincidir con app.utils.busqueda.texto_busqueda para que se usen los índices
+INDICES = {
+    'ix_empleados_busqueda_trgm': ('empleados', "cedula || ' ' || nombres || ' ' || apellidos"),
+    'ix_usuarios_busqueda_trgm': ('usuarios', "nombre_usuario || ' ' || nombre_completo || ' ' || email"),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # pg_trgm y unaccent son extensiones de PostgreSQL; otros motores usan el índice en memoria
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() es STABLE (depende del diccionario configurado) y no se admite en índices:
+    # se envuelve fijando el diccionario en una función IMMUTABLE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    for nombre, (tabla, expresion) in INDICES.items():
+        op.execute(f"CREATE INDEX {nombre} ON {tabla} USING gin (f_unaccent(lower({expresion})) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for nombre in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nombre}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+    # Las extensiones se conservan: pueden usarlas otros objetos de la base de datos
@@ -0,0 +1,51 @@
+"""Monthly attendance summary table
+
+Revision ID: e41f9c3a7d25
+Revises: c52e7a0d8b13
+Create Date: 2026-10-16 11:27:05.918342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41f9c3a7d25'
+down_revision = 'c52e7a0d8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resumen_asistencias_mensual',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('empleado_id', sa.Integer(), nullable=False),
+    sa.Column('periodo', sa.Date(), nullable=False),
+    sa.Column('horas_trabajadas', sa.Float(), nullable=False),
+    sa.Column('horas_extras', sa.Float(), nullable=False),
+    sa.Column('dias_asistidos', sa.Integer(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['empleado_id'], ['empleados.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('empleado_id', 'periodo', name='uq_resumen_empleado_periodo')
+    )
+    op.create_index('ix_resumen_periodo', 'resumen_asistencias_mensual', ['periodo'], unique=False)
+
+    # Poblar el resumen con las asistencias ya aprobadas
+    if op.get_bind().dialect.name == 'postgresql':
+        periodo = "date_trunc('month', fecha)::date"
+    else:
+        periodo = "date(fecha, 'start of month')"
+    op.execute(
+        "INSERT INTO resumen_asistencias_mensual "
+        "(empleado_id, periodo, horas_trabajadas, horas_extras, dias_asistidos, actualizado_en) "
+        f"SELECT empleado_id, {periodo}, SUM(COALESCE(horas_trabajadas, 0)), SUM(COALESCE(horas_extras, 0)), "
+        "COUNT(id), CURRENT_TIMESTAMP "
+        "FROM asistencias WHERE estado = 'Aprobado' "
+        f"GROUP BY empleado_id, {periodo}"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_resumen_periodo', table_name='resumen_asistencias_mensual')
+    op.drop_table('resumen_asistencias_mensual')
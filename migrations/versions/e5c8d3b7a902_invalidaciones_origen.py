@@ -0,0 +1,26 @@
+"""Source table on report invalidations
+
+Revision ID: e5c8d3b7a902
+Revises: c4a9e7f2d815
+Create Date: 2026-10-17 11:46:05.129374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c8d3b7a902'
+down_revision = 'c4a9e7f2d815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invalidaciones_reporte', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('origen', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('invalidaciones_reporte', schema=None) as batch_op:
+        batch_op.drop_column('origen')
@@ -0,0 +1,115 @@
+"""Partition asistencias by month (PostgreSQL)
+
+Revision ID: e83c2a5d7f19
+Revises: d19b7e2f4c86
+Create Date: 2026-10-16 18:36:27.551940
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83c2a5d7f19'
+down_revision = 'd19b7e2f4c86'
+branch_labels = None
+depends_on = None
+
+# Meses futuros creados por la migración; después los mantiene `flask partitions ensure`
+MESES_FUTUROS = 3
+
+COLUMNAS = ('id, empleado_id, fecha, hora_entrada, hora_salida, horas_trabajadas, horas_extras, '
+            'observaciones, estado, usuario_aprobacion, fecha_aprobacion, reclamado_por, reclamado_hasta')
+
+
+def _crear_tabla(particionada):
+    # En una tabla particionada la clave primaria debe incluir la clave de partición
+    op.execute(f"""
+        CREATE TABLE asistencias (
+            id INTEGER NOT NULL DEFAULT nextval('asistencias_id_seq'),
+            empleado_id INTEGER NOT NULL REFERENCES empleados (id),
+            fecha DATE NOT NULL,
+            hora_entrada TIME WITHOUT TIME ZONE,
+            hora_salida TIME WITHOUT TIME ZONE,
+            horas_trabajadas DOUBLE PRECISION,
+            horas_extras DOUBLE PRECISION,
+            observaciones TEXT,
+            estado VARCHAR(20),
+            usuario_aprobacion INTEGER REFERENCES usuarios (id),
+            fecha_aprobacion TIMESTAMP WITHOUT TIME ZONE,
+            reclamado_por INTEGER,
+            reclamado_hasta TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT asistencias_pkey PRIMARY KEY ({'id, fecha' if particionada else 'id'}),
+            CONSTRAINT fk_asistencias_reclamado_por FOREIGN KEY (reclamado_por) REFERENCES usuarios (id)
+        ){' PARTITION BY RANGE (fecha)' if particionada else ''}
+    """)
+
+
+def _crear_indices():
+    # Definidos en la tabla particionada se crean automáticamente en cada partición
+    op.execute("CREATE UNIQUE INDEX ix_asistencias_empleado_fecha ON asistencias (empleado_id, fecha)")
+    op.execute("CREATE INDEX ix_asistencias_fecha_empleado ON asistencias (fecha DESC, empleado_id)")
+    op.execute("CREATE INDEX ix_asistencias_pendientes ON asistencias (fecha, empleado_id) "
+               "WHERE estado = 'Pendiente'")
+
+
+def _siguiente_mes(mes):
+    return date(mes.year + 1, 1, 1) if mes.month == 12 else date(mes.year, mes.month + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # El particionamiento declarativo es específico de PostgreSQL
+        return
+
+    op.execute("ALTER TABLE asistencias RENAME TO asistencias_sin_particionar")
+    op.execute("ALTER TABLE asistencias_sin_particionar RENAME CONSTRAINT asistencias_pkey TO asistencias_sin_particionar_pkey")
+    op.execute("ALTER SEQUENCE asistencias_id_seq OWNED BY NONE")
+
+    _crear_tabla(particionada=True)
+
+    # Una partición por mes desde el primer registro hasta MESES_FUTUROS meses adelante
+    primera = bind.execute(sa.text("SELECT min(fecha) FROM asistencias_sin_particionar")).scalar()
+    hoy = date.today()
+    mes = (primera or hoy).replace(day=1)
+    limite = hoy.replace(day=1)
+    for _ in range(MESES_FUTUROS):
+        limite = _siguiente_mes(limite)
+    while mes <= limite:
+        siguiente = _siguiente_mes(mes)
+        op.execute(f"CREATE TABLE asistencias_p{mes:%Y%m} PARTITION OF asistencias "
+                   f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{siguiente.isoformat()}')")
+        mes = siguiente
+    # Fechas fuera de las particiones mensuales (p. ej. marcaciones muy antiguas de un kiosco)
+    op.execute("CREATE TABLE asistencias_default PARTITION OF asistencias DEFAULT")
+
+    op.execute(f"INSERT INTO asistencias ({COLUMNAS}) SELECT {COLUMNAS} FROM asistencias_sin_particionar")
+    op.execute("DROP TABLE asistencias_sin_particionar")
+
+    # Índices después de la carga: se construyen una sola vez por partición
+    _crear_indices()
+    op.execute("ALTER SEQUENCE asistencias_id_seq OWNED BY asistencias.id")
+    op.execute("ANALYZE asistencias")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE asistencias RENAME TO asistencias_particionada")
+    op.execute("ALTER TABLE asistencias_particionada RENAME CONSTRAINT asistencias_pkey TO asistencias_particionada_pkey")
+    for indice in ('ix_asistencias_empleado_fecha', 'ix_asistencias_fecha_empleado', 'ix_asistencias_pendientes'):
+        op.execute(f"ALTER INDEX {indice} RENAME TO {indice}_particionada")
+    op.execute("ALTER SEQUENCE asistencias_id_seq OWNED BY NONE")
+
+    _crear_tabla(particionada=False)
+
+    # Las particiones separadas con `flask partitions ensure` no forman parte de la tabla y no se copian
+    op.execute(f"INSERT INTO asistencias ({COLUMNAS}) SELECT {COLUMNAS} FROM asistencias_particionada")
+    op.execute("DROP TABLE asistencias_particionada")
+
+    _crear_indices()
+    op.execute("ALTER SEQUENCE asistencias_id_seq OWNED BY asistencias.id")
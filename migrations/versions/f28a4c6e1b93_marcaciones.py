@@ -0,0 +1,40 @@
+"""Append-only punch event log and projector watermark
+
+Revision ID: f28a4c6e1b93
+Revises: b6e3a9f0c174
+Create Date: 2026-10-16 16:21:54.087215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f28a4c6e1b93'
+down_revision = 'b6e3a9f0c174'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('marcaciones',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('empleado_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_registro', sa.String(length=10), nullable=False),
+    sa.Column('marcado_en', sa.DateTime(), nullable=False),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('origen', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['empleado_id'], ['empleados.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('proyecciones',
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('ultimo_id', sa.BigInteger(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+
+
+def downgrade():
+    op.drop_table('proyecciones')
+    op.drop_table('marcaciones')
@@ -0,0 +1,36 @@
+"""Overtime rule sets per unidad productiva and area
+
+Revision ID: f5b9e2c8a416
+Revises: c7f1a4e9d352
+Create Date: 2026-10-16 20:41:17.902354
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5b9e2c8a416'
+down_revision = 'c7f1a4e9d352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reglas_horas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('unidad_productiva', sa.String(length=100), nullable=True),
+    sa.Column('area', sa.String(length=100), nullable=True),
+    sa.Column('jornada_normal', sa.Float(), nullable=False),
+    sa.Column('jornada_sabado', sa.Float(), nullable=True),
+    sa.Column('nocturno_inicio', sa.Time(), nullable=True),
+    sa.Column('nocturno_fin', sa.Time(), nullable=True),
+    sa.Column('recargo_nocturno', sa.Float(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('unidad_productiva', 'area', name='uq_reglas_horas_unidad_area')
+    )
+
+
+def downgrade():
+    op.drop_table('reglas_horas')
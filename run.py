@@ -1,4 +1,5 @@
 ﻿import os
+import click
 from app import create_app
 from flask_migrate import Migrate, upgrade
 from app.api.v1.models.usuario import Usuario
@@ -122,6 +123,145 @@ def create_demo_data():
         
         db.session.commit()
         print("Asistencias de demostración creadas con éxito.")
+        
+        # Las asistencias de demostración se crean aprobadas: actualizar el resumen mensual
+        from app.api.v1.services import resumen_service
+        resumen_service.reconstruir()
+
+@app.cli.command("rebuild-aggregates")
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Fecha de inicio (YYYY-MM-DD). Por defecto todo el histórico.')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Fecha fin (YYYY-MM-DD). Por defecto todo el histórico.')
+def rebuild_aggregates(desde, hasta):
+    """Reconstruye el resumen mensual de asistencias aprobadas."""
+    from app.api.v1.services import resumen_service
+    
+    with app.app_context():
+        filas = resumen_service.reconstruir(
+            desde.date() if desde else None,
+            hasta.date() if hasta else None
+        )
+        print(f"Resumen mensual reconstruido: {filas} filas generadas.")
+
+@app.cli.command("recalc-horas")
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='Fecha de inicio (YYYY-MM-DD).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='Fecha fin (YYYY-MM-DD).')
+@click.option('--lote', type=int, default=None, help='Filas por lote.')
+def recalc_horas(desde, hasta, lote):
+    """Recalcula horas trabajadas y extras de las asistencias de un período."""
+    from app.api.v1.services import recalculo_service
+    
+    with app.app_context():
+        stats = recalculo_service.recalcular_horas(desde.date(), hasta.date(), lote)
+        print(f"Asistencias procesadas: {stats['procesadas']}, actualizadas: {stats['actualizadas']}")
+        print(f"Tiempo: {stats['segundos']} s ({stats['filas_por_segundo']} filas/s)")
+
+@app.cli.command("proyectar-marcaciones")
+@click.option('--lote', type=int, default=None, help='Marcaciones por lote.')
+@click.option('--continuo', is_flag=True, help='Seguir proyectando hasta interrumpir el proceso.')
+@click.option('--intervalo', type=float, default=1.0, help='Segundos de espera sin marcaciones nuevas (modo continuo).')
+@click.option('--reiniciar', is_flag=True,
+              help='Reproyectar todo el historial (las asistencias derivadas deben depurarse antes; '
+                   'las de meses cerrados o archivados se rechazan).')
+def proyectar_marcaciones(lote, continuo, intervalo, reiniciar):
+    """Aplica las marcaciones registradas sobre las asistencias."""
+    import time
+    from app.api.v1.services import proyeccion_service
+    
+    with app.app_context():
+        if reiniciar:
+            proyeccion_service.reiniciar()
+            print("Marcaciones marcadas como pendientes de proyectar.")
+        
+        while True:
+            stats = proyeccion_service.proyectar(lote)
+            for rechazo in stats['rechazos']:
+                print(f"Marcación {rechazo['marcacion_id']} rechazada: {rechazo['error']}")
+            if stats['procesadas']:
+                print(f"Marcaciones proyectadas: {stats['procesadas']} "
+                      f"(aplicadas: {stats['aplicadas']}, rechazadas: {stats['rechazadas']}), "
+                      f"último ID proyectado: {stats['ultimo_id']}")
+            elif not continuo:
+                print("No hay marcaciones pendientes.")
+                break
+            else:
+                time.sleep(intervalo)
+
+@app.cli.group("partitions")
+def partitions():
+    """Gestión de las particiones mensuales de asistencias (PostgreSQL)."""
+
+@partitions.command("ensure")
+@click.option('--meses-futuros', type=int, default=None,
+              help='Meses a crear por adelantado. Por defecto PARTICIONES_MESES_FUTUROS.')
+@click.option('--retencion-meses', type=int, default=None,
+              help='Meses adjuntos a conservar; los anteriores ya cerrados o archivados se separan. Por defecto PARTICIONES_RETENCION_MESES (0: no separar).')
+def partitions_ensure(meses_futuros, retencion_meses):
+    """Crea las particiones de los próximos meses y separa las cerradas o archivadas que exceden la retención."""
+    from app.api.v1.services import particion_service
+    
+    with app.app_context():
+        if meses_futuros is None:
+            meses_futuros = app.config['PARTICIONES_MESES_FUTUROS']
+        if retencion_meses is None:
+            retencion_meses = app.config['PARTICIONES_RETENCION_MESES']
+        
+        try:
+            resultado = particion_service.asegurar(meses_futuros, retencion_meses)
+        except RuntimeError as e:
+            print(str(e))
+            return
+        
+        for nombre in resultado['creadas']:
+            print(f"Partición creada: {nombre}")
+        for nombre in resultado['separadas']:
+            print(f"Partición separada: {nombre}")
+        for nombre in resultado['retenidas']:
+            print(f"Partición retenida (mes sin cerrar ni archivar): {nombre}")
+        if not resultado['creadas'] and not resultado['separadas']:
+            print("Las particiones ya están al día.")
+
+@app.cli.command("archivar-asistencias")
+@click.option('--meses-activos', type=int, default=None,
+              help='Meses que se conservan en la tabla además del actual. Por defecto ARCHIVO_MESES_ACTIVOS.')
+def archivar_asistencias(meses_activos):
+    """Mueve los meses cerrados de asistencias a archivos Parquet comprimidos."""
+    from app.api.v1.services import archivo_service
+    
+    with app.app_context():
+        if meses_activos is None:
+            meses_activos = app.config['ARCHIVO_MESES_ACTIVOS']
+        
+        resultado = archivo_service.archivar(meses_activos)
+        for mes in resultado['archivados']:
+            print(f"Mes archivado: {mes}")
+        for mes in resultado['omitidos']:
+            print(f"Mes omitido (tiene asistencias pendientes): {mes}")
+        if not resultado['archivados'] and not resultado['omitidos']:
+            print("No hay meses por archivar.")
+
+@app.cli.command("scan-anomalias")
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Fecha de inicio (YYYY-MM-DD). Por defecto 30 días antes de --hasta.')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Fecha fin (YYYY-MM-DD). Por defecto ayer.')
+def scan_anomalias(desde, hasta):
+    """Detecta registros abiertos, duraciones imposibles, duplicados y días faltantes."""
+    from datetime import datetime, timedelta
+    from app.api.v1.services import anomalia_service
+    
+    with app.app_context():
+        hasta = hasta.date() if hasta else datetime.utcnow().date() - timedelta(days=1)
+        desde = desde.date() if desde else hasta - timedelta(days=29)
+        
+        stats = anomalia_service.escanear(desde, hasta)
+        print(f"Período {desde} a {hasta}: {stats['asistencias']} asistencias, {stats['empleados']} empleados activos")
+        for tipo, cantidad in stats['anomalias'].items():
+            print(f"  {tipo}: {cantidad}")
+        print(f"Tiempo: {stats['segundos']} s")
 
 if __name__ == '__main__':
     # El puerto se configura a través de la variable de entorno PORT si está disponible (útil para Heroku/Render)